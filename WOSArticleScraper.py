@@ -3,20 +3,324 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import (
+    InvalidSessionIdException,
+    TimeoutException,
+    WebDriverException,
+)
 from selenium.webdriver.common.action_chains import ActionChains
+import json
+import os
 import time
-from difflib import SequenceMatcher
+from urllib.parse import quote
+from record_parser import (
+    EXCLUDED_RESULT_WORDS,
+    FIELD_COLUMNS,
+    NO_ADDRESS,
+    TITLE_LINK,
+    build_title_query,
+    fields_for_columns,
+    format_details,
+    is_title_match,
+    match_author_addresses,
+    match_batch,
+    normalize_doi,
+    parse_candidate,
+    parse_address,
+    parse_record_html,
+    parse_result_list_html,
+    rank_candidates,
+)
+from stage_timer import timed
+
+# WOS 站点地址（测试时可换成本地模拟站点）
+WOS_BASE_URL = "https://webofscience.clarivate.cn"
+# 按地址直接打开检索结果页（跳过检索表单）；站点不认该地址时本次会话自动退回表单检索
+SEARCH_BY_URL = True
+SEARCH_URL = "/wos/alldb/general-summary?queryJson={query}"
+# 详情页提取方式：snapshot（等待一次，整页快照后离线解析）或 live（逐字段等待，实验性，
+# 其中 fetch_elements 批量读取的效果还没有实测）
+EXTRACTION_MODE = "snapshot"
+# 封禁/验证页面的特征文本（小写），用于向限速器报告 blocked。只与页面标题和下面的
+# 验证页元素比对，不查正文：文章标题或摘要里出现这些词不算封禁
+BLOCK_MARKERS = (
+    "captcha",
+    "access denied",
+    "too many requests",
+    "unusual traffic",
+    "temporarily blocked",
+    "just a moment",
+    "attention required",
+)
+# 常见验证/拦截页的元素（reCAPTCHA、hCaptcha、PerimeterX、Cloudflare）
+BLOCK_SELECTORS = (
+    "iframe[src*='captcha']",
+    "div.g-recaptcha",
+    "div.h-captcha",
+    "#px-captcha",
+    "#challenge-form",
+    "#cf-challenge-running",
+)
+
+# 页面失败状态：(状态名, 条件)，"text=" 开头表示匹配页面可见文本（小写），
+# "title=" 开头表示匹配页面标题（小写），其余为 CSS 选择器
+FAILURE_STATES = (
+    [("blocked", f"title={marker}") for marker in BLOCK_MARKERS]
+    + [("blocked", selector) for selector in BLOCK_SELECTORS]
+    + [
+        ("no_results", "text=found no results"),
+        ("no_results", "text=no records found"),
+        ("error", "text=something went wrong"),
+        ("error", "text=server error"),
+    ]
+)
+COOKIE_SETTLE_MS = 1500  # 页面静止这么久仍无 cookie 弹窗，就认为不会出现
+RECORD_SETTLE_MS = 300  # 详情页标题出现后等待 DOM 静止的时间
+# 高级检索页：检索式输入框和检索按钮
+ADVANCED_QUERY_INPUT = "textarea#advancedSearchInputArea"
+ADVANCED_SEARCH_BUTTON = 'button[data-ta="run-search"]'
+# 结果列表页的导出流程：导出按钮 → 制表符分隔文件 → 记录范围/内容 → 确认导出
+EXPORT_BUTTON = "button#export-trigger-btn"
+EXPORT_TAB_OPTION = "button#exportToTabWinButton"
+EXPORT_RANGE_RADIO = "input#radio3-input"
+EXPORT_RANGE_FROM = 'input[name="markFrom"]'
+EXPORT_RANGE_TO = 'input[name="markTo"]'
+EXPORT_CONTENT_DROPDOWN = 'wos-select[name="fields"] button'
+EXPORT_FULL_RECORD = '//span[normalize-space(text())="Full Record"]'
+EXPORT_CONFIRM = "button#exportButton"
+EXPORT_MAX_RECORDS = 500  # WOS 单次导出的记录上限
+
+# 网络层拦截（Chrome DevTools 协议）：这些资源从不被读取，只消耗带宽和加载时间。
+# 实验性功能，还没有在真实 WOS 上实测效果，默认关闭（python benchmark.py blocking 可在模拟站点上比较）
+BLOCK_RESOURCES = False
+# 按资源类型拦截：image 通过浏览器设置禁用图片，其余类型换算成下面的文件后缀
+BLOCKED_RESOURCE_TYPES = ("image", "font", "media")
+RESOURCE_TYPE_PATTERNS = {
+    "image": ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.webp", "*.ico"],
+    "font": ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"],
+    "media": ["*.mp4", "*.webm", "*.mp3"],
+}
+# 按地址拦截：统计分析脚本，以及 OneTrust/Pendo 弹窗脚本（拦截后弹窗不再出现）
+BLOCKED_URL_PATTERNS = [
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*hotjar.com*",
+    "*newrelic.com*",
+    "*nr-data.net*",
+    "*cookielaw.org*",
+    "*onetrust.com*",
+    "*pendo.io*",
+    "*analytics.js*",
+]
+
+# 弹窗关闭按钮（cookie 同意、Pendo 引导等），由页面内的监视脚本在出现时立即点掉
+OVERLAY_SELECTORS = [
+    "button#onetrust-accept-btn-handler",
+    "button[id^='pendo-close-guide']",
+    "button._pendo-close-guide",
+]
+
+# 弹窗监视脚本：每个新页面加载前注入一次，出现匹配的弹窗就点掉，次数记在 sessionStorage
+OVERLAY_WATCHER_SCRIPT = """
+(function () {
+    if (window.__overlayWatcher) { return; }
+    window.__overlayWatcher = true;
+    var selectors = __SELECTORS__;
+    function visible(el) {
+        return !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+    }
+    function record(selector) {
+        try {
+            var counts = JSON.parse(sessionStorage.getItem('__overlayCounts') || '{}');
+            counts[selector] = (counts[selector] || 0) + 1;
+            sessionStorage.setItem('__overlayCounts', JSON.stringify(counts));
+        } catch (e) {}
+    }
+    function sweep() {
+        for (var i = 0; i < selectors.length; i++) {
+            var elements = document.querySelectorAll(selectors[i]);
+            for (var j = 0; j < elements.length; j++) {
+                var el = elements[j];
+                if (el.__dismissed || !visible(el)) { continue; }
+                el.__dismissed = true;
+                el.click();
+                record(selectors[i]);
+            }
+        }
+    }
+    var pending = false;
+    new MutationObserver(function () {
+        if (pending) { return; }
+        pending = true;
+        setTimeout(function () { pending = false; sweep(); }, 50);
+    }).observe(document, {childList: true, subtree: true, attributes: true,
+                          attributeFilter: ['style', 'class', 'hidden']});
+})();
+"""
+
+# 浏览器会话已失效的错误信息（小写）：wait_ready 立即抛出，不再轮询到超时
+SESSION_ERROR_MARKERS = (
+    "invalid session id",
+    "disconnected",
+    "chrome not reachable",
+    "no such window",
+    "session deleted",
+)
+
+# 复合就绪等待：任一条件满足、DOM 静止或超时即返回（在页面内轮询，一次往返）
+READY_SCRIPT = """
+var done = arguments[arguments.length - 1];
+var conditions = arguments[0], timeoutMs = arguments[1], settleMs = arguments[2];
+function visible(el) {
+    return !!(el && (el.offsetWidth || el.offsetHeight || el.getClientRects().length));
+}
+function match() {
+    var text = null;
+    for (var i = 0; i < conditions.length; i++) {
+        var name = conditions[i][0], selector = conditions[i][1];
+        if (selector.indexOf('text=') === 0) {
+            if (text === null) {
+                text = (document.body ? document.body.innerText : '').toLowerCase();
+            }
+            if (text.indexOf(selector.slice(5)) >= 0) { return name; }
+        } else if (selector.indexOf('title=') === 0) {
+            if (document.title.toLowerCase().indexOf(selector.slice(6)) >= 0) {
+                return name;
+            }
+        } else if (visible(document.querySelector(selector))) {
+            return name;
+        }
+    }
+    return null;
+}
+var start = Date.now(), last = Date.now();
+var observer = new MutationObserver(function () { last = Date.now(); });
+observer.observe(document.documentElement,
+    {childList: true, subtree: true, attributes: true, characterData: true});
+(function check() {
+    var name = match(), now = Date.now();
+    if (!name && settleMs && now - last >= settleMs) { name = 'settled'; }
+    if (name || now - start >= timeoutMs) {
+        observer.disconnect();
+        done(name);
+    } else {
+        setTimeout(check, 100);
+    }
+})();
+"""
+
+# 结果列表中每个条目的容器（候选的 DOI、年份等从容器文本中解析）
+RESULT_CONTAINER = "app-record, app-summary-record, .summary-record"
+# 一次取回所有匹配 CSS 选择器的元素的文本、指定属性和（可选）所在容器的文本
+ELEMENTS_SCRIPT = """
+var nodes = document.querySelectorAll(arguments[0]);
+var attributes = arguments[1], container = arguments[2];
+var items = [];
+for (var i = 0; i < nodes.length; i++) {
+    var node = nodes[i];
+    var item = {index: i, text: node.innerText};
+    for (var j = 0; j < attributes.length; j++) {
+        var name = attributes[j];
+        item[name] = node[name] !== undefined ? node[name] : node.getAttribute(name);
+    }
+    if (container) {
+        var box = node.closest(container)
+            || (node.parentElement && node.parentElement.parentElement)
+            || node.parentElement;
+        item.container = box ? box.innerText : '';
+    }
+    items.push(item);
+}
+return items;
+"""
+
+# 一次取回作者表：各作者条目的文本和编号地址表（匹配在 Python 中进行）
+AUTHOR_TABLE_SCRIPT = """
+var container = document.querySelector('span.cdx-grid-data');
+if (!container) { return null; }
+var authors = [];
+var spans = container.querySelectorAll('span.value.ng-star-inserted[id^="author-"]');
+for (var i = 0; i < spans.length; i++) { authors.push(spans[i].innerText); }
+var addresses = {};
+var nodes = document.querySelectorAll('[id^="address_"]');
+for (var j = 0; j < nodes.length; j++) {
+    addresses[nodes[j].id.slice('address_'.length)] = nodes[j].innerText;
+}
+return {authors: authors, addresses: addresses};
+"""
+
+# （需要地址时）展开作者/地址后等待 DOM 静止，再返回整页 HTML（一次往返）
+SNAPSHOT_SCRIPT = """
+var done = arguments[arguments.length - 1];
+var quietMs = arguments[0], maxMs = arguments[1], expand = arguments[2];
+if (expand) {
+    var more = document.evaluate('//span[contains(text(), "More")]', document, null,
+        XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    if (more) { more.click(); }
+    var addressView = document.querySelector('#FRACTa-authorAddressView');
+    if (addressView) { addressView.click(); }
+}
+var start = Date.now(), last = Date.now();
+var observer = new MutationObserver(function () { last = Date.now(); });
+observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+(function check() {
+    var now = Date.now();
+    if (now - last >= quietMs || now - start >= maxMs) {
+        observer.disconnect();
+        done(document.documentElement.outerHTML);
+    } else {
+        setTimeout(check, 50);
+    }
+})();
+"""
 
 
 class WOSArticleScraper:
-    def __init__(self):
+    def __init__(
+        self,
+        base_url=WOS_BASE_URL,
+        extraction_mode=EXTRACTION_MODE,
+        archive=None,
+        download_dir=None,
+        block_resources=BLOCK_RESOURCES,
+        measure=False,
+        profile_dir=None,
+        search_by_url=SEARCH_BY_URL,
+        co_authors=(),
+        columns=None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.extraction_mode = extraction_mode
+        self.archive = archive  # PageArchive，保存访问过的详情页
+        self.download_dir = download_dir  # 导出文件的下载目录（None 表示浏览器默认）
+        self.block_resources = block_resources  # 是否在网络层拦截无用资源
+        # 持久化的 Chrome 配置目录：cookie 同意和登录状态跨运行保留（None 表示临时配置）
+        self.profile_dir = profile_dir
+        # 按地址直接打开结果页；站点把该地址跳转到别的页面时本次会话停用，重启浏览器后恢复
+        self.default_search_by_url = search_by_url
+        self.search_by_url = search_by_url
+        # 同一详情页上一并解析地址的其他作者姓氏（多作者批量运行，结果在各作者的机构/国家列）
+        self.co_authors = tuple(co_authors)
+        # 详情页只提取 columns 需要的字段（None 表示全部），不需要地址时不展开作者/地址
+        self.fields = fields_for_columns(columns)
+        self.consent_done = False  # 本次会话已处理过 cookie 弹窗，之后不再等待
+        self.overlay_watcher = False  # 弹窗监视脚本是否已注入
+        self.overlay_counts = {}  # 已关闭的浏览器会话中各弹窗被点掉的次数
+        # 测量模式：记录每次页面跳转的传输字节数和就绪耗时（见 network_summary）
+        self.measure = measure
+        self.nav_metrics = []
+        self._nav_start = None
+        # 最近一次搜索的结果：ok / mismatch / empty / timeout / error / blocked
+        self.last_search_status = None
+        self.page_state = None  # 最近一次 wait_ready 的结果
         self.driver = None
         self.title = None
         self.keywords = []
         self.keywordsplus = []
         self.doi = None
         self.author_address = None
+        self.co_author_addresses = {}
         self.impact_factor = None
         self.abstract = None
 
@@ -28,110 +332,600 @@ class WOSArticleScraper:
         chrome_options.add_argument("--no-sandbox")  # 禁用沙盒模式
         chrome_options.add_argument("--disable-dev-shm-usage")  # 禁 /dev/shm 的使用
         chrome_options.add_argument("--ignore-certificate-errors")  # 忽略 SSL 证书错误
+        if self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            chrome_options.add_argument(
+                f"--user-data-dir={os.path.abspath(self.profile_dir)}"
+            )
+        prefs = {}
+        if self.download_dir:
+            os.makedirs(self.download_dir, exist_ok=True)
+            prefs["download.default_directory"] = os.path.abspath(self.download_dir)
+            prefs["download.prompt_for_download"] = False
+        if self.block_resources and "image" in BLOCKED_RESOURCE_TYPES:
+            prefs["profile.managed_default_content_settings.images"] = 2  # 禁用图片
+        if prefs:
+            chrome_options.add_experimental_option("prefs", prefs)
+        if self.measure:
+            # 性能日志中含每个请求的实际传输字节数（包括跨域资源）
+            chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
 
         self.driver = webdriver.Chrome(options=chrome_options)
         self.driver.set_page_load_timeout(30)  # 设置页面加载的超时时间
         self.driver.set_script_timeout(30)  # 设置异步脚本执行的超时时间
+        if self.block_resources:
+            self.block_requests()
+        self.install_overlay_watcher()
 
-    def search_article(self, title):
-        """搜索文章并进入详情页"""
+    def restart_driver(self):
+        """关闭当前浏览器（会话可能已断开）并重新启动，已关闭会话的弹窗次数保留"""
+        if self.driver:
+            self.overlay_counts = self.dismissed_overlays()
+            try:
+                self.driver.quit()
+            except Exception:
+                pass  # chromedriver 已退出
+        self.driver = None
+        # 新会话需要重新处理 cookie 弹窗、注入监视脚本，并重新尝试按地址检索
+        self.consent_done = False
+        self.overlay_watcher = False
+        self.search_by_url = self.default_search_by_url
+        self.init_driver()
+
+    def install_overlay_watcher(self):
+        """注入弹窗监视脚本（之后每个新页面自动生效，抓取步骤不再等待弹窗）"""
+        script = OVERLAY_WATCHER_SCRIPT.replace(
+            "__SELECTORS__", json.dumps(OVERLAY_SELECTORS)
+        )
+        try:
+            self.driver.execute_cdp_cmd(
+                "Page.addScriptToEvaluateOnNewDocument", {"source": script}
+            )
+            self.overlay_watcher = True
+            # cookie 弹窗也由监视脚本处理，不再单独等待
+            self.consent_done = True
+        except Exception as e:
+            print(f"注入弹窗监视脚本失败（改为逐次检查）: {e}")
+
+    def dismissed_overlays(self):
+        """当前会话中各弹窗被点掉的次数（含已关闭的浏览器会话）"""
+        counts = dict(self.overlay_counts)
         try:
-            self.driver.get("https://webofscience.clarivate.cn/wos/alldb/basic-search")
-            """alldb：跨多个数据库的综合检索。  woscc：仅限 Web of Science 核心合集的检索。"""
-            wait = WebDriverWait(self.driver, 10)  # 定义统一的等待对象
+            current = self.driver.execute_script(
+                "try { return sessionStorage.getItem('__overlayCounts'); }"
+                " catch (e) { return null; }"
+            )
+        except Exception:
+            current = None
+        for selector, count in json.loads(current or "{}").items():
+            counts[selector] = counts.get(selector, 0) + count
+        return counts
 
-            # 处理 Cookie 弹窗（使用 JS 点击）
-            self.handle_cookie_consent()
+    def block_requests(self):
+        """通过 DevTools 协议按地址模式拦截请求（资源类型换算成文件后缀）"""
+        patterns = list(BLOCKED_URL_PATTERNS)
+        for resource_type in BLOCKED_RESOURCE_TYPES:
+            patterns.extend(RESOURCE_TYPE_PATTERNS.get(resource_type, []))
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        except Exception as e:
+            print(f"设置请求拦截失败（继续不拦截运行）: {e}")
 
-            # 显式等待 Cookie 弹窗容器消失（关键！）
-            try:
-                wait.until(
-                    EC.invisibility_of_element_located(
-                        (By.ID, "onetrust-group-container")
-                    )
-                )
-                print("已确认 Cookie 弹窗完全关闭。")
-            except TimeoutException:
-                print("警告：Cookie 弹窗容器未及时关闭。")
+    def start_measure(self, label):
+        """测量模式：开始记录一次页面跳转（丢弃之前的网络日志）"""
+        if not self.measure:
+            return
+        self.drain_network_log()
+        self._nav_start = (label, time.time())
 
-            # ---------- 清理搜索框 ----------
-            try:
-                # 定位搜索输入框
-                search_input = wait.until(
-                    EC.presence_of_element_located(
-                        (By.CSS_SELECTOR, "input[id='search-option']")
+    def end_measure(self):
+        """测量模式：页面就绪时结束记录，保存传输字节数、请求数、被拦截数和就绪耗时"""
+        if not self.measure or self._nav_start is None:
+            return
+        label, started = self._nav_start
+        self._nav_start = None
+        total_bytes, requests, blocked = self.drain_network_log()
+        self.nav_metrics.append(
+            {
+                "page": label,
+                "bytes": total_bytes,
+                "requests": requests,
+                "blocked": blocked,
+                "ready_ms": (time.time() - started) * 1000,
+            }
+        )
+
+    def drain_network_log(self):
+        """读取并清空性能日志，返回 (传输字节数, 完成的请求数, 被拦截的请求数)"""
+        total_bytes = requests = blocked = 0
+        try:
+            entries = self.driver.get_log("performance")
+        except Exception:
+            return total_bytes, requests, blocked
+        for entry in entries:
+            message = json.loads(entry["message"])["message"]
+            method, params = message.get("method"), message.get("params", {})
+            if method == "Network.loadingFinished":
+                total_bytes += params.get("encodedDataLength", 0)
+                requests += 1
+            elif method == "Network.loadingFailed" and params.get("blockedReason"):
+                blocked += 1
+        return total_bytes, requests, blocked
+
+    def network_summary(self):
+        """按页面类型汇总测量结果：{页面: {次数, 平均字节数, 平均请求数, 平均拦截数, 平均就绪毫秒}}"""
+        summary = {}
+        for metric in self.nav_metrics:
+            summary.setdefault(metric["page"], []).append(metric)
+        return {
+            page: {
+                "count": len(metrics),
+                "bytes": sum(m["bytes"] for m in metrics) / len(metrics),
+                "requests": sum(m["requests"] for m in metrics) / len(metrics),
+                "blocked": sum(m["blocked"] for m in metrics) / len(metrics),
+                "ready_ms": sum(m["ready_ms"] for m in metrics) / len(metrics),
+            }
+            for page, metrics in summary.items()
+        }
+
+    @timed("search_article")
+    def search_article(self, title, year=None, journal=None):
+        """搜索文章并进入详情页（year/journal 为谷歌学术信息，用于给候选打分）"""
+        self.last_search_status = None
+        try:
+            # 优先按地址直接打开结果页，未打开结果页时本次改用检索表单
+            result_count = None
+            if self.search_by_url:
+                result_count = self.search_via_url(title)
+                if result_count is None and self.url_search_redirected():
+                    print("检索地址跳转到了其他页面，本次会话改用检索表单")
+                    self.search_by_url = False
+                elif result_count is None:
+                    print(
+                        f"检索地址未打开结果页（{self.page_state}），本次改用检索表单"
                     )
-                )
-                # 如果输入框已有内容，尝试点击清除按钮
-                if search_input.get_attribute("value"):
-                    # 定位清除按钮（通过 mat-icon 属性）
-                    clear_button = wait.until(
-                        EC.element_to_be_clickable(
-                            (By.CSS_SELECTOR, 'mat-icon[data-mat-icon-name="close"]')
-                        )
+            if result_count is None:
+                result_count = self.search_via_form(title)
+                if result_count is None:
+                    return False
+            print(f"搜索结果数量: {result_count}")
+            if result_count == 0:
+                self.last_search_status = self._failure_status(self.page_state)
+                return False
+            # 无论结果数量多少，都先给候选打分，确定不相符时不进入详情页
+            self.last_search_status = "ok"
+            return self.handle_multiple_results(title, year, journal)
+
+        except TimeoutException:
+            print("搜索超时")
+            self.last_search_status = "blocked" if self.is_blocked() else "timeout"
+            return False
+        except Exception as e:
+            print(f"搜索流程异常: {e}")
+            self.last_search_status = "blocked" if self.is_blocked() else "error"
+            return False
+
+    def search_via_url(self, title):
+        """按地址直接打开检索结果页（跳过检索表单），返回结果数量
+
+        页面既不是结果页也不是零结果/错误页（跳转到检索表单、超时）时返回 None，
+        由 url_search_redirected 区分站点不支持该地址还是一时未加载完。
+        """
+        query = json.dumps([{"rowBoolean": None, "rowField": "TI", "rowText": title}])
+        self.start_measure("results")
+        self.driver.get(
+            f"{self.base_url}{SEARCH_URL.format(query=quote(query, safe=''))}"
+        )
+        self.handle_cookie_consent()
+        state = self.wait_ready(
+            [("results", "span.brand-blue"), ("form", "input[id='search-option']")],
+            10,
+        )
+        self.end_measure()
+        if state == "results":
+            return self.get_result_count()
+        if state in ("no_results", "blocked", "error"):
+            return 0
+        return None
+
+    def url_search_redirected(self):
+        """按地址检索后是否被跳转走了（检索表单页或其他非结果页），超时不算"""
+        if self.page_state == "form":
+            return True
+        try:
+            return "summary" not in self.driver.current_url
+        except Exception:
+            return False
+
+    def search_via_form(self, title):
+        """在基本检索页填写表单检索，返回结果数量（检索页未就绪返回 None）"""
+        self.start_measure("search")
+        self.driver.get(f"{self.base_url}/wos/alldb/basic-search")
+        """alldb：跨多个数据库的综合检索。  woscc：仅限 Web of Science 核心合集的检索。"""
+        # 定义统一的等待对象（条件满足即返回，只在异常情况下才会等满）
+        wait = WebDriverWait(self.driver, 10)
+
+        # 处理 Cookie 弹窗（使用 JS 点击）
+        self.handle_cookie_consent()
+
+        # 显式等待 Cookie 弹窗容器消失（关键！）
+        try:
+            wait.until(
+                EC.invisibility_of_element_located((By.ID, "onetrust-group-container"))
+            )
+            print("已确认 Cookie 弹窗完全关闭。")
+        except TimeoutException:
+            print("警告：Cookie 弹窗容器未及时关闭。")
+
+        # 等待搜索框就绪；错误页/封禁页立即返回
+        state = self.wait_ready([("form", "input[id='search-option']")], 10)
+        self.end_measure()
+        if state != "form":
+            print(f"搜索页未就绪: {state}")
+            self.last_search_status = self._failure_status(state)
+            return None
+
+        # ---------- 清理搜索框 ----------
+        try:
+            # 定位搜索输入框
+            search_input = self.driver.find_element(
+                By.CSS_SELECTOR, "input[id='search-option']"
+            )
+            # 如果输入框已有内容，尝试点击清除按钮
+            if search_input.get_attribute("value"):
+                # 定位清除按钮（通过 mat-icon 属性）
+                clear_button = wait.until(
+                    EC.element_to_be_clickable(
+                        (By.CSS_SELECTOR, 'mat-icon[data-mat-icon-name="close"]')
                     )
-                    # 使用 JavaScript 点击避免前端拦截
-                    self.driver.execute_script("arguments[0].click();", clear_button)
-                    print("已清除历史搜索词")
-                    time.sleep(0.5)  # 等待清除动画完成
-            except Exception as e:
-                print(f"清理搜索框时出现异常（尝试强制清空）: {e}")
-                search_input.clear()  # 强制清空作为备用方案
-
-            # 输入搜索标题
-            # 重新定位输入框确保元素可用
-            search_input = wait.until(
-                EC.element_to_be_clickable(
-                    (By.CSS_SELECTOR, "input[id='search-option']")
                 )
-            )
-            # 使用动作链模拟更真实的输入
-            ActionChains(self.driver).move_to_element(search_input).click().send_keys(
-                title
-            ).perform()
-
-            # 点击搜索
-            search_button = wait.until(
-                EC.element_to_be_clickable(
-                    (By.CSS_SELECTOR, 'button[data-ta="run-search"]')
+                # 使用 JavaScript 点击避免前端拦截
+                self.driver.execute_script("arguments[0].click();", clear_button)
+                print("已清除历史搜索词")
+                # 等到输入框真正清空（代替固定的动画等待）
+                WebDriverWait(self.driver, 3).until(
+                    lambda d: not search_input.get_attribute("value")
                 )
+        except Exception as e:
+            print(f"清理搜索框时出现异常（尝试强制清空）: {e}")
+            search_input.clear()  # 强制清空作为备用方案
+
+        # 输入搜索标题
+        # 重新定位输入框确保元素可用
+        search_input = wait.until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, "input[id='search-option']"))
+        )
+        # 使用动作链模拟更真实的输入
+        ActionChains(self.driver).move_to_element(search_input).click().send_keys(
+            title
+        ).perform()
+
+        # 点击搜索
+        search_button = wait.until(
+            EC.element_to_be_clickable(
+                (By.CSS_SELECTOR, 'button[data-ta="run-search"]')
             )
-            search_button.click()
+        )
+        self.start_measure("results")
+        search_button.click()
 
-            # 检查搜索结果
-            result_count = self.get_result_count()
-            print(f"搜索结果数量: {result_count}")
+        # 检查搜索结果
+        result_count = self.get_result_count()
+        self.end_measure()
+        return result_count
+
+    def run_advanced_query(self, query):
+        """在高级检索页提交检索式，返回结果数量（页面未就绪或零结果返回 0）"""
+        self.start_measure("search")
+        self.driver.get(f"{self.base_url}/wos/alldb/advanced-search")
+        self.handle_cookie_consent()
+
+        state = self.wait_ready([("form", ADVANCED_QUERY_INPUT)], 10)
+        self.end_measure()
+        if state != "form":
+            print(f"高级检索页未就绪: {state}")
+            return 0
+
+        # 检索式可能较长，直接写入输入框，不逐字输入
+        self.set_input_value(ADVANCED_QUERY_INPUT, query)
+        self.start_measure("results")
+        self.driver.find_element(By.CSS_SELECTOR, ADVANCED_SEARCH_BUTTON).click()
+        result_count = self.get_result_count()
+        self.end_measure()
+        return result_count
+
+    def set_input_value(self, selector, value):
+        """直接写入输入框并触发 input 事件（让前端框架感知到变化）"""
+        element = self.driver.find_element(By.CSS_SELECTOR, selector)
+        self.driver.execute_script(
+            "arguments[0].value = arguments[1];"
+            "arguments[0].dispatchEvent(new Event('input', {bubbles: true}));",
+            element,
+            str(value),
+        )
+
+    def export_results(self, start=1, end=EXPORT_MAX_RECORDS, timeout=120):
+        """在结果列表页导出制表符分隔文件（完整记录），返回下载的文件路径，失败返回 None"""
+        download_dir = self.download_dir or os.path.expanduser("~/Downloads")
+        try:
+            self.dismiss_overlays()
+            before = set(os.listdir(download_dir))
+
+            # 导出按钮 → 制表符分隔文件
+            for selector in (EXPORT_BUTTON, EXPORT_TAB_OPTION):
+                if self.wait_ready([("ready", selector)], 10) != "ready":
+                    raise TimeoutException(f"导出菜单未就绪: {selector}")
+                button = self.driver.find_element(By.CSS_SELECTOR, selector)
+                self.driver.execute_script("arguments[0].click();", button)
+            if self.wait_ready([("dialog", EXPORT_CONFIRM)], 10) != "dialog":
+                raise TimeoutException(f"导出对话框未就绪: {self.page_state}")
+
+            # 记录范围（不超过单次导出上限）
+            range_radio = self.find_now(By.CSS_SELECTOR, EXPORT_RANGE_RADIO)
+            if range_radio is not None:
+                self.driver.execute_script("arguments[0].click();", range_radio)
+                self.set_input_value(EXPORT_RANGE_FROM, start)
+                self.set_input_value(EXPORT_RANGE_TO, end)
+
+            # 记录内容选完整记录（默认只有作者、标题、来源）
+            dropdown = self.find_now(By.CSS_SELECTOR, EXPORT_CONTENT_DROPDOWN)
+            if dropdown is not None:
+                self.driver.execute_script("arguments[0].click();", dropdown)
+                option = self.find_now(By.XPATH, EXPORT_FULL_RECORD)
+                if option is not None:
+                    self.driver.execute_script("arguments[0].click();", option)
+
+            confirm = self.driver.find_element(By.CSS_SELECTOR, EXPORT_CONFIRM)
+            self.driver.execute_script("arguments[0].click();", confirm)
+            path = self.wait_for_download(download_dir, before, timeout)
+            if path is None:
+                print("导出文件下载超时")
+            return path
+        except Exception as e:
+            print(f"导出失败: {e}")
+            return None
+
+    def wait_for_download(self, directory, before, timeout=120):
+        """等待下载目录中出现新的完整文件（Chrome 下载中的文件以 .crdownload 结尾）"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            new_files = [
+                name
+                for name in set(os.listdir(directory)) - before
+                if not name.endswith((".crdownload", ".tmp"))
+            ]
+            if new_files:
+                return os.path.join(directory, new_files[0])
+            time.sleep(0.5)
+        return None
+
+    @timed("export_query")
+    def export_query(self, query):
+        """高级检索后导出结果列表，返回导出文件路径（失败返回 None）"""
+        self.last_search_status = None
+        try:
+            result_count = self.run_advanced_query(query)
+            print(f"导出检索结果数量: {result_count}")
+            if result_count == 0:
+                self.last_search_status = self._failure_status(self.page_state)
+                return None
+            path = self.export_results(end=min(result_count, EXPORT_MAX_RECORDS))
+            self.last_search_status = "ok" if path else "error"
+            return path
+        except TimeoutException:
+            print("导出检索超时")
+            self.last_search_status = "blocked" if self.is_blocked() else "timeout"
+            return None
+        except Exception as e:
+            print(f"导出检索异常: {e}")
+            self.last_search_status = "blocked" if self.is_blocked() else "error"
+            return None
+
+    @timed("search_doi")
+    def search_doi(self, doi):
+        """按 DOI 检索（DO=）并进入详情页，跳过标题搜索和候选打分"""
+        self.last_search_status = None
+        try:
+            result_count = self.run_advanced_query(f'DO=("{doi}")')
+            print(f"DOI 检索结果数量: {result_count}")
             if result_count == 0:
+                self.last_search_status = self._failure_status(self.page_state)
                 return False
-            elif result_count == 1:
-                self.enter_article_page()
-                return True
-            else:
-                self.handle_multiple_results()
-                return True
+            if self.wait_ready([("link", TITLE_LINK)], 15) != "link":
+                raise TimeoutException(f"结果列表未就绪: {self.page_state}")
+
+            # 只打开 DOI 相同的条目（DO= 检索也可能返回引用或更正等其他条目）
+            candidates = [parse_candidate(c) for c in self.get_result_candidates()]
+            best = next(
+                (
+                    c
+                    for c in candidates
+                    if normalize_doi(c["doi"]) == normalize_doi(doi)
+                ),
+                None,
+            )
+            if best is None:
+                print(f"DOI 检索结果中没有 {doi}")
+                self.last_search_status = "mismatch"
+                return False
+            self.last_search_status = "ok"
+            title_links = self.driver.find_elements(By.CSS_SELECTOR, TITLE_LINK)
+            self.scroll_and_click(title_links[best["index"]])
+            return True
 
         except TimeoutException:
-            print("搜索超时")
+            print("DOI 检索超时")
+            self.last_search_status = "blocked" if self.is_blocked() else "timeout"
             return False
         except Exception as e:
-            print(f"搜索流程异常: {e}")
+            print(f"DOI 检索异常: {e}")
+            self.last_search_status = "blocked" if self.is_blocked() else "error"
             return False
 
-    def handle_cookie_consent(self):
-        """处理 cookie 同意弹窗（增强稳定性）"""
+    @timed("search_batch")
+    def search_batch(self, rows):
+        """批量检索：多个标题拼成一条高级检索式，一次取回合并的结果列表
+
+        rows 为 [(键, 标题, 年份, 期刊), ...]，返回 {键: 详情页地址}；
+        对应不上的行不在结果中，由调用方逐篇检索。
+        """
+        self.last_search_status = None
+        try:
+            query = build_title_query([row[1] for row in rows])
+            result_count = self.run_advanced_query(query)
+            print(f"批量检索 {len(rows)} 篇，结果数量: {result_count}")
+            if result_count == 0:
+                self.last_search_status = self._failure_status(self.page_state)
+                return {}
+            if self.wait_ready([("link", TITLE_LINK)], 15) != "link":
+                raise TimeoutException(f"结果列表未就绪: {self.page_state}")
+
+            # 整页快照一次取回，离线解析所有候选
+            html = self.driver.execute_script(
+                "return document.documentElement.outerHTML;"
+            )
+            matched = match_batch(parse_result_list_html(html), rows)
+            self.last_search_status = "ok"
+            print(f"批量检索对应上 {len(matched)}/{len(rows)} 篇")
+            return {key: candidate["href"] for key, candidate in matched.items()}
+
+        except TimeoutException:
+            print("批量检索超时")
+            self.last_search_status = "blocked" if self.is_blocked() else "timeout"
+            return {}
+        except Exception as e:
+            print(f"批量检索异常: {e}")
+            self.last_search_status = "blocked" if self.is_blocked() else "error"
+            return {}
+
+    @timed("open_record")
+    def open_record(self, url):
+        """直接打开详情页（批量检索已确定地址，跳过逐篇搜索）"""
+        self.last_search_status = None
         try:
-            wait = WebDriverWait(self.driver, 15)
-            # 确保弹窗可见且可点击
-            accept_button = wait.until(
-                EC.visibility_of_element_located(
-                    (By.CSS_SELECTOR, "button#onetrust-accept-btn-handler")
+            if url.startswith("/"):
+                url = f"{self.base_url}{url}"
+            self.start_measure("record")
+            self.driver.get(url)
+            self.last_search_status = "ok"
+            return True
+        except TimeoutException:
+            print("打开详情页超时")
+            self.last_search_status = "blocked" if self.is_blocked() else "timeout"
+            return False
+        except Exception as e:
+            print(f"打开详情页失败: {e}")
+            self.last_search_status = "blocked" if self.is_blocked() else "error"
+            return False
+
+    def _failure_status(self, state):
+        """把页面失败状态换算成限速器使用的搜索结果"""
+        if state == "blocked":
+            return "blocked"
+        if state == "error":
+            return "error"
+        if state == "no_results":
+            return "empty"
+        return "blocked" if self.is_blocked() else "empty"
+
+    def wait_ready(self, expected, timeout=15, settle_ms=None, failures=FAILURE_STATES):
+        """复合就绪等待：期望元素可见、页面进入失败状态或 DOM 静止时立即返回
+
+        expected 为 [(状态名, 选择器), ...]，返回命中的状态名（期望状态优先于失败状态）；
+        给出 settle_ms 时 DOM 静止该时长返回 "settled"；超时返回 None。
+        """
+        conditions = [list(c) for c in list(expected) + list(failures or [])]
+        deadline = time.time() + timeout
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                state = None
+                break
+            try:
+                state = self.driver.execute_async_script(
+                    READY_SCRIPT, conditions, int(remaining * 1000), settle_ms or 0
                 )
+                break
+            except InvalidSessionIdException:
+                raise
+            except WebDriverException as e:
+                message = (e.msg or str(e)).lower()
+                if any(marker in message for marker in SESSION_ERROR_MARKERS):
+                    raise  # 会话已失效，继续等也不会恢复
+                time.sleep(0.1)  # 页面跳转会中断脚本，到新页面上继续等
+        self.page_state = state
+        return state
+
+    def find_now(self, by, selector):
+        """不等待地查找元素，找不到返回 None"""
+        elements = self.driver.find_elements(by, selector)
+        return elements[0] if elements else None
+
+    def dismiss_overlays(self):
+        """监视脚本未生效时，一次调用点掉当前页面上所有可见的弹窗（不等待）"""
+        if self.overlay_watcher:
+            return
+        for selector in OVERLAY_SELECTORS:
+            self.dismiss_overlay(selector)
+
+    def dismiss_overlay(self, selector):
+        """弹窗存在就用 JS 点掉，不存在立即返回（不再为可能不出现的弹窗等待）"""
+        try:
+            button = self.find_now(By.CSS_SELECTOR, selector)
+            if button is not None and button.is_displayed():
+                self.driver.execute_script("arguments[0].click();", button)
+                print(f"已关闭弹窗: {selector}")
+                return True
+        except Exception as e:
+            print(f"关闭弹窗失败: {e}")
+        return False
+
+    def is_blocked(self):
+        """当前页面是否为封禁/验证页（只在搜索失败时检查）
+
+        看页面标题是否含 BLOCK_MARKERS，以及是否有 BLOCK_SELECTORS 中的验证页元素。
+        """
+        try:
+            title, challenge = self.driver.execute_script(
+                "return [document.title, "
+                "arguments[0].some(function (s) { return document.querySelector(s); })];",
+                list(BLOCK_SELECTORS),
+            )
+        except Exception:
+            return False
+        title = (title or "").lower()
+        blocked = challenge or any(marker in title for marker in BLOCK_MARKERS)
+        if blocked:
+            print("检测到封禁/验证页面")
+        return blocked
+
+    @timed("handle_cookie_consent")
+    def handle_cookie_consent(self):
+        """处理 cookie 同意弹窗（增强稳定性；每个会话只处理一次）"""
+        if self.consent_done:
+            return
+        try:
+            # 弹窗出现或页面静止（说明不会再出现）即返回，不再固定等待 15 秒
+            state = self.wait_ready(
+                [("cookie", "button#onetrust-accept-btn-handler")],
+                15,
+                settle_ms=COOKIE_SETTLE_MS,
+                failures=None,
+            )
+            if state != "cookie":
+                raise TimeoutException(f"cookie 弹窗未出现: {state}")
+            accept_button = self.driver.find_element(
+                By.CSS_SELECTOR, "button#onetrust-accept-btn-handler"
             )
             # 使用 JavaScript 点击绕过前端拦截
             self.driver.execute_script("arguments[0].click();", accept_button)
             print("已通过 JS 点击接受 cookie 同意。")
+            self.consent_done = True
         except TimeoutException:
             print("未找到 cookie 同意弹窗，继续执行。")
+            # 页面已静止仍无弹窗：同意状态已保存在配置目录中（或弹窗脚本被拦截）
+            self.consent_done = self.page_state == "settled"
         except Exception as e:
             print(f"处理 cookie 弹窗失败（最终尝试点击）: {e}")
             # 最终尝试强制点击（仅用于调试）
@@ -140,325 +934,352 @@ class WOSArticleScraper:
             except:
                 pass
 
+    @timed("get_result_count")
     def get_result_count(self):
-        """获取搜索结果数量"""
+        """获取搜索结果数量（零结果/错误页立即返回 0）"""
         try:
-            count_element = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "span.brand-blue"))
-            )
-            return int(count_element.text)
+            if self.wait_ready([("results", "span.brand-blue")], 10) != "results":
+                print(f"未获取到结果数量，页面状态: {self.page_state}")
+                return 0
+            count_element = self.driver.find_element(By.CSS_SELECTOR, "span.brand-blue")
+            return int(count_element.text.replace(",", ""))
         except Exception as e:
             print(f"获取结果数量失败: {e}")
             return 0
 
-    def enter_article_page(self):
-        """进入文章详情页"""
-        try:
-            try:
-                # 等待并定位关闭按钮
-                close_button = WebDriverWait(self.driver, 3).until(
-                    EC.element_to_be_clickable(
-                        (By.CSS_SELECTOR, "button#pendo-close-guide-30f847dd")
-                    )
-                )
-                close_button.click()  # 点击关闭按钮
-            except TimeoutException:
-                print("未找到关闭按钮，继续执行。")
-            except Exception as e:
-                print(f"关闭弹窗失败: {e}")
-            # 使用更稳定的 CSS 选择器定位标题元素
-            title_element = WebDriverWait(self.driver, 15).until(
-                EC.element_to_be_clickable(
-                    (By.CSS_SELECTOR, 'a[data-ta="summary-record-title-link"]')
-                )
-            )
-            # 确保元素可见并滚动到视图中心
-            self.driver.execute_script(
-                "arguments[0].scrollIntoView({block: 'center'});", title_element
-            )
-            # 使用 JavaScript 点击绕过前端拦截
-            self.driver.execute_script("arguments[0].click();", title_element)
-            print("成功进入文章详情页")
-            return True
-        except Exception as e:
-            print(f"进入详情页失败: {e}")
-            return False
-
     def scroll_and_click(self, element):
         """滚动并点击元素（直接点击，无需额外等待）"""
         self.driver.execute_script(
             "arguments[0].scrollIntoView({block: 'center'});", element
         )
-        element.click()
+        # 使用 JavaScript 点击，避免被弹窗遮挡
+        self.start_measure("record")
+        self.driver.execute_script("arguments[0].click();", element)
         print("成功进入文章详情页")
 
-    def handle_multiple_results(self):
-        """处理多个搜索结果"""
-        try:
-            try:
-                # 等待并定位关闭按钮
-                close_button = WebDriverWait(self.driver, 3).until(
-                    EC.element_to_be_clickable(
-                        (By.CSS_SELECTOR, "button#pendo-close-guide-30f847dd")
-                    )
-                )
-                close_button.click()  # 点击关闭按钮
-            except TimeoutException:
-                print("未找到关闭按钮，继续执行。")
-            except Exception as e:
-                print(f"关闭弹窗失败: {e}")
-
-            # 显式等待搜索结果列表加载完成
-            WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, 'a[data-ta="summary-record-title-link"]')
-                )
-            )
+    def fetch_elements(self, selector, attributes=(), container=None):
+        """一次调用取回所有匹配 selector（CSS）的元素，不逐个读取 WebElement
 
-            # 获取所有标题链接（增强定位稳定性）
-            title_links = self.driver.find_elements(
-                By.CSS_SELECTOR, 'a[data-ta="summary-record-title-link"]'
+        返回 [{"index", "text", 各属性..., "container"}]：text 为可见文本，
+        attributes 中的属性按名取回（如 href），给出 container 时另有所在容器的文本。
+        """
+        return (
+            self.driver.execute_script(
+                ELEMENTS_SCRIPT, selector, list(attributes), container
             )
+            or []
+        )
 
-            # 过滤无效标题
-            valid_links = [
-                link
-                for link in title_links
-                if "arXiv" not in link.text
-                and "Comment" not in link.text
-                and "Information" not in link.text  # 排除Supporting Information
-                and "Supplementary" not in link.text  # 排除Supplementary Materials
-            ]
+    def element_texts(self, selector):
+        """所有匹配元素的文本（去掉首尾空白），一次调用"""
+        return [(item["text"] or "").strip() for item in self.fetch_elements(selector)]
 
-            if len(valid_links) == 1:
-                self.scroll_and_click(valid_links[0])
-                return True
-            elif len(valid_links) >= 2:
-                self.scroll_and_click(valid_links[0])
-                return True
+    def element_text(self, selector):
+        """第一个匹配元素的文本，没有匹配时返回 None"""
+        texts = self.element_texts(selector)
+        return texts[0] if texts else None
+
+    def get_result_candidates(self):
+        """一次调用取回结果列表中的所有候选（标题、链接和所在条目的文本）"""
+        return [
+            {
+                "index": item["index"],
+                "title": item["text"],
+                "href": item["href"],
+                "text": item["container"],
+            }
+            for item in self.fetch_elements(TITLE_LINK, ["href"], RESULT_CONTAINER)
+        ]
+
+    @timed("handle_multiple_results")
+    def handle_multiple_results(self, original_title=None, year=None, journal=None):
+        """处理搜索结果：给所有候选打分，只打开通过标题比对的最佳候选"""
+        try:
+            self.dismiss_overlays()
+
+            # 等待搜索结果列表加载完成（错误页立即返回）
+            if self.wait_ready([("link", TITLE_LINK)], 15) != "link":
+                raise TimeoutException(f"结果列表未就绪: {self.page_state}")
+
+            # 一次取回所有候选（标题、DOI、年份）
+            candidates = self.get_result_candidates()
+
+            if original_title:
+                ranked = rank_candidates(candidates, original_title, year, journal)
+                if not ranked:
+                    # 确定不相符：不进入详情页，也不再重试
+                    print(f"结果列表中没有与「{original_title}」相符的条目")
+                    self.last_search_status = "mismatch"
+                    return False
+                best = ranked[0]
+                print(f"最佳候选（得分 {best['score']:.2f}）: {best['title']}")
             else:
-                print("没有有效的搜索结果可供处理。")
-                return False
+                # 未提供标题时沿用旧逻辑：第一个有效条目
+                valid = [
+                    c
+                    for c in candidates
+                    if not any(word in c["title"] for word in EXCLUDED_RESULT_WORDS)
+                ]
+                if not valid:
+                    print("没有有效的搜索结果可供处理。")
+                    return False
+                best = valid[0]
+
+            title_links = self.driver.find_elements(By.CSS_SELECTOR, TITLE_LINK)
+            self.scroll_and_click(title_links[best["index"]])
+            return True
 
         except Exception as e:
             print(f"处理多结果时发生错误: {e}")
             return False
 
-    def get_article_details(self, last_name, original_title=None):
-        """获取文章详细信息（含标题比对）"""
+    def get_article_details(self, last_name, original_title=None, check_title=True):
+        """获取文章详细信息（含标题比对；按 DOI 进入的详情页可跳过比对）"""
+        if self.extraction_mode == "snapshot":
+            return self.get_article_details_snapshot(
+                last_name, original_title, check_title
+            )
         try:
+            # 等待详情页就绪一次，之后各字段直接读取，缺失字段不再等待
+            if not self.wait_record_ready():
+                print(f"详情页未就绪: {self.page_state}")
             # 关闭可能的研究助手弹窗
-            try:
-                close_button = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable(
-                        (By.CSS_SELECTOR, "button#pendo-close-guide-d9649cea")
-                    )
-                )
-                close_button.click()
-            except TimeoutException:
-                pass
+            self.dismiss_overlays()
 
             # 获取标题
             scraped_title = self.get_title() or ""
+            self.title = scraped_title
             # 标题模糊匹配
-            if original_title and not self._is_title_match(
-                original_title, scraped_title
+            if (
+                original_title
+                and check_title
+                and not self._is_title_match(original_title, scraped_title)
             ):
                 print(
                     f"标题匹配失败：输入「{original_title}」≠ 爬取「{scraped_title}」"
                 )
+                self.archive_page(original_title)
                 return {}  # 返回空字典
 
-            # 若匹配成功，继续获取其他信息
-            self.get_keywords()
-            self.get_keywordsplus()
-            self.doi = self.get_doi() or "未获取 DOI"
-            self.author_address = self.get_author_address(last_name) or {
-                "institution": "未获取",
-                "country": "未获取",
-            }
-            self.abstract = self.get_abstract() or "未获取摘要"
-            self.impact_factor = self.get_impact_factor()
+            # 若匹配成功，继续获取其他信息（只取目标列需要的字段）
+            if "keywords" in self.fields:
+                self.get_keywords()
+            if "keywordsplus" in self.fields:
+                self.get_keywordsplus()
+            if "doi" in self.fields:
+                self.doi = self.get_doi() or "未获取 DOI"
+            if "author_address" in self.fields:
+                # 所有作者的地址在同一次展开后读取
+                addresses = self.get_author_addresses([last_name, *self.co_authors])
+                self.author_address = addresses.get(last_name) or {
+                    "institution": "未获取",
+                    "country": "未获取",
+                    "affiliations": "未获取",
+                }
+                self.co_author_addresses = {
+                    name: addresses.get(name, dict(NO_ADDRESS))
+                    for name in self.co_authors
+                }
+                self.archive_page(original_title)  # 作者/地址已展开，存档完整页面
+            if "abstract" in self.fields:
+                self.abstract = self.get_abstract() or "未获取摘要"
+            if "impact_factor" in self.fields:
+                self.impact_factor = self.get_impact_factor()
+
+            return self.format_details()
+        except Exception as e:
+            print(f"获取详情失败: {e}")
+            return None
+
+    def get_article_details_snapshot(
+        self, last_name, original_title=None, check_title=True
+    ):
+        """快照模式：等待页面就绪一次，取整页 HTML 后离线解析全部字段"""
+        try:
+            expand = "author_address" in self.fields
+            html = self.take_snapshot(expand=expand)
+            if expand:
+                self.archive_page(original_title, html)  # 未展开地址的页面不存档
+            fields = parse_record_html(html, last_name, self.co_authors, self.fields)
+
+            # 标题模糊匹配
+            scraped_title = fields["title"] or ""
+            self.title = scraped_title
+            if (
+                original_title
+                and check_title
+                and not self._is_title_match(original_title, scraped_title)
+            ):
+                print(
+                    f"标题匹配失败：输入「{original_title}」≠ 爬取「{scraped_title}」"
+                )
+                return {}  # 返回空字典
+
+            # 缺失字段不再产生等待，直接使用默认值
+            if "doi" in fields:
+                fields["doi"] = fields["doi"] or "未获取 DOI"
+            if "abstract" in fields:
+                fields["abstract"] = fields["abstract"] or "未获取摘要"
+            for field in self.fields:
+                setattr(self, field, fields[field])
+            self.co_author_addresses = fields.get("co_author_addresses", {})
 
             return self.format_details()
         except Exception as e:
             print(f"获取详情失败: {e}")
             return None
 
+    def wait_record_ready(self, timeout=10, quiet_ms=RECORD_SETTLE_MS):
+        """详情页就绪：标题可见后再等 DOM 静止（页面内检测，条件满足即返回）"""
+        if self.wait_ready([("title", "h2.title")], timeout, failures=None) != "title":
+            return False
+        self.end_measure()
+        self.wait_ready([], 5, settle_ms=quiet_ms, failures=None)
+        return True
+
+    @timed("take_snapshot")
+    def take_snapshot(self, timeout=10, quiet_ms=RECORD_SETTLE_MS, expand=True):
+        """等待详情页标题出现，（expand 时）展开作者/地址并待 DOM 静止后返回整页 HTML"""
+        if self.wait_ready([("title", "h2.title")], timeout, failures=None) != "title":
+            raise TimeoutException(f"详情页未就绪: {self.page_state}")
+        self.end_measure()
+        return self.driver.execute_async_script(
+            SNAPSHOT_SCRIPT, quiet_ms, timeout * 1000, expand
+        )
+
+    def archive_page(self, original_title, html=None):
+        """按输入标题存档当前详情页（存档失败不影响爬取）"""
+        if self.archive is None or not original_title:
+            return
+        try:
+            if html is None:
+                html = self.driver.execute_script(
+                    "return document.documentElement.outerHTML;"
+                )
+            self.archive.save(original_title, html)
+        except Exception as e:
+            print(f"页面存档失败: {e}")
+
     def _is_title_match(self, original_title, scraped_title, threshold=0.8):
         """标题相似度匹配（阈值可调）"""
-        original = original_title.lower().strip()
-        scraped = scraped_title.lower().strip()
-        return SequenceMatcher(None, original, scraped).ratio() >= threshold
+        return is_title_match(original_title, scraped_title, threshold)
 
+    @timed("get_title")
     def get_title(self):
         """获取文章标题"""
         try:
-            title_element = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, "h2.title"))
-            )
-            return title_element.text
+            title = self.element_text("h2.title")
+            if title is None:
+                raise TimeoutException("未找到标题")
+            return title
         except Exception as e:
             print(f"获取标题失败: {e}")
             return None
 
+    @timed("get_keywords")
     def get_keywords(self):
         """获取作者关键词"""
         try:
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, "h3#FRkeywordsTa-authorKeywordsLabel")
-                )
-            )
-            keyword_elements = self.driver.find_elements(
-                By.XPATH, "//*[contains(@id, 'FRkeywordsTa-authorKeywordLink')]"
-            )
-
-            self.keywords = [
-                k.text.strip() for k in keyword_elements if k.text.strip()
-            ] or ["None"]
+            # 没有关键词栏目时也没有关键词链接，一次取回全部文本即可
+            texts = self.element_texts("[id*='FRkeywordsTa-authorKeywordLink']")
+            self.keywords = [text for text in texts if text] or ["None"]
         except Exception as e:
             print(f"获取关键词失败: {e}")
             self.keywords = ["None"]
 
+    @timed("get_keywordsplus")
     def get_keywordsplus(self):
         """获取Keywords Plus"""
         try:
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, "h3#FRkeywordsTa-keyWordsPlusLabel")
-                )
-            )
-            keywordplus_elements = self.driver.find_elements(
-                By.XPATH, "//*[contains(@id, 'FRkeywordsTa-keyWordsPlusLink')]"
-            )
-            self.keywordsplus = [
-                kw.text.strip().capitalize() for kw in keywordplus_elements
-            ] or ["None"]
+            texts = self.element_texts("[id*='FRkeywordsTa-keyWordsPlusLink']")
+            self.keywordsplus = [text.capitalize() for text in texts] or ["None"]
         except Exception as e:
             print(f"获取更宽泛的关键词失败: {e}")
             self.keywordsplus = ["None"]
 
+    @timed("get_doi")
     def get_doi(self):
         """获取DOI"""
         try:
-            doi_element = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, "span[data-ta='FullRTa-DOI']")
-                )
-            )
-            return doi_element.text
+            return self.element_text("span[data-ta='FullRTa-DOI']")
         except Exception as e:
             print(f"获取DOI失败: {e}")
             return None
 
     def get_author_address(self, last_name):
         """获取作者地址信息"""
-        try:
-            # 展开更多作者信息
-            try:
-                more_author_button = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable(
-                        (By.XPATH, '//span[contains(text(), "More")]')
-                    )
-                )
-                more_author_button.click()
-            except TimeoutException:
-                pass
-
-            # 展开更多地址信息
-            try:
-                more_address_button = WebDriverWait(self.driver, 10).until(
-                    EC.element_to_be_clickable(
-                        (By.CSS_SELECTOR, "#FRACTa-authorAddressView")
-                    )
-                )
-                more_address_button.click()
-            except TimeoutException:
-                pass
+        return self.get_author_addresses([last_name])[last_name]
 
-            # 获取作者列表
-            author_container = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "span.cdx-grid-data"))
-            )
-            author_elements = author_container.find_elements(
-                By.CSS_SELECTOR, 'span.value.ng-star-inserted[id^="author-"]'
-            )
+    @timed("get_author_address")
+    def get_author_addresses(self, last_names):
+        """展开作者/地址一次，取回作者表后按姓氏匹配：{姓氏: 地址}（含该作者的全部地址）"""
+        try:
+            # 展开更多作者信息、更多地址信息（按钮存在才点击，不等待）
+            expanded = False
+            for by, selector in (
+                (By.XPATH, '//span[contains(text(), "More")]'),
+                (By.CSS_SELECTOR, "#FRACTa-authorAddressView"),
+            ):
+                button = self.find_now(by, selector)
+                if button is not None:
+                    self.driver.execute_script("arguments[0].click();", button)
+                    expanded = True
+            if expanded:
+                # 等展开的内容渲染完（DOM 静止即返回）
+                self.wait_ready([], 5, settle_ms=RECORD_SETTLE_MS, failures=None)
 
-            # 匹配姓氏并提取地址
-            for author_element in author_elements:
-                if last_name in author_element.text:
-                    text_parts = author_element.text.strip().split()
-                    address_num = self._extract_address_number(text_parts)
-                    address_element = self.driver.find_element(
-                        By.ID, f"address_{address_num}"
-                    )
-                    # print(f"地址序号:{address_num}")
-                    return self._parse_address(address_element.text)
-            return {"institution": "None", "country": "None"}
+            # 一次取回作者表，按姓氏匹配在本地进行
+            table = self.driver.execute_script(AUTHOR_TABLE_SCRIPT)
         except Exception as e:
             print(f"获取地址失败: {e}")
-            return {"institution": "None", "country": "None"}
-
-    def _extract_address_number(self, text_parts):
-        """从作者信息中提取地址编号（优先提取第一个地址编号）"""
-        # 删除末尾分号
-        if text_parts and text_parts[-1].endswith(";"):
-            text_parts = text_parts[:-1]
-        # 从前往后遍历，寻找第一个包含中括号的项
-        for part in text_parts:
-            if "[" in part and "]" in part:
-                return part.strip("[]")
-        # 默认返回第一个地址
-        return "1"
+            return {name: dict(NO_ADDRESS) for name in last_names}
+
+        if table is None:
+            return {name: dict(NO_ADDRESS) for name in last_names}
+        return match_author_addresses(table["authors"], table["addresses"], last_names)
 
     def _parse_address(self, address_text):
         """辅助函数：解析地址文本"""
-        address_parts = address_text.split(",")
-        institution = (
-            address_parts[0].strip().split(maxsplit=1)[-1].replace("\n", "")
-            if address_parts
-            else "None"
-        )
-        country = address_parts[-1].strip() if len(address_parts) >= 2 else "None"
-        return {"institution": institution, "country": country}
+        return parse_address(address_text)
 
+    @timed("get_impact_factor")
     def get_impact_factor(self):
         """获取期刊影响因子"""
         try:
-            impact_factor_element = WebDriverWait(self.driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//span[@class='font-size-26']"))
-            )
-            return impact_factor_element.text.strip()
+            return self.element_text("span[class='font-size-26']")
         except Exception as e:
             print(f"获取影响因子失败: {e}")
             return None
 
+    @timed("get_abstract")
     def get_abstract(self):
         """获取摘要"""
         try:
-            abstract_element = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, "div[data-ta='FullRTa-abstract-basic']")
-                )
-            )
-            return abstract_element.text
+            return self.element_text("div[data-ta='FullRTa-abstract-basic']")
         except Exception as e:
             print(f"获取摘要失败: {e}")
             return None
 
     def format_details(self):
-        """格式化输出"""
-        return {
-            "Title": self.title,
-            "Impact Factor": self.impact_factor,
-            "Author Keywords": ", ".join(self.keywords),
-            "Keywords Plus": ", ".join(self.keywordsplus),
-            "Institution": self.author_address.get("institution"),
-            "Country": self.author_address.get("country"),
-            "DOI": self.doi,
-            "Abstract": self.abstract,
-        }
+        """格式化输出（只含本次提取的字段对应的列）"""
+        fields = {"title": self.title}
+        for field in FIELD_COLUMNS:
+            if field in self.fields:
+                fields[field] = getattr(self, field)
+        if "author_address" in self.fields:
+            fields["co_author_addresses"] = self.co_author_addresses
+        return format_details(fields)
+
+    def end_session(self):
+        """结束会话：使用临时配置时先清除 cookie；持久化配置保留会话状态供下次运行使用"""
+        if self.driver:
+            self.overlay_counts = self.dismissed_overlays()
+        if self.driver and not self.profile_dir:
+            try:
+                self.driver.delete_all_cookies()
+            except Exception:
+                pass
+        self.close()
 
     def close(self):
         """关闭浏览器"""
@@ -0,0 +1,553 @@
+"""基准测试：在本地模拟 WOS 站点上测量爬取吞吐量（需要本机 Chrome）"""
+
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+
+import pandas as pd
+
+import scholarly_utils
+from main import (
+    TARGET_COLUMNS,
+    initialize_columns,
+    process_publications,
+    process_publications_parallel,
+)
+from mock_wos import MockWOSServer, make_records
+from progress_journal import ProgressJournal, journal_path
+from rate_limiter import RateLimiter, TokenBucket
+from stage_timer import TIMER, percentile
+from record_parser import (
+    FIELD_COLUMNS,
+    fields_for_columns,
+    normalize_doi,
+    rebuild_details,
+)
+from selenium.webdriver.common.by import By
+from WOSArticleScraper import TITLE_LINK, WOSArticleScraper
+
+BENCH_RESULTS = "bench_results.jsonl"  # e2e 基准测试结果（每次运行追加一行）
+
+
+def build_dataframe(records):
+    """用模拟文章标题构造与 original CSV 相同结构的 DataFrame（不含干扰条目）"""
+    records = [r for r in records if not r.get("decoy")]
+    df = pd.DataFrame({"Title": [r["title"] for r in records]})
+    df = df.reindex(columns=["Title", *TARGET_COLUMNS])  # 空列与读取 CSV 时一致
+    df.insert(0, "Sequence Number", range(1, len(df) + 1))
+    return initialize_columns(df, TARGET_COLUMNS)
+
+
+def bench_pool(worker_counts=(1, 2, 4), n_records=20, delay=0.5):
+    """测量文章/分钟随并行浏览器数量 N 的变化（全局限速固定为 delay 秒/篇）"""
+    server = MockWOSServer(make_records(n_records))
+    base_url = server.start()
+    results = []
+    try:
+        for workers in worker_counts:
+            df = build_dataframe(server.records)
+            with tempfile.TemporaryDirectory() as tmp:
+                output_csv = os.path.join(tmp, "bench_all.csv")
+                start = time.perf_counter()
+                df, failed = process_publications_parallel(
+                    df,
+                    TARGET_COLUMNS,
+                    output_csv,
+                    workers=workers,
+                    limiter=RateLimiter((delay, delay)),
+                    scraper_factory=lambda: WOSArticleScraper(base_url=base_url),
+                )
+                elapsed = time.perf_counter() - start
+            rate = len(df) / elapsed * 60
+            results.append({"workers": workers, "seconds": elapsed, "per_minute": rate})
+            print(
+                f"N={workers}: {len(df)} 篇用时 {elapsed:.1f} 秒，"
+                f"{rate:.1f} 篇/分钟，失败 {len(failed)} 篇"
+            )
+    finally:
+        server.stop()
+    print(f"限速上限: {60 / delay:.1f} 篇/分钟" if delay > 0 else "未限速")
+    return results
+
+
+def bench_field_selection(n_records=20, last_name="Nori", repeat=5):
+    """不启动浏览器：各种目标列下只解析需要的字段时，每页的解析耗时"""
+    server = MockWOSServer(make_records(n_records, last_name))
+    pages = [server.render_record(record) for record in server.records]
+    column_sets = [
+        TARGET_COLUMNS,
+        ["DOI", "Abstract"],
+        ["Institution", "Country"],
+        ["Impact Factor"],
+    ]
+    results = []
+    for columns in column_sets:
+        fields = fields_for_columns(columns)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for html in pages:
+                rebuild_details(html, last_name, fields=fields)
+        per_page = (time.perf_counter() - start) / (repeat * len(pages))
+        results.append({"columns": columns, "per_page": per_page})
+        print(f"{', '.join(columns):<72} 每页解析 {per_page * 1000:.2f} ms")
+    return results
+
+
+def bench_batch(batch_sizes=(1, 10), n_records=20, delay=0.5):
+    """比较逐篇检索（batch_size=1）与批量检索的耗时（需要本机 Chrome）"""
+    server = MockWOSServer(make_records(n_records))
+    base_url = server.start()
+    results = []
+    try:
+        for batch_size in batch_sizes:
+            df = build_dataframe(server.records)
+            scraper = WOSArticleScraper(base_url=base_url)
+            scraper.init_driver()
+            with tempfile.TemporaryDirectory() as tmp:
+                output_csv = os.path.join(tmp, "bench_all.csv")
+                start = time.perf_counter()
+                try:
+                    df, failed = process_publications(
+                        df,
+                        scraper,
+                        TARGET_COLUMNS,
+                        output_csv,
+                        limiter=RateLimiter((delay, delay)),
+                        batch_size=batch_size,
+                    )
+                finally:
+                    scraper.close()
+                elapsed = time.perf_counter() - start
+            results.append({"batch_size": batch_size, "seconds": elapsed})
+            print(
+                f"batch_size={batch_size}: {len(df)} 篇用时 {elapsed:.1f} 秒，"
+                f"失败 {len(failed)} 篇"
+            )
+    finally:
+        server.stop()
+    return results
+
+
+def bench_blocking(n_records=10, asset_delay=0.2, last_name="Nori"):
+    """测量网络层拦截前后，每次页面跳转的传输字节数和就绪耗时（需要本机 Chrome）"""
+    server = MockWOSServer(make_records(n_records, last_name), asset_delay=asset_delay)
+    base_url = server.start()
+    results = {}
+    try:
+        for block in (False, True):
+            scraper = WOSArticleScraper(
+                base_url=base_url, block_resources=block, measure=True
+            )
+            scraper.init_driver()
+            try:
+                for record in server.records:
+                    if scraper.search_article(record["title"]):
+                        scraper.get_article_details(last_name, record["title"])
+            finally:
+                scraper.close()
+            results[block] = scraper.network_summary()
+    finally:
+        server.stop()
+
+    print(
+        f"{'页面':<8}{'字节(不拦截)':>14}{'字节(拦截)':>12}{'就绪ms(不拦截)':>16}{'就绪ms(拦截)':>14}"
+    )
+    for page in results[False]:
+        before, after = results[False][page], results[True].get(page)
+        if after is None:
+            continue
+        print(
+            f"{page:<8}{before['bytes']:>14.0f}{after['bytes']:>12.0f}"
+            f"{before['ready_ms']:>16.0f}{after['ready_ms']:>14.0f}"
+        )
+    return results
+
+
+class CommandCountingScraper(WOSArticleScraper):
+    """统计发给 chromedriver 的 WebDriver 命令（每条命令一次 HTTP 往返）"""
+
+    def init_driver(self):
+        super().init_driver()
+        self.commands = Counter()
+        execute = self.driver.execute
+
+        def counting_execute(command, params=None):
+            self.commands[command] += 1
+            return execute(command, params)
+
+        # WebElement 的读取（.text、get_attribute 等）也经由 driver.execute
+        self.driver.execute = counting_execute
+
+
+class PerElementScraper(CommandCountingScraper):
+    """逐个读取 WebElement 的旧写法，作为命令数的对照"""
+
+    def get_result_candidates(self):
+        candidates = []
+        for index, link in enumerate(
+            self.driver.find_elements(By.CSS_SELECTOR, TITLE_LINK)
+        ):
+            box = link.find_element(By.XPATH, "./../..")
+            candidates.append(
+                {
+                    "index": index,
+                    "title": link.text,
+                    "href": link.get_attribute("href"),
+                    "text": box.text,
+                }
+            )
+        return candidates
+
+    def element_texts(self, selector):
+        return [
+            e.text.strip() for e in self.driver.find_elements(By.CSS_SELECTOR, selector)
+        ]
+
+    def element_text(self, selector):
+        element = self.find_now(By.CSS_SELECTOR, selector)
+        return element.text.strip() if element is not None else None
+
+
+def bench_commands(n_records=10, multi_rate=0.5, last_name="Nori"):
+    """逐字段提取模式下每篇文章的 WebDriver 命令数：逐个读取元素 vs 一次取回（需要本机 Chrome）"""
+    records = make_records(n_records, last_name, multi_rate=multi_rate)
+    server = MockWOSServer(records)
+    base_url = server.start()
+    targets = [r for r in records if not r.get("decoy")]
+    results = {}
+    try:
+        for name, cls in (
+            ("逐个读取", PerElementScraper),
+            ("一次取回", CommandCountingScraper),
+        ):
+            scraper = cls(base_url=base_url, extraction_mode="live")
+            scraper.init_driver()
+            try:
+                search = details = 0
+                for record in targets:
+                    before = sum(scraper.commands.values())
+                    found = scraper.search_article(record["title"])
+                    middle = sum(scraper.commands.values())
+                    if found:
+                        scraper.get_article_details(last_name, record["title"])
+                    search += middle - before
+                    details += sum(scraper.commands.values()) - middle
+            finally:
+                scraper.close()
+            results[name] = {
+                "search": search / len(targets),
+                "details": details / len(targets),
+                "commands": dict(scraper.commands.most_common(8)),
+            }
+    finally:
+        server.stop()
+
+    print(f"{'':<10}{'检索/篇':>10}{'详情页/篇':>12}{'合计/篇':>10}")
+    for name, result in results.items():
+        print(
+            f"{name:<10}{result['search']:>10.1f}{result['details']:>12.1f}"
+            f"{result['search'] + result['details']:>10.1f}"
+        )
+        print(f"  {result['commands']}")
+    return results
+
+
+class CountingLimiter:
+    """包装限速器，累计 wait() 实际等待的秒数"""
+
+    def __init__(self, limiter):
+        self.limiter = limiter
+        self.waited = 0.0
+
+    def wait(self):
+        waited = self.limiter.wait()
+        self.waited += waited or 0.0
+        return waited
+
+    def pause(self, seconds):
+        self.limiter.pause(seconds)
+
+    def record(self, status, latency=None):
+        self.limiter.record(status, latency)
+
+
+class TimedScraper(WOSArticleScraper):
+    """累计页面内就绪等待（wait_ready）耗时的爬虫"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ready_seconds = 0.0
+
+    def wait_ready(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().wait_ready(*args, **kwargs)
+        finally:
+            self.ready_seconds += time.perf_counter() - start
+
+
+def git_revision():
+    """当前提交的短哈希，不在 git 仓库中时返回 None"""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def count_wrong(df, records):
+    """抓取到的 DOI 与模拟文章不一致的行数（失败行不计）"""
+    expected = {r["title"]: r["doi"] for r in records if not r.get("decoy")}
+    wrong = 0
+    for _, row in df.iterrows():
+        if not row["Title"] or not row["DOI"]:
+            continue
+        if normalize_doi(row["DOI"]) != normalize_doi(expected.get(row["Title"])):
+            wrong += 1
+    return wrong
+
+
+def bench_e2e(
+    n_records=20,
+    latency=0.2,
+    missing_rate=0.2,
+    multi_rate=0.2,
+    delay=0.5,
+    batch_size=1,
+    output=BENCH_RESULTS,
+    label="",
+    last_name="Nori",
+):
+    """端到端基准：process_publications 跑完整个模拟站点（需要本机 Chrome）
+
+    输出文章/分钟、单篇耗时 p50/p95、限速等待和页面内等待占总耗时的比例，
+    结果追加写入 output，便于和以前的运行比较。
+    """
+    params = {
+        "records": n_records,
+        "latency": latency,
+        "missing_rate": missing_rate,
+        "multi_rate": multi_rate,
+        "delay": delay,
+        "batch_size": batch_size,
+    }
+    records = make_records(n_records, last_name, missing_rate, multi_rate)
+    server = MockWOSServer(records, latency=latency)
+    base_url = server.start()
+    limiter = CountingLimiter(RateLimiter((delay, delay)))
+    TIMER.reset()
+    try:
+        df = build_dataframe(records)
+        scraper = TimedScraper(base_url=base_url)
+        scraper.init_driver()
+        with tempfile.TemporaryDirectory() as tmp:
+            output_csv = os.path.join(tmp, "bench_all.csv")
+            started = time.time()
+            try:
+                df, failed = process_publications(
+                    df,
+                    scraper,
+                    TARGET_COLUMNS,
+                    output_csv,
+                    limiter=limiter,
+                    batch_size=batch_size,
+                )
+            finally:
+                scraper.close()
+            elapsed = time.time() - started
+            journal = ProgressJournal(journal_path(output_csv))
+            finished = sorted(r["finished_at"] for r in journal.load().values())
+    finally:
+        server.stop()
+
+    # 单篇耗时：相邻两篇完成时刻之差（第一篇从开始计）
+    latencies = [b - a for a, b in zip([started, *finished], finished)]
+    results = {
+        "articles": len(df),
+        "seconds": elapsed,
+        "per_minute": len(df) / elapsed * 60 if elapsed else None,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "limiter_wait": limiter.waited,
+        "ready_wait": scraper.ready_seconds,
+        "wait_share": (limiter.waited + scraper.ready_seconds) / elapsed,
+        "failed": len(failed),
+        "wrong": count_wrong(df, records),
+        "stages": TIMER.summary(),
+    }
+    print(
+        f"{results['articles']} 篇用时 {elapsed:.1f} 秒，{results['per_minute']:.1f} 篇/分钟，"
+        f"单篇 p50 {results['p50']:.2f} 秒 / p95 {results['p95']:.2f} 秒"
+    )
+    print(
+        f"限速等待 {limiter.waited:.1f} 秒，页面内等待 {scraper.ready_seconds:.1f} 秒，"
+        f"占总耗时 {results['wait_share']:.0%}；失败 {len(failed)} 篇，对应错误 {results['wrong']} 篇"
+    )
+
+    entry = {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "label": label,
+        "commit": git_revision(),
+        "params": params,
+        "results": results,
+    }
+    with open(output, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    print(f"结果已追加到 {output}")
+    return entry
+
+
+def show_results(path=BENCH_RESULTS):
+    """列出以往 e2e 基准测试的结果"""
+    if not os.path.exists(path):
+        print(f"没有找到 {path}")
+        return []
+    with open(path, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    print(
+        f"{'时间':<20}{'标签':<12}{'提交':<9}{'篇/分钟':>8}{'p50':>7}{'p95':>7}"
+        f"{'等待占比':>9}{'失败':>5}{'错误':>5}"
+    )
+    for entry in entries:
+        r = entry["results"]
+        print(
+            f"{entry['time']:<20}{entry['label'] or '-':<12}{entry['commit'] or '-':<9}"
+            f"{r['per_minute']:>8.1f}{r['p50']:>7.2f}{r['p95']:>7.2f}"
+            f"{r['wait_share']:>9.0%}{r['failed']:>5}{r['wrong']:>5}"
+        )
+    return entries
+
+
+class StubScholarly:
+    """模拟 scholarly：每次请求固定耗时 latency 秒，不访问 Google Scholar"""
+
+    def __init__(self, n_pubs=40, latency=1.0):
+        self.latency = latency
+        self.author = {
+            "name": "Stub Author",
+            "publications": [
+                {"bib": {"title": f"Stub publication {i}"}} for i in range(n_pubs)
+            ],
+        }
+
+    def search_author(self, name):
+        time.sleep(self.latency)
+        return iter([self.author])
+
+    def fill(self, obj):
+        time.sleep(self.latency)
+        if "bib" in obj:
+            obj["bib"].update({"pub_year": "2020", "author": "A and B"})
+            obj["bib"]["journal"] = "Stub Journal"
+            obj["num_citations"] = 1
+        return obj
+
+
+def bench_scholarly_fill(worker_counts=(1, 4), n_pubs=40, rate=2.0, latency=1.0):
+    """在固定请求速率下比较逐篇补全与并发补全的耗时（scholarly 被替换为桩对象）"""
+    original = scholarly_utils.scholarly
+    results = []
+    try:
+        for workers in worker_counts:
+            scholarly_utils.scholarly = StubScholarly(n_pubs, latency)
+            with tempfile.TemporaryDirectory() as tmp:
+                cwd = os.getcwd()
+                os.chdir(tmp)  # CSV 写在临时目录
+                try:
+                    start = time.perf_counter()
+                    scholarly_utils.get_author_publications(
+                        "Stub Author", workers=workers, limiter=TokenBucket(rate)
+                    )
+                    elapsed = time.perf_counter() - start
+                finally:
+                    os.chdir(cwd)
+            results.append({"workers": workers, "seconds": elapsed})
+            print(f"并发 {workers}: {n_pubs} 篇用时 {elapsed:.1f} 秒")
+    finally:
+        scholarly_utils.scholarly = original
+    base = results[0]["seconds"]
+    for result in results[1:]:
+        print(f"并发 {result['workers']} 加速比: {base / result['seconds']:.2f}x")
+    print(f"固定请求速率: {rate} 次/秒，单次请求耗时: {latency} 秒")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="WOS 爬虫本地基准测试")
+    parser.add_argument(
+        "suite",
+        choices=[
+            "pool",
+            "scholarly",
+            "batch",
+            "fields",
+            "commands",
+            "blocking",
+            "e2e",
+            "history",
+        ],
+        nargs="?",
+        default="pool",
+    )
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--records", type=int, default=20)
+    parser.add_argument(
+        "--batch-sizes", type=int, nargs="+", default=[1, 10], help="批量检索大小"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=1, help="e2e 的批量检索大小（1 为逐篇检索）"
+    )
+    parser.add_argument("--delay", type=float, default=0.5, help="全局请求间隔（秒）")
+    parser.add_argument(
+        "--rate", type=float, default=2.0, help="scholarly 请求速率（次/秒）"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=1.0, help="scholarly 单次耗时（秒）"
+    )
+    parser.add_argument(
+        "--asset-delay", type=float, default=0.2, help="模拟站点静态资源延迟（秒）"
+    )
+    parser.add_argument(
+        "--page-latency", type=float, default=0.2, help="模拟站点页面响应延迟（秒）"
+    )
+    parser.add_argument("--missing", type=float, default=0.2, help="缺失字段的文章比例")
+    parser.add_argument("--multi", type=float, default=0.2, help="多结果文章比例")
+    parser.add_argument("--output", default=BENCH_RESULTS, help="e2e 结果文件")
+    parser.add_argument("--label", default="", help="本次 e2e 运行的标签")
+    args = parser.parse_args()
+
+    if args.suite == "e2e":
+        bench_e2e(
+            args.records,
+            args.page_latency,
+            args.missing,
+            args.multi,
+            args.delay,
+            args.batch_size,
+            args.output,
+            args.label,
+        )
+    elif args.suite == "history":
+        show_results(args.output)
+    elif args.suite == "pool":
+        bench_pool(args.workers, args.records, args.delay)
+    elif args.suite == "commands":
+        bench_commands(args.records, args.multi)
+    elif args.suite == "blocking":
+        bench_blocking(args.records, args.asset_delay)
+    elif args.suite == "fields":
+        bench_field_selection(args.records)
+    elif args.suite == "batch":
+        bench_batch(args.batch_sizes, args.records, args.delay)
+    else:
+        bench_scholarly_fill(args.workers, args.records, args.rate, args.latency)
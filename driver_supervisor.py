@@ -0,0 +1,197 @@
+"""浏览器会话监护：会话断开时自动重启 Chrome，并按文章数或内存占用定期回收"""
+
+import inspect
+import logging
+from collections import Counter
+
+from stage_timer import TIMER
+
+try:
+    import psutil  # 可选：统计 chromedriver 及其 Chrome 子进程的内存
+except ImportError:
+    psutil = None
+
+# 打开页面的方法：调用前只确认浏览器在运行（上次重启失败时再试），不回收、不计篇数
+# （一篇文章的重试和降级会多次调用，篇数由调用方通过 begin_article 每篇计一次）
+BROWSER_METHODS = ("search_article", "search_doi", "open_record")
+# 批量检索、导出：调用前检查是否需要回收，不计篇数
+CHECKPOINT_METHODS = ("search_batch", "export_query")
+# 返回失败结果时检查会话是否还在（爬虫内部会吞掉异常，只能从结果判断）
+HEALTH_CHECKED_METHODS = (
+    BROWSER_METHODS
+    + CHECKPOINT_METHODS
+    + (
+        "get_article_details",
+        "handle_multiple_results",
+    )
+)
+RESTART_REASONS = {
+    "crash": "会话断开",
+    "articles": "按篇数回收",
+    "memory": "按内存回收",
+}
+
+
+class DriverSupervisor:
+    """包装 WOSArticleScraper：会话断开时重启浏览器，每 recycle_articles 篇
+    或内存超过 max_rss_mb 时主动回收（重启）Chrome
+
+    其余属性和方法原样转给被包装的爬虫，调用方无需区分。重启后被中断的调用
+    仍返回原来的失败结果（或抛出原来的异常），由调用方现有的重试/降级逻辑处理。
+    max_rss_mb 需要安装 psutil，没有时只按篇数回收。
+    """
+
+    def __init__(
+        self, scraper, recycle_articles=300, max_rss_mb=2000, rss_check_every=25
+    ):
+        self.__dict__.update(
+            scraper=scraper,
+            recycle_articles=recycle_articles,
+            max_rss_mb=max_rss_mb if psutil is not None else None,
+            rss_check_every=max(rss_check_every, 1),
+            articles=0,  # 本次运行处理的篇数
+            session_articles=0,  # 当前浏览器会话处理的篇数
+            restarts=Counter(),  # 各原因的重启次数
+            peak_rss_mb=0.0,
+        )
+
+    def __getattr__(self, name):
+        attr = getattr(self.scraper, name)
+        if not inspect.ismethod(attr):
+            return attr
+        return self._supervised(name, attr)
+
+    def __setattr__(self, name, value):
+        if name in self.__dict__:
+            self.__dict__[name] = value
+        else:
+            setattr(self.scraper, name, value)
+
+    def _supervised(self, name, method):
+        def call(*args, **kwargs):
+            if name in CHECKPOINT_METHODS:
+                self.checkpoint(count=False)
+            elif name in BROWSER_METHODS and self.scraper.driver is None:
+                self.restart("crash")  # 上次重启失败，再试一次
+            try:
+                result = method(*args, **kwargs)
+            except Exception:
+                # chromedriver 退出后抛出的是连接错误，不一定是 WebDriverException
+                if not self.is_alive():
+                    self.restart("crash")
+                raise
+            if not result and name in HEALTH_CHECKED_METHODS and not self.is_alive():
+                self.restart("crash")
+            return result
+
+        return call
+
+    def init_driver(self):
+        self.scraper.init_driver()
+        self.session_articles = 0
+
+    def is_alive(self):
+        """浏览器会话是否还能响应（chromedriver 进程在运行，且能执行一条脚本）"""
+        driver = self.scraper.driver
+        if driver is None:
+            return False
+        process = getattr(getattr(driver, "service", None), "process", None)
+        if process is not None and process.poll() is not None:
+            return False
+        try:
+            driver.execute_script("return 1;")
+            return True
+        except Exception:
+            return False
+
+    def rss_mb(self):
+        """chromedriver 及其所有 Chrome 子进程的常驻内存（MB），无法统计时返回 None"""
+        if psutil is None or self.scraper.driver is None:
+            return None
+        process = getattr(
+            getattr(self.scraper.driver, "service", None), "process", None
+        )
+        if process is None:
+            return None
+        try:
+            root = psutil.Process(process.pid)
+            processes = [root, *root.children(recursive=True)]
+        except psutil.Error:
+            return None
+        total = 0
+        for proc in processes:
+            try:
+                total += proc.memory_info().rss
+            except psutil.Error:
+                pass  # 统计期间退出的子进程
+        return total / 2**20
+
+    def begin_article(self):
+        """开始处理一篇文章（未命中缓存、需要访问 WOS 时每篇调用一次）：检查回收并计一篇"""
+        self.checkpoint()
+
+    def checkpoint(self, count=True):
+        """开始一篇文章（或一次批量检索）前：会话丢失则重启，到达篇数或内存上限则回收"""
+        if self.scraper.driver is None:
+            self.restart("crash")  # 上次重启失败，再试一次
+        elif self.recycle_articles and self.session_articles >= self.recycle_articles:
+            self.restart("articles")
+        elif (
+            self.max_rss_mb
+            and self.session_articles
+            and self.session_articles % self.rss_check_every == 0
+        ):
+            rss = self.rss_mb()
+            if rss is not None:
+                self.peak_rss_mb = max(self.peak_rss_mb, rss)
+                logging.info(
+                    f"浏览器内存 {rss:.0f} MB（本会话第 {self.session_articles} 篇）"
+                )
+                if rss > self.max_rss_mb:
+                    self.restart("memory")
+        if count:
+            self.articles += 1
+            self.session_articles += 1
+
+    def restart(self, reason):
+        """关闭当前浏览器并重新启动（计入 driver_restart 阶段）"""
+        rss = self.rss_mb() if reason != "crash" else None
+        if rss is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb, rss)
+        memory = f"，内存 {rss:.0f} MB" if rss is not None else ""
+        logging.warning(
+            f"重启浏览器（{RESTART_REASONS[reason]}，本会话 {self.session_articles} 篇"
+            f"{memory}）"
+        )
+        self.restarts[reason] += 1
+        self.session_articles = 0
+        with TIMER.span("driver_restart", reason=reason):
+            try:
+                self.scraper.restart_driver()
+            except Exception as e:
+                # 下一篇开始前会再次尝试
+                logging.error(f"浏览器重启失败: {str(e)}")
+
+    def log_summary(self):
+        """在日志中汇报重启次数和内存峰值"""
+        total = sum(self.restarts.values())
+        reasons = "，".join(
+            f"{RESTART_REASONS[reason]} {count} 次"
+            for reason, count in self.restarts.items()
+        )
+        peak = (
+            f"，内存峰值 {self.peak_rss_mb:.0f} MB"
+            if self.peak_rss_mb
+            else ("" if psutil is not None else "（未安装 psutil，不统计内存）")
+        )
+        logging.info(
+            f"浏览器监护：共 {self.articles} 篇，重启 {total} 次"
+            f"{'（' + reasons + '）' if reasons else ''}{peak}"
+        )
+
+    def end_session(self):
+        rss = self.rss_mb()
+        if rss is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb, rss)
+        self.log_summary()
+        self.scraper.end_session()
@@ -3,42 +3,106 @@
 import pandas as pd
 import datetime
 import os
-import random
 import time
 import logging
+import queue
+import threading
+from collections import Counter
 from WOSArticleScraper import WOSArticleScraper
-from scholarly_utils import get_author_publications
+from driver_supervisor import DriverSupervisor
+from scholarly_utils import (
+    ORIGINAL_HEADERS,
+    AuthorNotFound,
+    get_author_publications,
+    stream_author_publications,
+)
+from rate_limiter import AdaptiveRateLimiter
+from page_archive import PageArchive
+from record_parser import (
+    ADDRESS_COLUMNS,
+    FIELD_COLUMNS,
+    author_columns,
+    build_title_query,
+    normalize_country,
+    normalize_doi,
+    normalize_title,
+    rebuild_details,
+)
+from result_cache import ResultCache, is_placeholder_address
+from progress_journal import ProgressJournal, journal_path
+from stage_timer import TIMER
+from wos_export import export_details, join_export, read_export
 
 # 配置
 os.environ["TF_CPP_MIN_LOG_LEVEL"] = "2"  # 抑制 TensorFlow 日志
 MAX_RETRIES = 2  # 最大重试次数
 BASE_DELAY = 1  # 基础等待时间（秒）
-RATE_LIMIT_DELAY = (1, 3)  # 请求间隔随机范围（秒）
-BATCH_CONFIG = [  # 批次配置（阈值从大到小排列）
-    {"threshold": 100, "delay": 60},
-    {"threshold": 50, "delay": 10},
-    {"threshold": 5, "delay": 5},
-]
-SAVE_ON_FAILURE = True  # 失败时立即保存
+RATE_LIMIT_CONFIG = {  # 自适应限速配置（速率单位：次/秒，所有浏览器共享）
+    "rate": 0.4,  # 初始速率
+    "min_rate": 0.02,  # 最低速率
+    "max_rate": 0.5,  # 最高速率（与原来每次搜索前随机等待 1~3 秒相当）
+    "increase": 0.02,  # 每次顺利搜索的加法提速
+    "decrease": 0.5,  # 超时/异常时的乘法降速系数
+    "slow_latency": 10.0,  # 搜索耗时超过该值（秒）视为站点变慢
+    "empty_streak": 3,  # 连续零结果次数达到该值时降速
+    "block_pause": 600,  # 遇到封禁/验证页时全局暂停（秒）
+}
+POOL_WORKERS = 1  # 并行浏览器数量（大于1时启用并行池，共享同一限速）
+PAGE_ARCHIVE_DIR = "wos_pages"  # 详情页存档目录（None 表示不存档）
+CHROME_PROFILE_DIR = "chrome_profile"  # 持久化的浏览器配置目录（None 表示每次全新配置）
+# 浏览器监护：会话断开时自动重启；每处理 DRIVER_RECYCLE_ARTICLES 篇，或内存超过
+# DRIVER_MAX_RSS_MB（需要 psutil）时主动重启 Chrome（None 表示不按该条件回收）
+DRIVER_SUPERVISOR = True
+DRIVER_RECYCLE_ARTICLES = 300
+DRIVER_MAX_RSS_MB = 2000
+RESULT_CACHE_PATH = "wos_cache.sqlite"  # 结果缓存（跨运行、跨作者共用，None 表示不用）
+RESULT_CACHE_TTL_DAYS = 180  # 缓存有效期（天）
+RESULT_CACHE_MAX_ENTRIES = 50000  # 缓存条目上限
+# 批量检索：一条高级检索式包含的标题数（1 表示逐篇检索）。高级检索页的选择器和结果列表
+# 解析只在模拟站点上验证过，默认关闭；确认真实站点可用后再改成 20 左右
+BATCH_SEARCH_SIZE = 1
+EXPORT_DIR = "wos_exports"  # 导出模式的下载目录
+EXPORT_BATCH_SIZE = 50  # 导出模式：一条检索式包含的标题数（每次导出不超过500条）
+STREAM_PIPELINE = True  # main_run_all 边补全 Scholar 边检索 WOS（并行池模式下不启用）
+STREAM_QUEUE_SIZE = 50  # Scholar 阶段最多领先 WOS 阶段的篇数
+REFRESH_RETRY_FAILED = False  # 增量刷新时是否重试以前失败的行（默认只检索新增文章）
+STAGE_TIMING = True  # 各阶段耗时写入 <all CSV>.timing.jsonl，结束时汇总
+PROFILE_PARSING = False  # 用 cProfile 剖析解析代码，结果写入 PARSE_PROFILE_PATH
+PARSE_PROFILE_PATH = "parse_profile.prof"
 
 AUTHOR_NAME = "Franco Nori"  # 作者名称配置
 LAST_NAME = AUTHOR_NAME.split()[-1]  # 使用全局配置
 # LAST_NAME = "Cheng-Wei"  # （中文作者需手动设置）
+BATCH_AUTHORS = [  # 多作者批量运行：(作者名称, 姓氏)，姓氏为 None 时取名称的最后一个词
+    ("Franco Nori", None),
+    # ("Cheng-Wei Qiu", "Cheng-Wei"),
+]
+BATCH_NAME = "batch"  # 多作者批量运行的合并工作表文件名前缀
 TARGET_COLUMNS = [  # 目标列配置
     "Impact Factor",
     "Author Keywords",
     "Keywords Plus",
     "Institution",
     "Country",
+    "Affiliations",
     "DOI",
     "Abstract",
 ]
+# 输入中作为检索线索的列（谷歌学术给出的 DOI 走 DOI 快速路径）：
+# 爬取失败时保留原值，重试时仍可走快速路径
+HINT_COLUMNS = ("DOI",)
 
 # 日志配置
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
+# 本次运行各路径完成的篇数：export / cache / batch / doi / title / failed
+PATH_STATS = Counter()
+# 本次运行各弹窗（按选择器）被页面内监视脚本点掉的次数
+OVERLAY_STATS = Counter()
+_stats_lock = threading.Lock()
+
 
 def clean_abstract(text):
     """统一清理摘要换行符"""
@@ -47,6 +111,12 @@ def clean_abstract(text):
     return str(text).replace("\n", " ").replace("\r", "").strip()
 
 
+def clean_abstracts(df):
+    """清理整列摘要（目标列不含摘要时跳过）"""
+    if "Abstract" in df.columns:
+        df["Abstract"] = df["Abstract"].apply(clean_abstract)
+
+
 def get_author_publications_csv():
     """获取作者出版物信息并保存到CSV文件"""
     csv_file = get_author_publications(AUTHOR_NAME)
@@ -56,6 +126,43 @@ def get_author_publications_csv():
     return csv_file
 
 
+def create_scraper(co_authors=(), columns=None):
+    """按全局配置创建爬虫实例；co_authors 为一并解析地址的其他作者姓氏
+
+    详情页只提取 columns（默认 TARGET_COLUMNS）需要的字段。
+    """
+    archive = PageArchive(PAGE_ARCHIVE_DIR) if PAGE_ARCHIVE_DIR else None
+    scraper = WOSArticleScraper(
+        archive=archive,
+        profile_dir=CHROME_PROFILE_DIR,
+        co_authors=co_authors,
+        columns=TARGET_COLUMNS if columns is None else columns,
+    )
+    if not DRIVER_SUPERVISOR:
+        return scraper
+    return DriverSupervisor(
+        scraper,
+        recycle_articles=DRIVER_RECYCLE_ARTICLES,
+        max_rss_mb=DRIVER_MAX_RSS_MB,
+    )
+
+
+def create_limiter():
+    """按全局配置创建自适应限速器"""
+    return AdaptiveRateLimiter(**RATE_LIMIT_CONFIG)
+
+
+def open_result_cache():
+    """按全局配置打开结果缓存"""
+    if not RESULT_CACHE_PATH:
+        return None
+    return ResultCache(
+        RESULT_CACHE_PATH,
+        ttl_days=RESULT_CACHE_TTL_DAYS,
+        max_entries=RESULT_CACHE_MAX_ENTRIES,
+    )
+
+
 def find_start_index(df, target_columns):
     """查找需要继续处理的起始索引"""
     for col in target_columns:
@@ -66,22 +173,299 @@ def find_start_index(df, target_columns):
     return 0
 
 
-def scrape_article_details(scraper, title):
-    """爬取文章详细信息"""
+def count_path(path):
+    """记录一篇文章经由哪条路径完成"""
+    with _stats_lock:
+        PATH_STATS[path] += 1
+
+
+def log_path_stats():
+    """汇报快速路径（导出、缓存、批量检索、DOI）与标题检索各完成多少篇"""
+    with _stats_lock:
+        stats = dict(PATH_STATS)
+    fast = sum(stats.get(path, 0) for path in ("export", "cache", "batch", "doi"))
+    logging.info(
+        f"完成路径：导出 {stats.get('export', 0)} 篇，缓存 {stats.get('cache', 0)} 篇，"
+        f"批量检索 {stats.get('batch', 0)} 篇，"
+        f"DOI {stats.get('doi', 0)} 篇（快速路径合计 {fast} 篇）；"
+        f"标题检索 {stats.get('title', 0)} 篇；失败 {stats.get('failed', 0)} 篇"
+    )
+    return stats
+
+
+def close_scraper(scraper):
+    """结束浏览器会话，并把该会话点掉的弹窗次数计入本次运行的统计"""
+    scraper.end_session()
+    with _stats_lock:
+        OVERLAY_STATS.update(getattr(scraper, "overlay_counts", {}))
+
+
+def log_overlay_stats():
+    """汇报本次运行各弹窗被点掉的次数"""
+    with _stats_lock:
+        stats = dict(OVERLAY_STATS)
+    if not stats:
+        logging.info("本次运行没有出现需要关闭的弹窗")
+    for selector, count in stats.items():
+        logging.info(f"弹窗 {selector} 被关闭 {count} 次")
+    return stats
+
+
+def timing_path(csv_path):
+    """all CSV 对应的阶段耗时文件路径"""
+    return os.path.splitext(csv_path)[0] + ".timing.jsonl"
+
+
+def start_timing(csv_path):
+    """开始记录本次运行的各阶段耗时（STAGE_TIMING 关闭时只在内存中汇总）
+
+    计时器和路径、弹窗统计都是进程内共用的，先清空，同一进程里多次运行时
+    每次汇报的只是本次运行。
+    """
+    TIMER.reset()
+    with _stats_lock:
+        PATH_STATS.clear()
+        OVERLAY_STATS.clear()
+    if STAGE_TIMING:
+        TIMER.open(timing_path(csv_path), profile_parsing=PROFILE_PARSING)
+
+
+def log_field_costs(summary):
+    """各列在详情页上的提取耗时：逐字段模式计 get_<字段>，快照模式计 parse_<字段>
+
+    快照模式下等待页面和展开作者/地址的时间（take_snapshot）各列共用，单独列出。
+    """
+    rows = []
+    for field, columns in FIELD_COLUMNS.items():
+        stages = [
+            summary[s] for s in (f"get_{field}", f"parse_{field}") if s in summary
+        ]
+        count = sum(s["count"] for s in stages)
+        total = sum(s["total"] for s in stages)
+        rows.append(("/".join(columns), count, total))
+    if "take_snapshot" in summary:
+        s = summary["take_snapshot"]
+        rows.append(("(快照等待与展开)", s["count"], s["total"]))
+    if not any(count for _, count, _ in rows):
+        return
+    logging.info("各列提取耗时（每页平均，毫秒）：")
+    for name, count, total in rows:
+        if not count:
+            logging.info(f"  {name:<24} 未提取")
+            continue
+        logging.info(
+            f"  {name:<24} 页数 {count:>6}  每页 {total / count * 1000:>8.1f}  "
+            f"合计 {total:>9.1f} 秒"
+        )
+
+
+def finish_timing():
+    """汇报各阶段耗时和各列的提取耗时，开启剖析时写出解析代码的剖析结果"""
+    log_field_costs(TIMER.log_summary())
+    report = TIMER.profile_report()
+    if report:
+        logging.info(f"解析代码剖析结果（已保存至 {PARSE_PROFILE_PATH}）:\n{report}")
+    TIMER.close(PARSE_PROFILE_PATH if PROFILE_PARSING else None)
+
+
+def wait_turn(limiter):
+    """经限速器排队（计入 rate_limit 阶段），返回等待的秒数"""
+    with TIMER.span("rate_limit"):
+        return limiter.wait()
+
+
+def backoff(attempt):
+    """重试前的指数退避（计入 backoff 阶段）"""
+    with TIMER.span("backoff"):
+        time.sleep(BASE_DELAY * (2**attempt))
+
+
+def lookup_cached_details(scraper, title, cache, doi=None):
+    """查询结果缓存（标题优先，其次 DOI）；其他作者缓存的文章用存档页面补全本作者的地址"""
+    if cache is None:
+        return None
+    co_authors = getattr(scraper, "co_authors", ())
+    details = cache.get(
+        title=title, doi=doi, last_name=LAST_NAME, co_authors=co_authors
+    )
+    if details is None:
+        return None
+    fields = getattr(scraper, "fields", FIELD_COLUMNS)
+    shared = [
+        col
+        for field in fields
+        if field != "author_address"
+        for col in FIELD_COLUMNS[field]
+    ]
+    if any(col not in details for col in shared):
+        return None  # 缓存的结果缺少本次需要的列（之前按较少的列爬取）
+    if "author_address" not in fields:
+        return details
+    columns = [
+        *FIELD_COLUMNS["author_address"],
+        *(col for name in co_authors for col in author_columns(name)),
+    ]
+    if any(col not in details for col in columns):
+        archive = getattr(scraper, "archive", None)
+        html = archive.load(title) if archive is not None else None
+        if html is None:
+            return None
+        details = rebuild_details(
+            html, LAST_NAME, original_title=title, co_authors=co_authors
+        )
+        if not details or is_placeholder_address(details):
+            return None  # 存档页面同样没有地址时重新爬取
+        cache.put(title, details, LAST_NAME, co_authors)
+    return details
+
+
+def row_hints(df, index):
+    """取出年份、期刊（给 WOS 搜索结果打分）和已有的 DOI（走 DOI 快速路径），缺失时为 None"""
+    hints = {}
+    for key, col in (("year", "Publication Year"), ("journal", "Journal")):
+        value = df.at[index, col] if col in df.columns else None
+        hints[key] = None if pd.isna(value) or value == "" else value
+    value = df.at[index, "DOI"] if "DOI" in df.columns else None
+    hints["doi"] = normalize_doi(value)
+    return hints
+
+
+def resolve_batch(scraper, tasks, cache=None, limiter=None):
+    """批量检索一组任务：tasks 为 [(行索引, 标题, row_hints), ...]
+
+    已缓存的行和有 DOI 的行（走 DOI 快速路径）不参与；
+    返回 {行索引: 详情页地址}，对应不上的行由逐篇检索处理。
+    """
+    rows = [
+        (index, title, hints["year"], hints["journal"])
+        for index, title, hints in tasks
+        if not hints.get("doi")
+    ]
+    if cache is not None:
+        co_authors = getattr(scraper, "co_authors", ())
+        rows = [row for row in rows if not cache.has(row[1], LAST_NAME, co_authors)]
+    if len(rows) < 2:
+        return {}  # 只剩一篇时批量检索没有好处
+    if limiter is not None:
+        waited = wait_turn(limiter)
+        if waited > 0:
+            logging.info(f"限速等待: {waited:.2f} 秒")
+    search_start = time.time()
+    record_urls = scraper.search_batch(rows)
+    if limiter is not None:
+        limiter.record(
+            scraper.last_search_status or "error",
+            latency=time.time() - search_start,
+        )
+    logging.info(
+        f"批量检索 {len(rows)} 篇：{len(record_urls)} 篇直接打开详情页，其余逐篇检索"
+    )
+    return record_urls
+
+
+def fetch_record(scraper, title, record_url=None, cache=None, limiter=None, doi=None):
+    """不经过标题搜索，直接打开详情页（已知地址）或按 DOI 检索进入，失败返回空字典
+
+    按 DOI 进入的详情页同样做标题比对，DOI 有误时不会写入别的文章。
+    """
+    if limiter is not None:
+        wait_turn(limiter)
+    open_start = time.time()
+    if record_url:
+        opened = scraper.open_record(record_url)
+    else:
+        opened = scraper.search_doi(doi)
+    if limiter is not None:
+        limiter.record(
+            scraper.last_search_status or "error",
+            latency=time.time() - open_start,
+        )
+    details = (
+        scraper.get_article_details(LAST_NAME, original_title=title) if opened else None
+    )
+    if details and cache is not None:
+        cache.put(title, details, LAST_NAME, getattr(scraper, "co_authors", ()))
+    return details or {}
+
+
+def scrape_article_details(
+    scraper,
+    title,
+    cache=None,
+    limiter=None,
+    year=None,
+    journal=None,
+    record_url=None,
+    doi=None,
+):
+    """爬取文章详细信息（先查缓存，未命中才经限速器访问 WOS）
+
+    快速路径依次为：缓存、批量检索得到的详情页地址（record_url）、按 DOI 检索；
+    都不成功时再按标题检索。
+    """
     global LAST_NAME  # 使用全局配置
+    details = lookup_cached_details(scraper, title, cache, doi=doi)
+    if details:
+        logging.info(f"缓存命中，跳过搜索: {title}")
+        count_path("cache")
+        return details
+    begin_article = getattr(scraper, "begin_article", None)
+    if begin_article is not None:
+        begin_article()  # 浏览器监护按篇计数、到达上限时在两篇之间回收
+    if record_url:
+        details = fetch_record(scraper, title, record_url, cache, limiter)
+        if details:
+            count_path("batch")
+            return details
+        logging.warning(f"直接打开详情页失败，改为逐篇检索: {title}")
+    elif doi:
+        details = fetch_record(scraper, title, cache=cache, limiter=limiter, doi=doi)
+        if details:
+            logging.info(f"按 DOI 直接获取: {doi}")
+            count_path("doi")
+            return details
+        logging.warning(f"按 DOI 检索失败，改为标题检索: {doi}")
+    details = search_by_title(scraper, title, cache, limiter, year, journal)
+    count_path("title" if details else "failed")
+    return details
+
+
+def search_by_title(scraper, title, cache=None, limiter=None, year=None, journal=None):
+    """按标题检索（带重试和指数退避）"""
     for attempt in range(MAX_RETRIES + 1):
         try:
-            if scraper.search_article(title):
+            if limiter is not None:
+                waited = wait_turn(limiter)
+                if waited > 0:
+                    logging.info(f"限速等待: {waited:.2f} 秒")
+            search_start = time.time()
+            found = scraper.search_article(title, year=year, journal=journal)
+            if limiter is not None:
+                limiter.record(
+                    scraper.last_search_status or "error",
+                    latency=time.time() - search_start,
+                )
+            if found:
                 details = scraper.get_article_details(LAST_NAME, original_title=title)
                 if not details:
                     logging.warning(f"标题「{title}」匹配失败，放弃此条")
+                elif cache is not None:
+                    cache.put(
+                        title, details, LAST_NAME, getattr(scraper, "co_authors", ())
+                    )
                 return details
+            elif scraper.last_search_status == "mismatch":
+                # 结果列表中确定没有这篇文章，重试也不会有结果
+                logging.warning(f"标题「{title}」在结果列表中无匹配，放弃此条")
+                return {}
             else:
                 logging.warning(f"第 {attempt+1} 次搜索失败")
-                time.sleep(BASE_DELAY * (2**attempt))
+                backoff(attempt)
         except Exception as e:
             logging.error(f"错误: {str(e)}")
-            time.sleep(BASE_DELAY * (2**attempt))
+            if limiter is not None:
+                limiter.record("error")
+            backoff(attempt)
     return {}  # 默认返回空字典
 
 
@@ -93,6 +477,7 @@ def initialize_columns(df, target_columns):
         "Keywords Plus": "object",
         "Institution": "object",
         "Country": "object",
+        "Affiliations": "object",
         "DOI": "object",
         "Abstract": "object",
     }
@@ -103,10 +488,21 @@ def initialize_columns(df, target_columns):
                 df[col] = pd.NA
             else:
                 df[col] = ""
-        df[col] = df[col].astype(dtype_mapping[col])
+        df[col] = df[col].astype(dtype_mapping.get(col, "object"))
     return df
 
 
+def failed_details(df, index, target_columns):
+    """失败行写回的值：目标列清空，检索线索列（HINT_COLUMNS）保留原有的非空值"""
+    details = {col: "" for col in target_columns}
+    for col in HINT_COLUMNS:
+        if col in details and col in df.columns:
+            value = df.at[index, col]
+            if not pd.isna(value) and value != "":
+                details[col] = value
+    return details
+
+
 def convert_details(details, target_columns):
     """添加异常处理和更严格的数据转换"""
     converted = {}
@@ -128,38 +524,179 @@ def convert_details(details, target_columns):
 def save_progress(df, csv_path):
     """安全保存进度"""
     temp_file = csv_path + ".tmp"
-    df.to_csv(temp_file, index=False)
-    os.replace(temp_file, csv_path)
+    with TIMER.span("save_progress"):
+        df.to_csv(temp_file, index=False)
+        os.replace(temp_file, csv_path)
     logging.info(f"进度已保存至 {csv_path}")
 
 
-def process_publications(df, scraper, target_columns, output_csv):
-    """处理出版物信息(含断点续传)"""
-    failed_indices = []
+def resume_from_journal(df, journal, target_columns):
+    """用进度日志回填已完成的行，返回已完成行索引集合"""
+    return apply_journal_records(df, journal.load(), target_columns)
+
+
+def restore_affiliations(details, title, target_columns):
+    """旧结果（Affiliations 列出现之前的进度日志、旧 all CSV）缺少全部地址时用存档页面补上
+
+    只补缺失的 Affiliations 列；没有存档或存档标题比对失败时这些列留空。
+    """
+    prefix = ADDRESS_COLUMNS["affiliations"]
+    missing = [col for col in target_columns if col.startswith(prefix)]
+    missing = [col for col in missing if col not in details]
+    if not missing or not PAGE_ARCHIVE_DIR or not os.path.isdir(PAGE_ARCHIVE_DIR):
+        return details
+    html = PageArchive(PAGE_ARCHIVE_DIR).load(title)
+    if html is None:
+        return details
+    co_authors = [col[len(prefix) + 2 : -1] for col in missing if col != prefix]
+    rebuilt = rebuild_details(
+        html,
+        LAST_NAME,
+        original_title=title,
+        co_authors=co_authors,
+        fields={"author_address"},
+    )
+    return {**details, **{col: rebuilt[col] for col in missing if col in rebuilt}}
+
+
+def apply_journal_records(df, records, target_columns):
+    """用已读出的进度日志记录回填 df 中对得上的行，返回回填的行索引集合"""
+    completed = set()
+    for index, record in records.items():
+        # 输入 CSV 变化后对不上的记录直接忽略
+        if index not in df.index or df.at[index, "Title"] != record["title"]:
+            continue
+        if record["failed"]:
+            continue  # 失败的行在续传时重试
+        details = restore_affiliations(
+            record["details"], record["title"], target_columns
+        )
+        details = convert_details(details, target_columns)
+        for col in target_columns:
+            df.at[index, col] = details.get(col, "")
+        completed.add(index)
+    return completed
+
+
+def pending_indices(df, target_columns, journal):
+    """待处理的行：有进度日志时按日志精确判断，否则沿用旧的断点检测"""
+    completed = resume_from_journal(df, journal, target_columns)
+    if completed:
+        logging.info(f"从进度日志恢复 {len(completed)} 篇已完成记录")
+        return [index for index in df.index if index not in completed]
+
     start_index = find_start_index(df, target_columns)
     logging.info(f"检测到断点，从第 {start_index+1} 篇开始继续处理")
+    return [
+        index
+        for index in df.index[start_index:]
+        if not all(pd.notna(df.at[index, col]) for col in target_columns)
+    ]
 
-    processed_count = 0  # 新增处理计数器
 
-    for index, row in df.iloc[start_index:].iterrows():
-        title = row["Title"]
-        logging.info(f"正在处理第 {index+1}/{len(df)} 篇: {title}")
+def adopt_previous_results(df, csv_path, target_columns, indices, infer_failed=True):
+    """把上次运行的 all CSV 中同名文章的结果并入 df（只看 indices 中的行）
 
-        # 跳过已处理完成的记录
-        if all(pd.notna(df.at[index, col]) for col in target_columns):
-            logging.info(f"跳过已处理文章: {title}")
+    用于没有进度日志的旧结果；返回 (沿用结果的行, 上次失败的行)。
+    目标列全空的行可能是失败了，也可能是中断的运行还没处理到：只有排在最后一条
+    有结果的行之前的才算失败，之后的留待检索。有进度日志时失败以日志为准
+    （infer_failed=False），全空的行一律留待检索。旧结果的国家列按现在的规则
+    归一化（"MI 48109 USA" 记为 USA）。
+    """
+    if not os.path.exists(csv_path):
+        return set(), set()
+    previous = pd.read_csv(csv_path)
+    has_result = previous[[c for c in target_columns if c in previous.columns]]
+    has_result = has_result.notna().any(axis=1).to_numpy()
+    last_done = max((i for i, done in enumerate(has_result) if done), default=-1)
+    by_title = {
+        normalize_title(row["Title"]): (position, row)
+        for position, (_, row) in enumerate(previous.iterrows())
+        if isinstance(row["Title"], str)
+    }
+    adopted, failed = set(), set()
+    for index in indices:
+        position, row = by_title.get(normalize_title(df.at[index, "Title"]), (0, None))
+        if row is None:
+            continue
+        if not has_result[position]:
+            if infer_failed and position < last_done:
+                failed.add(index)  # 上次检索失败，所有目标列为空
             continue
+        details = restore_affiliations(
+            {col: row.get(col) for col in target_columns if pd.notna(row.get(col))},
+            df.at[index, "Title"],
+            target_columns,
+        )
+        details = convert_details(details, target_columns)
+        for col in target_columns:
+            value = details.get(col, "")
+            if col.startswith("Country") and isinstance(value, str):
+                value = normalize_country(value)
+            df.at[index, col] = value
+        adopted.add(index)
+    return adopted, failed
 
-        # 添加随机延迟
-        search_delay = random.uniform(*RATE_LIMIT_DELAY)
-        logging.info(f"添加搜索延迟: {search_delay:.2f} 秒")
-        time.sleep(search_delay)
 
-        details = scrape_article_details(scraper, title)
-        if not details:
+def materialize_progress(df, target_columns, output_csv):
+    """按需把进度日志合并进 DataFrame 并写出 all CSV"""
+    journal = ProgressJournal(journal_path(output_csv))
+    completed = resume_from_journal(df, journal, target_columns)
+    save_progress(df, output_csv)
+    return df, completed
+
+
+def task_rows(df, indices):
+    """待处理任务列表：(行索引, 标题, row_hints)"""
+    return [(index, df.at[index, "Title"], row_hints(df, index)) for index in indices]
+
+
+def process_publications(
+    df,
+    scraper,
+    target_columns,
+    output_csv,
+    cache=None,
+    limiter=None,
+    batch_size=BATCH_SEARCH_SIZE,
+    indices=None,
+):
+    """处理出版物信息(含断点续传)
+
+    给出 indices 时只处理这些行（调用方已按进度日志排除完成的行）。
+    """
+    limiter = limiter or create_limiter()
+    failed_indices = []
+    journal = ProgressJournal(journal_path(output_csv))
+    if indices is None:
+        indices = pending_indices(df, target_columns, journal)
+    todo = task_rows(df, indices)
+    record_urls = {}
+
+    for position, (index, title, hints) in enumerate(todo):
+        # 每 batch_size 篇先合并检索一次，对应上的行直接打开详情页
+        if batch_size > 1 and position % batch_size == 0:
+            chunk = todo[position : position + batch_size]
+            record_urls = resolve_batch(scraper, chunk, cache, limiter)
+
+        logging.info(f"正在处理第 {index+1}/{len(df)} 篇: {title}")
+
+        # 缓存命中则不访问 WOS；否则由自适应限速器决定等待时间
+        with TIMER.span("article", index=int(index)):
+            details = scrape_article_details(
+                scraper,
+                title,
+                cache,
+                limiter,
+                record_url=record_urls.get(index),
+                **hints,
+            )
+
+        failed = not details
+        if failed:
             logging.warning("最终搜索失败，填充空值")
             failed_indices.append(index)
-            details = {col: "" for col in target_columns}
+            details = failed_details(df, index, target_columns)
         else:
             # 转换 details 中的每一项
             details = convert_details(details, target_columns)
@@ -168,40 +705,346 @@ def process_publications(df, scraper, target_columns, output_csv):
         for col in target_columns:
             df.at[index, col] = details.get(col, "")
 
-        # 保存进度（每处理5篇或遇到失败时保存）
-        if (index - start_index + 1) % 5 == 0 or not details:
-            save_progress(df, output_csv)
-            if failed_indices:
-                logging.warning(f"当前失败记录数: {len(failed_indices)}")
+        # 记录进度（追加一行日志，不再重写整个 CSV）
+        with TIMER.span("journal"):
+            journal.append(index, title, details, failed=failed)
+        if failed:
+            logging.warning(f"当前失败记录数: {len(failed_indices)}")
+
+    journal.close()
+    clean_abstracts(df)
+
+    return df, failed_indices
+
+
+def process_publications_parallel(
+    df,
+    target_columns,
+    output_csv,
+    workers=POOL_WORKERS,
+    limiter=None,
+    scraper_factory=None,
+    cache=None,
+    batch_size=BATCH_SEARCH_SIZE,
+):
+    """多浏览器并行处理出版物信息(共享限速，含断点续传)"""
+    limiter = limiter or create_limiter()
+    scraper_factory = scraper_factory or create_scraper
+    failed_indices = []
+    journal = ProgressJournal(journal_path(output_csv))
+
+    # 共享任务队列：(行索引, 标题, row_hints)
+    tasks = queue.Queue()
+    for task in task_rows(df, pending_indices(df, target_columns, journal)):
+        tasks.put(task)
+    logging.info(f"待处理 {tasks.qsize()} 篇，启动 {workers} 个浏览器")
+
+    lock = threading.Lock()  # 保护 DataFrame 和进度日志
+
+    def worker(worker_id):
+        scraper = scraper_factory()
+        if getattr(scraper, "profile_dir", None):
+            # 同一配置目录不能被多个 Chrome 同时使用，每个 worker 一个子目录
+            scraper.profile_dir = os.path.join(
+                scraper.profile_dir, f"worker-{worker_id}"
+            )
+        try:
+            scraper.init_driver()
+        except Exception as e:
+            logging.error(f"[worker {worker_id}] 浏览器启动失败: {str(e)}")
+            return
+        try:
+            while True:
+                # 每次领取一批任务，先合并检索一次
+                batch = []
+                while len(batch) < max(batch_size, 1):
+                    try:
+                        batch.append(tasks.get_nowait())
+                    except queue.Empty:
+                        break
+                if not batch:
+                    break
+                record_urls = {}
+                if batch_size > 1:
+                    record_urls = resolve_batch(scraper, batch, cache, limiter)
+
+                for index, title, hints in batch:
+                    logging.info(
+                        f"[worker {worker_id}] 正在处理第 {index+1}/{len(df)} 篇: {title}"
+                    )
+
+                    # 缓存未命中时经全局限速器（所有浏览器共享）访问 WOS
+                    try:
+                        with TIMER.span("article", index=int(index)):
+                            details = scrape_article_details(
+                                scraper,
+                                title,
+                                cache,
+                                limiter,
+                                record_url=record_urls.get(index),
+                                **hints,
+                            )
+                    except Exception as e:
+                        logging.error(f"[worker {worker_id}] 错误: {str(e)}")
+                        details = {}
+
+                    with lock:
+                        failed = not details
+                        if failed:
+                            logging.warning("最终搜索失败，填充空值")
+                            failed_indices.append(index)
+                            details = failed_details(df, index, target_columns)
+                        else:
+                            details = convert_details(details, target_columns)
+
+                        for col in target_columns:
+                            df.at[index, col] = details.get(col, "")
+
+                        with TIMER.span("journal"):
+                            journal.append(index, title, details, failed=failed)
+                        if failed:
+                            logging.warning(f"当前失败记录数: {len(failed_indices)}")
+        finally:
+            close_scraper(scraper)
+
+    threads = [
+        threading.Thread(target=worker, args=(i + 1,), name=f"wos-worker-{i+1}")
+        for i in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    journal.close()
+    if not tasks.empty():
+        logging.warning(f"仍有 {tasks.qsize()} 篇未处理（浏览器均已退出）")
+
+    clean_abstracts(df)
+
+    return df, sorted(failed_indices)
+
+
+def stream_publications(author_name, batch_size=1, maxsize=STREAM_QUEUE_SIZE):
+    """流水线的 Scholar 阶段：后台线程逐篇补全，经有界队列交给 WOS 阶段
+
+    每次产出一批 [(行号, 行字典), ...]：阻塞等到至少一篇，再带上队列中已有的
+    （最多 batch_size 篇）。队列满时 Scholar 阶段暂停（补全按需提交，见
+    fill_publications），等 WOS 阶段赶上；WOS 阶段结束或出错（关闭本生成器）时
+    通知 Scholar 阶段停止，不等它剩下的请求。
+    """
+    rows = queue.Queue(maxsize=maxsize)
+    end = object()  # 结束标记
+    stop = threading.Event()
+    errors = []
+
+    def offer(item):
+        """放入队列；队列满时等待，WOS 阶段已结束时放弃并返回 False"""
+        while not stop.is_set():
+            try:
+                rows.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        items = stream_author_publications(author_name)
+        try:
+            for item in items:
+                if not offer(item):
+                    break
+        except Exception as e:
+            errors.append(e)
+        finally:
+            items.close()
+            offer(end)
+
+    producer = threading.Thread(target=produce, name="scholar-producer", daemon=True)
+    producer.start()
+    finished = False
+    try:
+        while not finished:
+            chunk = [rows.get()]
+            while len(chunk) < max(batch_size, 1) and chunk[-1] is not end:
+                try:
+                    chunk.append(rows.get_nowait())
+                except queue.Empty:
+                    break
+            if chunk[-1] is end:
+                chunk.pop()
+                finished = True
+            if errors:
+                raise errors[0]  # Scholar 阶段出错时立即报告，不再处理队列中剩下的行
+            if chunk:
+                yield chunk
+    finally:
+        stop.set()
+    producer.join()
+
+
+def process_stream(
+    chunks,
+    scraper,
+    target_columns,
+    output_csv,
+    cache=None,
+    limiter=None,
+    batch_size=BATCH_SEARCH_SIZE,
+):
+    """流水线的 WOS 阶段：每到一批 Scholar 行就检索
+
+    行索引与 original CSV 的行号一致，进度日志与 process_publications 共用，
+    中断后可以用流水线或 main_start_by_csv 续传。
+    """
+    limiter = limiter or create_limiter()
+    records = ProgressJournal(journal_path(output_csv)).load()
+    df, failed_indices = None, []
+    for chunk in chunks:
+        # 空字符串换成缺失值，与读取 original CSV 时一致
+        frame = pd.DataFrame(
+            [{k: None if v == "" else v for k, v in row.items()} for _, row in chunk],
+            index=[index for index, _ in chunk],
+            columns=ORIGINAL_HEADERS,
+        )
+        frame.insert(0, "Sequence Number", frame.index + 1)
+        frame = initialize_columns(frame, target_columns)
+        completed = apply_journal_records(frame, records, target_columns)
+        df = frame if df is None else pd.concat([df, frame])
+        todo = [index for index in frame.index if index not in completed]
+        if completed:
+            logging.info(f"从进度日志恢复 {len(completed)} 篇已完成记录")
+        if todo:
+            df, failed = process_publications(
+                df,
+                scraper,
+                target_columns,
+                output_csv,
+                cache,
+                limiter,
+                batch_size,
+                indices=todo,
+            )
+            failed_indices.extend(failed)
+    if df is None:
+        df = pd.DataFrame(columns=["Sequence Number", *ORIGINAL_HEADERS])
+        df = initialize_columns(df, target_columns)
+    return df, failed_indices
+
+
+def ingest_exports(
+    df,
+    scraper,
+    target_columns,
+    output_csv,
+    cache=None,
+    limiter=None,
+    batch_size=EXPORT_BATCH_SIZE,
+):
+    """导出模式：每批标题检索一次并导出制表符分隔文件，按 DOI/标题回填，返回回填的行索引
+
+    导出文件不含影响因子；对应不上的行不写进度日志，留给逐篇处理。
+    """
+    limiter = limiter or create_limiter()
+    journal = ProgressJournal(journal_path(output_csv))
+    todo = task_rows(df, pending_indices(df, target_columns, journal))
+    if cache is not None:
+        todo = [task for task in todo if not cache.has(task[1], LAST_NAME)]
+    filled = []
+
+    for start in range(0, len(todo), batch_size):
+        chunk = todo[start : start + batch_size]
+        waited = wait_turn(limiter)
+        if waited > 0:
+            logging.info(f"限速等待: {waited:.2f} 秒")
+        search_start = time.time()
+        path = scraper.export_query(build_title_query([task[1] for task in chunk]))
+        limiter.record(
+            scraper.last_search_status or "error",
+            latency=time.time() - search_start,
+        )
+        if path is None:
+            logging.warning(f"第 {start // batch_size + 1} 批导出失败，留给逐篇处理")
+            continue
+
+        records = read_export(path)
+        joined = join_export(
+            [(index, title, hints["doi"]) for index, title, hints in chunk], records
+        )
+        for index, title, _ in chunk:
+            if index not in joined:
+                continue
+            details = convert_details(
+                export_details(joined[index], LAST_NAME), target_columns
+            )
+            for col in target_columns:
+                df.at[index, col] = details.get(col, "")
+            journal.append(index, title, details)
+            count_path("export")
+            filled.append(index)
+        logging.info(
+            f"第 {start // batch_size + 1} 批：导出 {len(records)} 条，"
+            f"回填 {len(joined)}/{len(chunk)} 篇"
+        )
 
-        # 动态延迟逻辑
-        processed_count += 1
-        for config in BATCH_CONFIG:
-            if processed_count % config["threshold"] == 0:
-                delay = config["delay"]
-                logging.info(f"已完成 {processed_count} 篇，添加批次延迟: {delay} 秒")
-                time.sleep(delay)
-                break  # 应用最大的满足条件的延迟
+    journal.close()
+    return filled
 
-    df["Abstract"] = df["Abstract"].apply(clean_abstract)
 
+def reextract_from_archive(df, target_columns, archive, last_name=None):
+    """用存档的详情页离线重新解析所有行（不访问网络）"""
+    last_name = last_name or LAST_NAME
+    failed_indices = []
+    missing_count = 0
+
+    for index, row in df.iterrows():
+        title = row["Title"]
+        html = archive.load(title)
+        if html is None:
+            # 无存档：保留原有数据，原本就没有爬到的仍记为失败
+            missing_count += 1
+            if pd.isna(row["Country"]) or row["Country"] == "":
+                failed_indices.append(index)
+            continue
+
+        details = rebuild_details(html, last_name, original_title=title)
+        if not details:
+            logging.warning(f"标题「{title}」匹配失败，放弃此条")
+            failed_indices.append(index)
+            details = failed_details(df, index, target_columns)
+        else:
+            details = convert_details(details, target_columns)
+
+        for col in target_columns:
+            df.at[index, col] = details.get(col, "")
+
+    logging.info(
+        f"离线解析完成：共 {len(df)} 篇，无存档 {missing_count} 篇，"
+        f"失败 {len(failed_indices)} 篇"
+    )
+    clean_abstracts(df)
     return df, failed_indices
 
 
 def save_results(df, failed_indices, clean_csv):
     """保存结果到CSV文件"""
     # 统一清理摘要
-    df["Abstract"] = df["Abstract"].apply(clean_abstract)
+    clean_abstracts(df)
 
     # 创建清洗文件（删除失败记录、国家为None，并重置序列号）
     clean_df = df.drop(index=failed_indices)
-    clean_df = clean_df[clean_df["Country"] != "None"]
+    no_address = (
+        df["Country"] == "None"
+        if "Country" in df.columns
+        else pd.Series(False, index=df.index)
+    )
+    clean_df = clean_df[~no_address.loc[clean_df.index]]
     clean_df = clean_df.reset_index(drop=True)
     clean_df["Sequence Number"] = range(1, len(clean_df) + 1)
 
     # 新增abandon文件
     abandon_csv = clean_csv.replace("clean", "abandon")
-    abandon_df = df[df.index.isin(failed_indices) | (df["Country"] == "None")]
+    abandon_df = df[df.index.isin(failed_indices) | no_address]
     abandon_df.to_csv(abandon_csv, index=False)
 
     clean_df.to_csv(clean_csv, index=False)
@@ -209,61 +1052,325 @@ def save_results(df, failed_indices, clean_csv):
     logging.info(f"舍弃记录已保存: {abandon_csv}")
 
 
-def main_run_all():
+def combine_publications(frames):
+    """合并多位作者的出版物并去重（DOI 相同或归一化标题相同视为同一篇）
+
+    frames 为 [DataFrame, ...]，返回 (合并的 DataFrame, [{作者行索引: 合并行索引}, ...])，
+    合并行保留首次出现的那一行，Requested Authors 列为拥有该文章的作者序号。
+    """
+    rows, owners, mappings = [], [], []
+    by_doi, by_title = {}, {}
+    for position, df in enumerate(frames):
+        mapping = {}
+        for index, row in df.iterrows():
+            doi = normalize_doi(row.get("DOI"))
+            title_key = normalize_title(row["Title"])
+            combined_index = by_doi.get(doi) if doi else None
+            if combined_index is None:
+                combined_index = by_title.get(title_key)
+            if combined_index is None:
+                combined_index = len(rows)
+                rows.append(row.drop(labels=["Sequence Number"], errors="ignore"))
+                owners.append([])
+            if doi:
+                by_doi.setdefault(doi, combined_index)
+            by_title.setdefault(title_key, combined_index)
+            if position not in owners[combined_index]:
+                owners[combined_index].append(position)
+            mapping[index] = combined_index
+        mappings.append(mapping)
+    combined = pd.DataFrame(rows).reset_index(drop=True)
+    combined.insert(0, "Sequence Number", range(1, len(combined) + 1))
+    combined["Requested Authors"] = [
+        "; ".join(str(position + 1) for position in positions) for positions in owners
+    ]
+    return combined, mappings
+
+
+def fan_out(combined, failed_indices, df, mapping, last_name, target_columns):
+    """把合并工作表的结果分发回某位作者的 DataFrame，地址列取该作者自己的列
+
+    返回 (df, 失败行索引列表)。
+    """
+    failed = set(failed_indices)
+    own_columns = dict(zip(FIELD_COLUMNS["author_address"], author_columns(last_name)))
+    author_failed = []
+    for index, combined_index in mapping.items():
+        for col in target_columns:
+            value = combined.at[combined_index, own_columns.get(col, col)]
+            df.at[index, col] = (
+                "" if pd.isna(value) and col != "Impact Factor" else value
+            )
+        if combined_index in failed:
+            author_failed.append(index)
+    return df, author_failed
+
+
+def main_run_authors(authors=None):
+    """多作者批量运行：合并去重后每篇文章只检索一次 WOS，再分发回各作者的 all/clean/abandon CSV
+
+    authors 为 [(作者名称, 姓氏), ...]（默认 BATCH_AUTHORS），所有作者的地址在同一次详情页加载中解析。
+    """
+    global LAST_NAME
     start_time = time.time()  # 开始时间戳
-    logging.info("程序启动")
-    # 获取当前时间并格式化输出
-    current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    print(f"Program started at: {current_time}")
+    logging.info("程序启动（多作者批量）")
+    authors = [
+        (name, last_name or name.split()[-1])
+        for name, last_name in (authors or BATCH_AUTHORS)
+    ]
+    last_names = list(dict.fromkeys(last_name for _, last_name in authors))
+    configured_last_name = LAST_NAME
+    LAST_NAME = last_names[0]
 
     try:
-        # 第一步：通过Scholarly获取基础信息
-        """通过全局变量AUTHOR_NAME获取数据"""
+        # 第一步：逐位作者获取谷歌学术出版物（各自的 original CSV 和进度日志）
+        frames, requested = [], []
+        for name, last_name in authors:
+            original_csv = get_author_publications(name)
+            if not original_csv:
+                logging.error(f"无法获取作者出版物信息: {name}")
+                continue
+            df = pd.read_csv(original_csv)
+            if "Sequence Number" not in df.columns:
+                df.insert(0, "Sequence Number", range(1, len(df) + 1))
+            frames.append(initialize_columns(df, TARGET_COLUMNS))
+            requested.append((name, last_name))
+        if not frames:
+            return
+
+        # 第二步：合并去重，每篇文章只检索一次
+        combined, mappings = combine_publications(frames)
+        target_columns = TARGET_COLUMNS + [
+            col for last_name in last_names for col in author_columns(last_name)
+        ]
+        combined = initialize_columns(combined, target_columns)
+        total = sum(len(df) for df in frames)
+        logging.info(
+            f"{len(frames)} 位作者共 {total} 篇，去重后 {len(combined)} 篇"
+            f"（省去 {total - len(combined)} 次检索）"
+        )
+        batch_csv = f"{BATCH_NAME}_publications_all.csv"
+        start_timing(batch_csv)
+
+        scraper = None
+        if POOL_WORKERS <= 1:
+            scraper = create_scraper(last_names)
+            scraper.init_driver()
+        cache = open_result_cache()
+
+        # 第三步：检索合并工作表，再分发回各作者
+        try:
+            if scraper is None:
+                combined, failed_indices = process_publications_parallel(
+                    combined,
+                    target_columns,
+                    batch_csv,
+                    workers=POOL_WORKERS,
+                    scraper_factory=lambda: create_scraper(last_names),
+                    cache=cache,
+                )
+            else:
+                combined, failed_indices = process_publications(
+                    combined, scraper, target_columns, batch_csv, cache=cache
+                )
+            save_progress(combined, batch_csv)
+            for (name, last_name), df, mapping in zip(requested, frames, mappings):
+                df, author_failed = fan_out(
+                    combined, failed_indices, df, mapping, last_name, TARGET_COLUMNS
+                )
+                prefix = name.replace(" ", "_")
+                save_progress(df, f"{prefix}_publications_all.csv")
+                save_results(df, author_failed, f"{prefix}_publications_clean.csv")
+        finally:
+            if scraper is not None:
+                close_scraper(scraper)
+            log_path_stats()
+            log_overlay_stats()
+            finish_timing()
+            if cache is not None:
+                logging.info(f"结果缓存命中 {cache.hits} 篇")
+                cache.close()
+
+    finally:
+        LAST_NAME = configured_last_name
+        total_seconds = time.time() - start_time
+        logging.info(f"总运行时间: {total_seconds:.1f} 秒")
+        print(f"总运行时间: {total_seconds:.1f} 秒")
+
+
+def main_refresh_author():
+    """增量刷新：谷歌学术只补全新出现的文章，WOS 只检索新增的行，结果并入现有的 all/clean/abandon CSV"""
+    start_time = time.time()  # 开始时间戳
+    logging.info("程序启动（增量刷新）")
+
+    try:
+        # 第一步：按 original CSV 的进度日志只补全新增条目（新增的行追加在末尾）
         original_csv = get_author_publications_csv()
         if not original_csv:
             return
-
-        # 第二步：读取CSV（只读），添加序列号列 ，初始化列
         df = pd.read_csv(original_csv)
         if "Sequence Number" not in df.columns:
             df.insert(0, "Sequence Number", range(1, len(df) + 1))
         df = initialize_columns(df, TARGET_COLUMNS)
 
+        all_csv = f"{AUTHOR_NAME.replace(' ', '_')}_publications_all.csv"
+        clean_csv = f"{AUTHOR_NAME.replace(' ', '_')}_publications_clean.csv"
+        start_timing(all_csv)
+
+        # 第二步：已完成的行来自进度日志，旧运行没有日志时按标题沿用 all CSV 的结果
+        journal = ProgressJournal(journal_path(all_csv))
+        records = journal.load()
+        completed = apply_journal_records(df, records, TARGET_COLUMNS)
+        old_failed = {
+            index
+            for index, record in records.items()
+            if record["failed"]
+            and index in df.index
+            and df.at[index, "Title"] == record["title"]
+        } - completed
+        rest = [i for i in df.index if i not in completed and i not in old_failed]
+        adopted, adopted_failed = adopt_previous_results(
+            df, all_csv, TARGET_COLUMNS, rest, infer_failed=not records
+        )
+        for index in sorted(adopted):
+            # 沿用的结果写进进度日志，下次刷新直接按日志判断
+            details = {col: df.at[index, col] for col in TARGET_COLUMNS}
+            journal.append(index, df.at[index, "Title"], details)
+        journal.close()
+        old_failed |= adopted_failed
+        skipped = set() if REFRESH_RETRY_FAILED else old_failed
+        todo = [
+            index
+            for index in df.index
+            if index not in completed and index not in adopted and index not in skipped
+        ]
+        logging.info(
+            f"共 {len(df)} 篇：沿用 {len(completed) + len(adopted)} 篇，"
+            f"以前失败 {len(old_failed)} 篇"
+            f"{'（重试）' if REFRESH_RETRY_FAILED else '（不重试）'}，"
+            f"待检索 {len(todo)} 篇"
+        )
+
+        # 第三步：只检索新增的行，再整体写出 all/clean/abandon
+        failed_indices = sorted(skipped)
+        scraper, cache = None, None
+        try:
+            if todo:
+                scraper = create_scraper()
+                scraper.init_driver()
+                cache = open_result_cache()
+                df, failed = process_publications(
+                    df, scraper, TARGET_COLUMNS, all_csv, cache=cache, indices=todo
+                )
+                failed_indices += failed
+            save_progress(df, all_csv)
+            save_results(df, failed_indices, clean_csv)
+        finally:
+            if scraper is not None:
+                close_scraper(scraper)
+            log_path_stats()
+            finish_timing()
+            if cache is not None:
+                cache.close()
+
+    finally:
+        total_seconds = time.time() - start_time
+        logging.info(f"总运行时间: {total_seconds:.1f} 秒")
+        print(f"总运行时间: {total_seconds:.1f} 秒")
+
+
+def main_run_all():
+    start_time = time.time()  # 开始时间戳
+    logging.info("程序启动")
+    # 获取当前时间并格式化输出
+    current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"Program started at: {current_time}")
+
+    try:
         # 创建新文件路径
         all_csv = f"{AUTHOR_NAME.replace(' ', '_')}_publications_all.csv"
         clean_csv = f"{AUTHOR_NAME.replace(' ', '_')}_publications_clean.csv"
         abandon_csv = f"{AUTHOR_NAME.replace(' ', '_')}_publications_abandon.csv"
 
-        # 断点检测
-        start_index = find_start_index(df, TARGET_COLUMNS)
-        if start_index == 0:
-            logging.info("无断点，从第一篇开始处理")
-        else:
-            logging.info(f"共有 {len(df)} 篇待处理，从第 {start_index+1} 篇开始")
+        # 流水线模式：Scholar 每补全一篇就交给 WOS 检索，两个阶段各自记录进度
+        streaming = STREAM_PIPELINE and POOL_WORKERS <= 1
+        df = None
+        if not streaming:
+            # 第一步：通过Scholarly获取基础信息
+            """通过全局变量AUTHOR_NAME获取数据"""
+            original_csv = get_author_publications_csv()
+            if not original_csv:
+                return
 
-        # 初始化爬虫
-        scraper = WOSArticleScraper()
-        scraper.init_driver()
+            # 第二步：读取CSV（只读），添加序列号列 ，初始化列
+            df = pd.read_csv(original_csv)
+            if "Sequence Number" not in df.columns:
+                df.insert(0, "Sequence Number", range(1, len(df) + 1))
+            df = initialize_columns(df, TARGET_COLUMNS)
+
+            # 断点检测
+            start_index = find_start_index(df, TARGET_COLUMNS)
+            if start_index == 0:
+                logging.info("无断点，从第一篇开始处理")
+            else:
+                logging.info(f"共有 {len(df)} 篇待处理，从第 {start_index+1} 篇开始")
+
+        start_timing(all_csv)
+
+        # 初始化爬虫（并行池模式下由各 worker 自行启动浏览器）
+        scraper = None
+        if POOL_WORKERS <= 1:
+            scraper = create_scraper()
+            scraper.init_driver()
+
+        cache = open_result_cache()
+        chunks = None
 
         # 第三步：处理数据并保存到新文件
         try:
-            df, failed_indices = process_publications(
-                df, scraper, TARGET_COLUMNS, all_csv
-            )
+            if streaming:
+                chunks = stream_publications(AUTHOR_NAME, BATCH_SEARCH_SIZE)
+                df, failed_indices = process_stream(
+                    chunks,
+                    scraper,
+                    TARGET_COLUMNS,
+                    all_csv,
+                    cache=cache,
+                )
+            elif scraper is None:
+                df, failed_indices = process_publications_parallel(
+                    df, TARGET_COLUMNS, all_csv, workers=POOL_WORKERS, cache=cache
+                )
+            else:
+                df, failed_indices = process_publications(
+                    df, scraper, TARGET_COLUMNS, all_csv, cache=cache
+                )
             save_progress(df, all_csv)  # 最终保存
             save_results(df, failed_indices, clean_csv)
             # 打开文件
             os.startfile(all_csv)
             os.startfile(clean_csv)
             os.startfile(abandon_csv)
+        except AuthorNotFound as e:
+            logging.error(f"无法获取作者出版物信息: {str(e)}")
         except Exception as e:
             logging.error(f"致命错误: {str(e)}")
-            save_progress(df, all_csv)  # 异常时紧急保存
+            if df is not None:
+                save_progress(
+                    df, all_csv
+                )  # 异常时紧急保存（流水线模式的进度在进度日志中）
             raise
         finally:
-            scraper.driver.delete_all_cookies()
-            time.sleep(1)
-            scraper.close()
+            if chunks is not None:
+                chunks.close()  # 通知 Scholar 阶段停止
+            if scraper is not None:
+                close_scraper(scraper)
+            log_path_stats()
+            log_overlay_stats()
+            finish_timing()
+            if cache is not None:
+                logging.info(f"结果缓存命中 {cache.hits} 篇")
+                cache.close()
 
     finally:  # 外层finally块  # 计算运行时间
         end_time = time.time()
@@ -321,6 +1428,8 @@ def main_start_by_csv():
         clean_csv = f"{AUTHOR_NAME.replace(' ', '_')}_publications_clean.csv"
         abandon_csv = f"{AUTHOR_NAME.replace(' ', '_')}_publications_abandon.csv"
 
+        start_timing(all_csv)
+
         # 断点检测
         start_index = find_start_index(df, TARGET_COLUMNS)
         if start_index == 0:
@@ -328,15 +1437,24 @@ def main_start_by_csv():
         else:
             logging.info(f"共有 {len(df)} 篇待处理，从第 {start_index+1} 篇开始")
 
-        # 初始化爬虫
-        scraper = WOSArticleScraper()
-        scraper.init_driver()
+        # 初始化爬虫（并行池模式下由各 worker 自行启动浏览器）
+        scraper = None
+        if POOL_WORKERS <= 1:
+            scraper = create_scraper()
+            scraper.init_driver()
+
+        cache = open_result_cache()
 
         # 第三步：处理数据并保存到新文件
         try:
-            df, failed_indices = process_publications(
-                df, scraper, TARGET_COLUMNS, all_csv
-            )
+            if scraper is None:
+                df, failed_indices = process_publications_parallel(
+                    df, TARGET_COLUMNS, all_csv, workers=POOL_WORKERS, cache=cache
+                )
+            else:
+                df, failed_indices = process_publications(
+                    df, scraper, TARGET_COLUMNS, all_csv, cache=cache
+                )
             save_progress(df, all_csv)  # 最终保存
             save_results(df, failed_indices, clean_csv)
             # 打开文件
@@ -348,9 +1466,14 @@ def main_start_by_csv():
             save_progress(df, all_csv)  # 异常时紧急保存
             raise
         finally:
-            scraper.driver.delete_all_cookies()
-            time.sleep(1)
-            scraper.close()
+            if scraper is not None:
+                close_scraper(scraper)
+            log_path_stats()
+            log_overlay_stats()
+            finish_timing()
+            if cache is not None:
+                logging.info(f"结果缓存命中 {cache.hits} 篇")
+                cache.close()
 
     finally:  # 外层finally块  # 计算运行时间
         end_time = time.time()
@@ -362,14 +1485,114 @@ def main_start_by_csv():
         print(f"总运行时间: {time_str}")
 
 
+def main_start_by_export():
+    """导出模式：先用 WOS 导出文件批量回填，对应不上的行再逐篇爬取"""
+    start_time = time.time()  # 开始时间戳
+    logging.info("程序启动（导出模式）")
+
+    try:
+        original_csv = f"{AUTHOR_NAME.replace(' ', '_')}_publications_original.csv"
+        all_csv = f"{AUTHOR_NAME.replace(' ', '_')}_publications_all.csv"
+        clean_csv = f"{AUTHOR_NAME.replace(' ', '_')}_publications_clean.csv"
+
+        df = pd.read_csv(original_csv)
+        if "Sequence Number" not in df.columns:
+            df.insert(0, "Sequence Number", range(1, len(df) + 1))
+        df = initialize_columns(df, TARGET_COLUMNS)
+        start_timing(all_csv)
+
+        scraper = create_scraper()
+        scraper.download_dir = EXPORT_DIR
+        scraper.init_driver()
+        cache = open_result_cache()
+        limiter = create_limiter()
+        try:
+            filled = ingest_exports(
+                df, scraper, TARGET_COLUMNS, all_csv, cache, limiter
+            )
+            logging.info(f"导出文件回填 {len(filled)} 篇，其余逐篇处理")
+            df, failed_indices = process_publications(
+                df, scraper, TARGET_COLUMNS, all_csv, cache=cache, limiter=limiter
+            )
+            save_progress(df, all_csv)
+            save_results(df, failed_indices, clean_csv)
+        finally:
+            close_scraper(scraper)
+            log_path_stats()
+            log_overlay_stats()
+            finish_timing()
+            if cache is not None:
+                cache.close()
+
+    finally:
+        total_seconds = time.time() - start_time
+        logging.info(f"总运行时间: {total_seconds:.1f} 秒")
+        print(f"总运行时间: {total_seconds:.1f} 秒")
+
+
+def main_reextract_from_archive():
+    start_time = time.time()  # 开始时间戳
+    logging.info("程序启动（离线重新解析）")
+
+    try:
+        # 读取 all CSV，用存档页面重新解析，不访问 WOS
+        all_csv = f"{AUTHOR_NAME.replace(' ', '_')}_publications_all.csv"
+        clean_csv = f"{AUTHOR_NAME.replace(' ', '_')}_publications_clean.csv"
+
+        df = pd.read_csv(all_csv)
+        df = initialize_columns(df, TARGET_COLUMNS)
+        start_timing(all_csv)
+        try:
+            df, failed_indices = reextract_from_archive(
+                df, TARGET_COLUMNS, PageArchive(PAGE_ARCHIVE_DIR)
+            )
+            save_progress(df, all_csv)
+            save_results(df, failed_indices, clean_csv)
+        finally:
+            finish_timing()
+
+    finally:
+        total_seconds = time.time() - start_time
+        logging.info(f"总运行时间: {total_seconds:.1f} 秒")
+        print(f"总运行时间: {total_seconds:.1f} 秒")
+
+
+def main_export_progress():
+    """按需导出：把进度日志合并到 original CSV，写出当前的 all CSV（不访问 WOS）"""
+    original_csv = f"{AUTHOR_NAME.replace(' ', '_')}_publications_original.csv"
+    all_csv = f"{AUTHOR_NAME.replace(' ', '_')}_publications_all.csv"
+
+    df = pd.read_csv(original_csv)
+    if "Sequence Number" not in df.columns:
+        df.insert(0, "Sequence Number", range(1, len(df) + 1))
+    df = initialize_columns(df, TARGET_COLUMNS)
+    df, completed = materialize_progress(df, TARGET_COLUMNS, all_csv)
+    print(f"已导出 {len(completed)}/{len(df)} 篇已完成记录到 {all_csv}")
+
+
 if __name__ == "__main__":
     # 从scholarly到WOS全部走一遍
     # main_run_all()
 
+    # 多作者批量：BATCH_AUTHORS 中的作者合并去重后一起检索 WOS，再分发回各作者的 CSV
+    # main_run_authors()
+
+    # 增量刷新：只补全、检索作者新增的文章，结果并入现有的 all/clean/abandon CSV
+    # main_refresh_author()
+
     # 只用scholarly，输出original的CSV文件
     # main_scholarly_only()
 
     # 输入CSV，用WOS收集详细信息。注意输入的是all（断点续传）还是original（从零开始）
     # main_start_by_csv()
 
+    # 导出模式：用 WOS 导出文件批量回填（不含影响因子），其余行逐篇爬取
+    # main_start_by_export()
+
+    # 用存档的详情页离线重新解析（修改解析逻辑后使用，不访问 WOS）
+    # main_reextract_from_archive()
+
+    # 运行中途查看进度：把进度日志导出成 all CSV
+    # main_export_progress()
+
     pass
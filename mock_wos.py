@@ -0,0 +1,377 @@
+"""本地模拟 WOS 站点：页面结构与 WOSArticleScraper 使用的选择器一致，用于离线测速"""
+
+import html
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+
+from record_parser import address_numbers, normalize_title
+
+COOKIE_BANNER = """<div id="onetrust-group-container">
+  <button id="onetrust-accept-btn-handler"
+    onclick="document.getElementById('onetrust-group-container').style.display='none'">Accept</button>
+</div>
+"""
+
+SEARCH_PAGE = (
+    """<html><head><title>Basic Search</title></head><body>
+"""
+    + COOKIE_BANNER
+    + """<input id="search-option" type="text" value="">
+<button data-ta="run-search" onclick="location.href='/wos/alldb/summary?q='
+  + encodeURIComponent(document.getElementById('search-option').value)">Search</button>
+</body></html>"""
+)
+
+ADVANCED_SEARCH_PAGE = """<html><head><title>Advanced Search</title></head><body>
+<textarea id="advancedSearchInputArea"></textarea>
+<button data-ta="run-search" onclick="location.href='/wos/alldb/summary?q='
+  + encodeURIComponent(document.getElementById('advancedSearchInputArea').value)">Search</button>
+</body></html>"""
+
+SUMMARY_PAGE = """<html><head><title>Results</title></head><body>
+<span class="brand-blue">{count}</span>
+<button id="export-trigger-btn"
+  onclick="document.getElementById('export-menu').style.display='block'">Export</button>
+<div id="export-menu" style="display:none">
+  <button id="exportToTabWinButton"
+    onclick="document.getElementById('export-dialog').style.display='block'">Tab delimited file</button>
+</div>
+<div id="export-dialog" style="display:none">
+  <button id="exportButton" onclick="location.href='/wos/alldb/export?q={query}'">Export</button>
+</div>
+{links}
+</body></html>"""
+
+# 每个页面都引用的静态资源（图片、字体、统计脚本），用于测量网络层拦截的效果
+ASSETS = """<img src="/static/banner.png" width="600" height="80">
+<style>@font-face {font-family: MockSans; src: url(/static/mocksans.woff2);}
+body {font-family: MockSans;}</style>
+<script src="/static/analytics.js"></script>
+"""
+# 延迟出现的 Pendo 式引导弹窗
+PENDO_GUIDE = """<div id="pendo-guide-container" style="display:none; position:fixed; inset:0">
+  <button id="pendo-close-guide-mock"
+    onclick="document.getElementById('pendo-guide-container').remove()">x</button>
+</div>
+<script>setTimeout(function () {
+  var guide = document.getElementById('pendo-guide-container');
+  if (guide) { guide.style.display = 'block'; }
+}, 300);</script>
+"""
+# 静态资源：(Content-Type, 字节数)
+STATIC_FILES = {
+    "banner.png": ("image/png", 150_000),
+    "mocksans.woff2": ("font/woff2", 80_000),
+    "analytics.js": ("application/javascript", 60_000),
+}
+
+# 制表符分隔导出的字段（与 WOS 导出文件的列顺序一致的子集）
+EXPORT_TAGS = ("PT", "AU", "TI", "SO", "DE", "ID", "AB", "C1", "PY", "DI", "UT")
+
+RECORD_PAGE = """<html><head><title>Full Record</title></head><body>
+<h2 class="title">{title}</h2>
+<span class="cdx-grid-data">{authors}</span>
+<span onclick="this.style.display='none'">More</span>
+<button id="FRACTa-authorAddressView">Show addresses</button>
+{fields}
+</body></html>"""
+
+# 可以缺失的字段：缺失时详情页不渲染对应元素，导出文件中为空
+MISSING_FIELDS = (
+    "doi",
+    "abstract",
+    "keywords",
+    "keywords_plus",
+    "impact_factor",
+    "addresses",
+)
+# 与真实文章同时被检索到的干扰条目（评论、补充材料会被排除，勘误标题相似度高）
+DECOY_TITLES = (
+    "Erratum: {title}",
+    "Comment on: {title}",
+    "{title}: Supplementary Information",
+)
+
+
+def make_records(
+    n_records=20, last_name="Nori", missing_rate=0.0, multi_rate=0.0, seed=0
+):
+    """生成 n 篇模拟文章
+
+    missing_rate 为缺失一个字段的文章比例；multi_rate 为带干扰条目的文章比例，
+    干扰条目排在真实文章之前、带 "decoy" 标记，检索时形成多结果。
+    """
+    rng = random.Random(seed)
+    records = []
+    for i in range(1, n_records + 1):
+        record = {
+            "id": f"WOS:{i:09d}",
+            "title": f"Mock study number {i} of quantum transport in coupled systems",
+            "authors": ["Smith, John [1]", f"{last_name}, Franco [2]"],
+            "addresses": [
+                "1 Univ Tokyo, Dept Phys, Tokyo, Japan",
+                "2 RIKEN, Theoret Quantum Phys Lab, Wako, Saitama, Japan",
+            ],
+            "doi": f"10.1000/mock.{i}",
+            "year": 2010 + i % 15,
+            "journal": "Physical Review B",
+            "abstract": f"Abstract of mock record {i}.",
+            "keywords": ["quantum transport", f"topic {i}"],
+            "keywords_plus": ["SYSTEMS", "DYNAMICS"],
+            "impact_factor": "5.2",
+        }
+        if i % 3 == 0:
+            # 每三篇有一篇的目标作者有两个地址
+            record["authors"][1] = f"{last_name}, Franco [2,3]"
+            record["addresses"] = record["addresses"] + [
+                "3 Univ Michigan, Dept Phys, Ann Arbor, USA"
+            ]
+        if rng.random() < missing_rate:
+            field = rng.choice(MISSING_FIELDS)
+            record[field] = [] if isinstance(record[field], list) else None
+        if rng.random() < multi_rate:
+            for j, template in enumerate(DECOY_TITLES, 1):
+                decoy = dict(record, id=f"WOS:{i:09d}-{j}", decoy=True)
+                decoy["title"] = template.format(title=record["title"])
+                decoy["doi"] = f"10.1000/mock.{i}.d{j}"
+                records.append(decoy)
+        records.append(record)
+    return records
+
+
+class MockWOSServer:
+    """在后台线程运行的模拟 WOS 站点"""
+
+    def __init__(
+        self,
+        records=None,
+        host="127.0.0.1",
+        port=0,
+        asset_delay=0.0,
+        latency=0.0,
+        popups=True,
+    ):
+        self.records = records if records is not None else make_records()
+        self.asset_delay = asset_delay  # 每个静态资源的响应延迟（秒）
+        self.latency = latency  # 每个 HTML 页面的响应延迟（秒）
+        self.popups = popups  # 是否显示 Cookie 横幅和引导弹窗
+        self.host = host
+        self.port = port
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self._httpd.server_address[1]}"
+
+    def find(self, query):
+        """按标题子串（忽略大小写）检索
+
+        TI=("...") OR ... 形式按各短语合并检索，DO=("...") 按 DOI 检索。
+        """
+        dois = [d.lower() for d in re.findall(r'DO=\("([^"]*)"\)', query)]
+        if dois:
+            return [r for r in self.records if (r["doi"] or "").lower() in dois]
+        phrases = re.findall(r'TI=\("([^"]*)"\)', query)
+        if phrases:
+            keys = [normalize_title(p) for p in phrases if p.strip()]
+            return [
+                r
+                for r in self.records
+                if any(key in normalize_title(r["title"]) for key in keys)
+            ]
+        query = query.lower().strip()
+        return [r for r in self.records if query and query in r["title"].lower()]
+
+    def get(self, record_id):
+        for record in self.records:
+            if record["id"] == record_id:
+                return record
+        return None
+
+    def render_summary(self, query):
+        hits = self.find(query)
+        links = "\n".join(
+            f'<div class="summary-record"><a data-ta="summary-record-title-link" '
+            f'href="/wos/alldb/full-record/{r["id"]}">{html.escape(r["title"])}</a>'
+            f'<span>{html.escape(r.get("journal", ""))} {r.get("year", "")}</span>'
+            f'<span>DOI {html.escape(r["doi"] or "")}</span></div>'
+            for r in hits
+        )
+        return SUMMARY_PAGE.format(
+            count=len(hits), links=links, query=html.escape(quote(query))
+        )
+
+    def render_export(self, query, fmt="tab"):
+        """检索结果的导出文件（带 BOM 的 UTF-8，与 WOS 导出文件一致）
+
+        fmt 为 tab（制表符分隔）或 plain（纯文本，多值字段每项一行）。
+        """
+        lines = ["\t".join(EXPORT_TAGS)] if fmt == "tab" else ["FN Mock WOS", "VR 1.0"]
+        for r in self.find(query):
+            names = [a.rsplit(" [", 1)[0] for a in r["authors"]]
+            # 地址前的编号换成 [作者] 形式
+            addresses = []
+            for i, address in enumerate(r["addresses"], 1):
+                owners = [
+                    n
+                    for n, a in zip(names, r["authors"])
+                    if str(i) in address_numbers(a)
+                ]
+                addresses.append(f"[{'; '.join(owners)}] {address.split(' ', 1)[1]}")
+            values = {
+                "PT": "J",
+                "AU": "; ".join(names),
+                "TI": r["title"],
+                "SO": r.get("journal", "").upper(),
+                "DE": "; ".join(r["keywords"]),
+                "ID": "; ".join(r["keywords_plus"]),
+                "AB": r["abstract"] or "",
+                "C1": "; ".join(addresses),
+                "PY": str(r.get("year", "")),
+                "DI": r["doi"] or "",
+                "UT": r["id"],
+            }
+            if fmt == "tab":
+                lines.append("\t".join(values[tag] for tag in EXPORT_TAGS))
+                continue
+            for tag in EXPORT_TAGS:
+                items = (
+                    values[tag].split("; ") if tag in ("AU", "C1") else [values[tag]]
+                )
+                lines.append(f"{tag} {items[0]}")
+                lines.extend(f"   {item}" for item in items[1:])
+            lines.extend(["ER", ""])
+        if fmt != "tab":
+            lines.append("EF")
+        return "\ufeff" + "\r\n".join(lines) + "\r\n"
+
+    def render_record(self, record):
+        """详情页：缺失的字段不渲染对应元素"""
+        authors = "\n".join(
+            f'<span class="value ng-star-inserted" id="author-{i}">{html.escape(a)}</span>'
+            for i, a in enumerate(record["authors"], 1)
+        )
+        addresses = "\n".join(
+            f'<span id="address_{i}">{html.escape(a)}</span>'
+            for i, a in enumerate(record["addresses"], 1)
+        )
+        keywords = "\n".join(
+            f'<a id="FRkeywordsTa-authorKeywordLink-{i}">{html.escape(k)}</a>'
+            for i, k in enumerate(record["keywords"])
+        )
+        keywords_plus = "\n".join(
+            f'<a id="FRkeywordsTa-keyWordsPlusLink-{i}">{html.escape(k)}</a>'
+            for i, k in enumerate(record["keywords_plus"])
+        )
+        fields = [addresses]
+        if record["doi"]:
+            fields.append(
+                f'<span data-ta="FullRTa-DOI">{html.escape(record["doi"])}</span>'
+            )
+        if record["abstract"]:
+            fields.append(
+                f'<div data-ta="FullRTa-abstract-basic">'
+                f'{html.escape(record["abstract"])}</div>'
+            )
+        if keywords:
+            fields.append(
+                '<h3 id="FRkeywordsTa-authorKeywordsLabel">Author Keywords</h3>'
+            )
+            fields.append(keywords)
+        if keywords_plus:
+            fields.append('<h3 id="FRkeywordsTa-keyWordsPlusLabel">Keywords Plus</h3>')
+            fields.append(keywords_plus)
+        if record["impact_factor"]:
+            fields.append(
+                f'<span class="font-size-26">{record["impact_factor"]}</span>'
+            )
+        return RECORD_PAGE.format(
+            title=html.escape(record["title"]),
+            authors=authors,
+            fields="\n".join(fields),
+        )
+
+    def start(self):
+        """启动服务并返回站点地址"""
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path.endswith("/basic-search"):
+                    body = SEARCH_PAGE
+                elif url.path.endswith("/advanced-search"):
+                    body = ADVANCED_SEARCH_PAGE
+                elif url.path.endswith("/summary"):
+                    query = parse_qs(url.query).get("q", [""])[0]
+                    body = server.render_summary(query)
+                elif url.path.endswith("/general-summary"):
+                    # 按地址检索：queryJson 为 [{"rowField": "TI", "rowText": 标题}, ...]
+                    rows = json.loads(parse_qs(url.query).get("queryJson", ["[]"])[0])
+                    body = server.render_summary(rows[0]["rowText"] if rows else "")
+                elif url.path.startswith("/static/"):
+                    name = url.path.rsplit("/", 1)[-1]
+                    if name not in STATIC_FILES:
+                        self.send_error(404)
+                        return
+                    content_type, size = STATIC_FILES[name]
+                    time.sleep(server.asset_delay)
+                    data = b"/" * size if name.endswith(".js") else b"\0" * size
+                    self.send_response(200)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                    return
+                elif url.path.endswith("/export"):
+                    query = parse_qs(url.query).get("q", [""])[0]
+                    data = server.render_export(query).encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; charset=utf-8")
+                    self.send_header(
+                        "Content-Disposition", 'attachment; filename="savedrecs.txt"'
+                    )
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                    return
+                elif "/full-record/" in url.path:
+                    record = server.get(url.path.rsplit("/", 1)[-1])
+                    if record is None:
+                        self.send_error(404)
+                        return
+                    body = server.render_record(record)
+                else:
+                    self.send_error(404)
+                    return
+                time.sleep(server.latency)
+                if server.popups:
+                    body = body.replace("</body>", PENDO_GUIDE + "</body>")
+                else:
+                    body = body.replace(COOKIE_BANNER, "")
+                data = body.replace("</body>", ASSETS + "</body>").encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass  # 静默访问日志
+
+        self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
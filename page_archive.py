@@ -0,0 +1,39 @@
+"""详情页存档：按输入标题保存 gzip 压缩的页面 HTML，供离线重新解析"""
+
+import gzip
+import hashlib
+import os
+import threading
+
+from record_parser import normalize_title
+
+
+class PageArchive:
+    """以目录形式存放的压缩页面存档（一个标题一个 .html.gz 文件）"""
+
+    def __init__(self, directory="wos_pages"):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, title):
+        key = hashlib.sha1(normalize_title(title).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{key}.html.gz")
+
+    def save(self, title, html):
+        """保存页面（先写临时文件再替换，避免中断时留下半个文件）"""
+        path = self._path(title)
+        temp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(temp_file, "wt", encoding="utf-8") as f:
+            f.write(html)
+        os.replace(temp_file, path)
+
+    def load(self, title):
+        """读取页面，没有存档时返回 None"""
+        path = self._path(title)
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return f.read()
+
+    def __contains__(self, title):
+        return os.path.exists(self._path(title))
@@ -0,0 +1,67 @@
+"""追加式进度日志：每完成一行写一条 JSON 记录并 fsync，断点续传时据此重建已完成集合"""
+
+import json
+import math
+import os
+import threading
+import time
+
+
+def journal_path(csv_path):
+    """all CSV 对应的日志文件路径"""
+    return os.path.splitext(csv_path)[0] + ".journal.jsonl"
+
+
+def _clean_value(value):
+    """NaN 写成 null，numpy 标量转成 Python 值，保证每行都是标准 JSON"""
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+class ProgressJournal:
+    """一行一条记录：{"index", "title", "failed", "details", "finished_at"}，后写入的覆盖先写入的"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def append(self, index, title, details, failed=False):
+        """追加一条完成记录（写入后立即 fsync，代价与已完成行数无关）"""
+        record = {
+            "index": int(index),
+            "title": title,
+            "failed": bool(failed),
+            "details": {k: _clean_value(v) for k, v in details.items()},
+            "finished_at": time.time(),  # 完成时刻，基准测试据此计算单篇耗时
+        }
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def load(self):
+        """读取全部记录，返回 {行索引: 最后一条记录}；忽略中断时写了一半的末行"""
+        records = {}
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                records[record["index"]] = record
+        return records
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,126 @@
+import random
+import threading
+import time
+
+
+class RateLimiter:
+    """线程安全的全局限速器：所有线程共享同一个请求节奏"""
+
+    def __init__(self, delay_range=(1, 3)):
+        self.delay_range = delay_range  # 相邻两次请求的随机间隔范围（秒）
+        self._lock = threading.Lock()
+        self._next_time = 0.0  # 下一个可用的请求时刻（time.monotonic）
+
+    def wait(self):
+        """阻塞到本线程的请求时刻，返回实际等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_time)
+            self._next_time = slot + random.uniform(*self.delay_range)
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def pause(self, seconds):
+        """全局暂停：把所有线程的下一个请求时刻整体推后"""
+        with self._lock:
+            self._next_time = max(time.monotonic(), self._next_time) + seconds
+
+    def record(self, status, latency=None):
+        """固定节奏，忽略请求结果反馈"""
+
+
+class TokenBucket:
+    """线程安全的令牌桶：平均 rate 次/秒，最多允许 capacity 次突发"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def wait(self):
+        """取一个令牌（不足时阻塞等待），返回实际等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # 允许令牌为负：按排队顺序预约未来的令牌
+            self._tokens -= 1
+            delay = max(0.0, -self._tokens / self.rate)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def pause(self, seconds):
+        """全局暂停：扣掉 seconds 秒内会产生的令牌"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0) - seconds * self.rate
+
+    def record(self, status, latency=None):
+        """固定速率，忽略请求结果反馈"""
+
+
+class AdaptiveRateLimiter(TokenBucket):
+    """自适应令牌桶（AIMD）：请求顺利时加法提速，出现异常信号时乘法降速
+
+    status 取值：ok（正常）、mismatch（有结果但标题不符，站点正常）、empty（零结果）、
+    timeout（超时）、error（其他异常）、blocked（被封禁/验证页）。
+    """
+
+    def __init__(
+        self,
+        rate=0.4,
+        min_rate=0.02,
+        max_rate=1.0,
+        increase=0.02,
+        decrease=0.5,
+        slow_latency=10.0,
+        empty_streak=3,
+        block_pause=600,
+        capacity=1,
+    ):
+        super().__init__(rate, capacity)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase  # 每次顺利请求增加的速率（次/秒）
+        self.decrease = decrease  # 出现异常信号时速率乘以的系数
+        self.slow_latency = slow_latency  # 超过该耗时（秒）视为站点变慢
+        self.empty_streak = empty_streak  # 连续零结果达到该次数视为异常
+        self.block_pause = block_pause  # 遇到封禁页时全局暂停的秒数
+        self._empty_count = 0
+
+    def _set_rate(self, rate):
+        """调整速率（调用方持有锁）"""
+        self._refill(time.monotonic())
+        self.rate = min(self.max_rate, max(self.min_rate, rate))
+
+    def record(self, status, latency=None):
+        """根据一次请求的结果调整速率"""
+        with self._lock:
+            if status in ("ok", "mismatch"):
+                self._empty_count = 0
+                if latency is not None and latency > self.slow_latency:
+                    self._set_rate(self.rate * self.decrease)
+                else:
+                    self._set_rate(self.rate + self.increase)
+            elif status == "empty":
+                # 单次零结果很常见（文章不在 WOS），连续出现才降速
+                self._empty_count += 1
+                if self._empty_count >= self.empty_streak:
+                    self._empty_count = 0
+                    self._set_rate(self.rate * self.decrease)
+            elif status == "blocked":
+                self._set_rate(self.min_rate)
+            else:
+                self._set_rate(self.rate * self.decrease)
+        if status == "blocked":
+            self.pause(self.block_pause)
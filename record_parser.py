@@ -0,0 +1,377 @@
+"""详情页解析：从页面 HTML 快照中提取各字段（不依赖浏览器）"""
+
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+from bs4 import BeautifulSoup
+
+from stage_timer import TIMER, timed
+
+NO_ADDRESS = {"institution": "None", "country": "None", "affiliations": "None"}
+# 地址字典的键及对应的输出列：机构、国家取作者的第一个地址，affiliations 为全部地址
+ADDRESS_COLUMNS = {
+    "institution": "Institution",
+    "country": "Country",
+    "affiliations": "Affiliations",
+}
+# 结果列表中需要排除的条目（输入标题本身含有这些词时不排除）
+EXCLUDED_RESULT_WORDS = ("arXiv", "Comment", "Information", "Supplementary")
+DOI_PATTERN = re.compile(r"\b10\.\d{4,9}/[^\s\"<>]+")
+YEAR_PATTERN = re.compile(r"\b(?:19|20)\d{2}\b")
+TITLE_LINK = 'a[data-ta="summary-record-title-link"]'
+ADDRESS_NUMBER_PATTERN = re.compile(r"\[([\d\s,]+)\]")
+# 详情页字段及对应的输出列（标题总会提取，用于比对，不在此列）
+FIELD_COLUMNS = {
+    "impact_factor": ("Impact Factor",),
+    "keywords": ("Author Keywords",),
+    "keywordsplus": ("Keywords Plus",),
+    "author_address": tuple(ADDRESS_COLUMNS.values()),
+    "doi": ("DOI",),
+    "abstract": ("Abstract",),
+}
+
+
+def normalize_title(title):
+    """标题归一化：统一大小写和全半角，去掉标点，压缩空白"""
+    title = unicodedata.normalize("NFKC", str(title)).lower()
+    title = re.sub(r"[^\w\s]", " ", title)
+    return " ".join(title.split())
+
+
+def normalize_doi(doi):
+    """DOI 归一化：小写，去掉 doi.org 前缀；无效值返回 None"""
+    if not doi or not isinstance(doi, str):
+        return None
+    doi = doi.strip().lower()
+    for prefix in (
+        "https://doi.org/",
+        "http://doi.org/",
+        "https://dx.doi.org/",
+        "doi:",
+    ):
+        if doi.startswith(prefix):
+            doi = doi[len(prefix) :]
+    return doi if doi.startswith("10.") else None
+
+
+def is_title_match(original_title, scraped_title, threshold=0.8):
+    """标题相似度匹配（阈值可调）"""
+    original = original_title.lower().strip()
+    scraped = scraped_title.lower().strip()
+    return SequenceMatcher(None, original, scraped).ratio() >= threshold
+
+
+def title_similarity(original_title, candidate_title):
+    """归一化后的标题相似度（0~1）"""
+    return SequenceMatcher(
+        None, normalize_title(original_title), normalize_title(candidate_title)
+    ).ratio()
+
+
+def parse_candidate(candidate):
+    """从结果条目的文本中补充 DOI 和年份"""
+    text = candidate.get("text") or ""
+    doi = DOI_PATTERN.search(text)
+    year = YEAR_PATTERN.search(text)
+    candidate["doi"] = doi.group(0).rstrip(".,;") if doi else None
+    candidate["year"] = int(year.group(0)) if year else None
+    return candidate
+
+
+def rank_candidates(candidates, title, year=None, journal=None, threshold=0.8):
+    """给搜索结果打分排序，只保留标题能通过比对的候选
+
+    分数 = 标题相似度 + 年份相符（相差不超过1年）0.05 + 期刊名出现 0.05。
+    返回按分数降序的候选列表；为空说明没有候选能通过标题比对。
+    """
+    try:
+        year = int(float(year)) if year not in (None, "") else None
+    except (TypeError, ValueError):
+        year = None
+    journal_key = normalize_title(journal) if journal else ""
+
+    ranked = []
+    for candidate in candidates:
+        candidate = parse_candidate(dict(candidate))
+        candidate_title = candidate.get("title") or ""
+        if any(
+            word in candidate_title and word not in title
+            for word in EXCLUDED_RESULT_WORDS
+        ):
+            continue
+        if not is_title_match(title, candidate_title, threshold):
+            continue
+        score = title_similarity(title, candidate_title)
+        if year and candidate["year"] and abs(candidate["year"] - year) <= 1:
+            score += 0.05
+        if journal_key and journal_key in normalize_title(candidate.get("text", "")):
+            score += 0.05
+        candidate["score"] = score
+        ranked.append(candidate)
+    return sorted(ranked, key=lambda c: c["score"], reverse=True)
+
+
+def build_title_query(titles):
+    """多个标题拼成一条高级检索式：TI=("...") OR TI=("...")
+
+    标题先归一化（去掉引号、括号等检索式中的特殊字符），按短语检索。
+    """
+    phrases = [normalize_title(title) for title in titles]
+    return " OR ".join(f'TI=("{phrase}")' for phrase in phrases if phrase)
+
+
+@timed("parse_results")
+def parse_result_list_html(html):
+    """解析结果列表页快照，返回与 WOSArticleScraper.get_result_candidates 相同结构的候选列表"""
+    soup = BeautifulSoup(html, "html.parser")
+    candidates = []
+    for index, link in enumerate(soup.select(TITLE_LINK)):
+        box = link.find_parent(["app-record", "app-summary-record"]) or (
+            link.find_parent(class_="summary-record") or link.parent
+        )
+        candidates.append(
+            {
+                "index": index,
+                "title": element_text(link),
+                "href": link.get("href"),
+                "text": element_text(box),
+            }
+        )
+    return candidates
+
+
+def match_batch(candidates, rows, threshold=0.8):
+    """把合并检索的结果对应回输入行
+
+    rows 为 [(键, 标题, 年份, 期刊), ...]，返回 {键: 最佳候选}；
+    没有候选能通过标题比对的行不在结果中（需要逐篇检索）。
+    """
+    matched = {}
+    for key, title, year, journal in rows:
+        ranked = rank_candidates(candidates, title, year, journal, threshold)
+        if ranked:
+            matched[key] = ranked[0]
+    return matched
+
+
+def element_text(element):
+    """与 WebElement.text 近似：取可见文本并压缩空白"""
+    if element is None:
+        return None
+    return " ".join(element.get_text(" ").split())
+
+
+def address_numbers(author_text):
+    """作者条目中的全部地址编号（"Nori, Franco [2,3]" → ["2", "3"]），没有编号时默认第一个地址"""
+    numbers = [
+        number.strip()
+        for group in ADDRESS_NUMBER_PATTERN.findall(author_text)
+        for number in group.split(",")
+        if number.strip()
+    ]
+    return numbers or ["1"]
+
+
+def parse_address(address_text):
+    """解析地址文本"""
+    address_parts = address_text.split(",")
+    institution = (
+        address_parts[0].strip().split(maxsplit=1)[-1].replace("\n", "")
+        if address_parts
+        else "None"
+    )
+    return {"institution": institution, "country": address_country(address_parts)}
+
+
+def address_country(address_parts):
+    """地址最后一段为国家；美国地址写作 "Ann Arbor, MI 48109 USA"，只保留 USA"""
+    if len(address_parts) < 2:
+        return "None"
+    return normalize_country(address_parts[-1].strip())
+
+
+def normalize_country(country):
+    """美国地址的国家段带州名和邮编（"MI 48109 USA"），只保留 USA"""
+    return "USA" if country.endswith(" USA") else country
+
+
+def match_author_addresses(authors, addresses, last_names):
+    """在作者表中按姓氏匹配（取第一位匹配的作者），返回 {姓氏: 地址}
+
+    authors 为各作者条目的文本，addresses 为详情页的编号地址表 {编号: 地址文本}。
+    机构、国家取该作者的第一个地址，affiliations 为其全部地址（去掉编号，"; " 分隔）。
+    """
+    authors = [" ".join(text.split()) for text in authors]
+    result = {}
+    for last_name in last_names:
+        result[last_name] = dict(NO_ADDRESS)
+        for author_text in authors:
+            if last_name not in author_text:
+                continue
+            texts = [
+                " ".join(addresses[number].split())
+                for number in address_numbers(author_text)
+                if addresses.get(number)
+            ]
+            if texts:
+                result[last_name] = {
+                    **parse_address(texts[0]),
+                    "affiliations": "; ".join(
+                        re.sub(r"^\[?\d+\]?\s+", "", text) for text in texts
+                    ),
+                }
+            break
+    return result
+
+
+def parse_title(soup):
+    return element_text(soup.select_one("h2.title"))
+
+
+def parse_keywords(soup):
+    """作者关键词"""
+    if soup.select_one("h3#FRkeywordsTa-authorKeywordsLabel") is None:
+        return ["None"]
+    elements = soup.select("[id*='FRkeywordsTa-authorKeywordLink']")
+    return [element_text(k) for k in elements if element_text(k)] or ["None"]
+
+
+def parse_keywordsplus(soup):
+    """Keywords Plus"""
+    if soup.select_one("h3#FRkeywordsTa-keyWordsPlusLabel") is None:
+        return ["None"]
+    elements = soup.select("[id*='FRkeywordsTa-keyWordsPlusLink']")
+    return [element_text(kw).capitalize() for kw in elements] or ["None"]
+
+
+def parse_doi(soup):
+    return element_text(soup.select_one("span[data-ta='FullRTa-DOI']"))
+
+
+def parse_author_table(soup):
+    """作者表：(各作者条目的文本, {编号: 地址文本})；没有作者列表时返回 None"""
+    author_container = soup.select_one("span.cdx-grid-data")
+    if author_container is None:
+        return None
+    authors = [
+        element_text(element)
+        for element in author_container.select(
+            'span.value.ng-star-inserted[id^="author-"]'
+        )
+    ]
+    addresses = {
+        element["id"][len("address_") :]: element_text(element)
+        for element in soup.select('[id^="address_"]')
+    }
+    return authors, addresses
+
+
+def parse_author_addresses(soup, last_names):
+    """同一详情页上多位作者的地址：{姓氏: 地址}"""
+    table = parse_author_table(soup)
+    if table is None:
+        return {name: dict(NO_ADDRESS) for name in last_names}
+    return match_author_addresses(*table, last_names)
+
+
+def author_columns(last_name):
+    """多作者批量运行时某位作者的地址列名（机构、国家、全部地址）"""
+    return tuple(f"{col} ({last_name})" for col in ADDRESS_COLUMNS.values())
+
+
+def co_author_details(addresses):
+    """{姓氏: 地址} 展开成各作者的地址列"""
+    details = {}
+    for last_name, address in (addresses or {}).items():
+        for key, col in zip(ADDRESS_COLUMNS, author_columns(last_name)):
+            details[col] = address.get(key)
+    return details
+
+
+def parse_abstract(soup):
+    return element_text(soup.select_one("div[data-ta='FullRTa-abstract-basic']"))
+
+
+def parse_impact_factor(soup):
+    return element_text(soup.select_one("span[class='font-size-26']"))
+
+
+def fields_for_columns(columns):
+    """目标列需要提取的详情页字段；columns 为 None 时提取全部字段
+
+    多作者批量运行的各作者地址列（见 author_columns）也需要 author_address。
+    """
+    if columns is None:
+        return set(FIELD_COLUMNS)
+    fields = set()
+    for column in columns:
+        for field, field_columns in FIELD_COLUMNS.items():
+            if column in field_columns or column.startswith(
+                tuple(f"{col} (" for col in field_columns)
+            ):
+                fields.add(field)
+    return fields
+
+
+@timed("parse_record")
+def parse_record_html(html, last_name, co_authors=(), fields=None):
+    """解析详情页快照，返回与 WOSArticleScraper 属性对应的字段
+
+    co_authors 为一并解析地址的其他作者姓氏（多作者批量运行）；
+    fields 为需要提取的字段（见 fields_for_columns，None 表示全部），标题总会提取。
+    """
+    fields = set(FIELD_COLUMNS) if fields is None else fields
+    soup = BeautifulSoup(html, "html.parser")
+    parsers = {
+        "keywords": lambda: parse_keywords(soup),
+        "keywordsplus": lambda: parse_keywordsplus(soup),
+        "doi": lambda: parse_doi(soup),
+        # 作者/地址表只解析一次，本作者和 co_authors 一起匹配
+        "author_address": lambda: parse_author_addresses(
+            soup, [last_name, *co_authors]
+        ),
+        "abstract": lambda: parse_abstract(soup),
+        "impact_factor": lambda: parse_impact_factor(soup),
+    }
+    record = {"title": parse_title(soup)}
+    for field in FIELD_COLUMNS:
+        if field in fields:
+            with TIMER.span(f"parse_{field}"):
+                record[field] = parsers[field]()
+    if "author_address" in fields:
+        addresses = record["author_address"]
+        record["author_address"] = addresses[last_name]
+        record["co_author_addresses"] = {name: addresses[name] for name in co_authors}
+    return record
+
+
+def format_details(fields):
+    """格式化输出（与 WOSArticleScraper.format_details 相同的列）；未提取的字段不输出对应列"""
+    details = {"Title": fields["title"]}
+    for field, columns in FIELD_COLUMNS.items():
+        if field not in fields:
+            continue
+        value = fields[field]
+        if field == "author_address":
+            for key, col in ADDRESS_COLUMNS.items():
+                details[col] = value.get(key)
+        elif field in ("keywords", "keywordsplus"):
+            details[columns[0]] = ", ".join(value)
+        else:
+            details[columns[0]] = value
+    details.update(co_author_details(fields.get("co_author_addresses")))
+    return details
+
+
+def rebuild_details(html, last_name, original_title=None, co_authors=(), fields=None):
+    """从存档 HTML 重建 format_details 输出；标题比对失败时返回空字典"""
+    record = parse_record_html(html, last_name, co_authors, fields)
+    record["title"] = record["title"] or ""
+    if original_title and not is_title_match(original_title, record["title"]):
+        return {}
+    if "doi" in record:
+        record["doi"] = record["doi"] or "未获取 DOI"
+    if "abstract" in record:
+        record["abstract"] = record["abstract"] or "未获取摘要"
+    return format_details(record)
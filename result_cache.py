@@ -0,0 +1,197 @@
+"""跨运行、跨作者的 WOS 结果缓存（SQLite），按归一化标题和 DOI 索引"""
+
+import json
+import sqlite3
+import threading
+import time
+
+from record_parser import (
+    ADDRESS_COLUMNS,
+    author_columns,
+    normalize_doi,
+    normalize_title,
+)
+
+# 与作者相关的列（按姓氏分别缓存），其余列所有作者共用
+AUTHOR_COLUMNS = tuple(ADDRESS_COLUMNS.values())
+# 地址获取失败时的占位值：这样的地址不缓存（已缓存的视为未命中），下次运行重新获取
+PLACEHOLDER_VALUES = ("None", "未获取", "", None)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    title_key   TEXT PRIMARY KEY,
+    doi         TEXT,
+    details     TEXT NOT NULL,
+    addresses   TEXT NOT NULL,
+    created_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_doi ON results (doi);
+CREATE INDEX IF NOT EXISTS idx_results_accessed ON results (accessed_at);
+"""
+
+
+def is_placeholder_address(address):
+    """机构或国家为占位值（地址获取失败）"""
+    return any(
+        address.get(col) in PLACEHOLDER_VALUES
+        for col in (ADDRESS_COLUMNS["institution"], ADDRESS_COLUMNS["country"])
+    )
+
+
+class ResultCache:
+    """format_details 结果缓存：带过期时间（TTL）和条目上限（按最近访问淘汰）"""
+
+    def __init__(self, path="wos_cache.sqlite", ttl_days=180, max_entries=50000):
+        self.path = path
+        self.ttl = ttl_days * 86400
+        self.max_entries = max_entries
+        self._lock = threading.Lock()  # 并行池共用一个连接
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self.hits = 0  # 本次运行的命中次数
+
+    def get(self, title=None, doi=None, last_name=None, co_authors=()):
+        """按标题（优先）或 DOI 查找缓存
+
+        返回 format_details 形式的字典；该姓氏的地址未缓存时不含地址列（AUTHOR_COLUMNS），
+        co_authors 中已缓存地址的作者另有各自的地址列（见 author_columns）。
+        未命中或已过期返回 None。
+        """
+        row = None
+        with self._lock:
+            if title:
+                row = self._conn.execute(
+                    "SELECT title_key, details, addresses, created_at FROM results "
+                    "WHERE title_key = ?",
+                    (normalize_title(title),),
+                ).fetchone()
+            if row is None and normalize_doi(doi):
+                row = self._conn.execute(
+                    "SELECT title_key, details, addresses, created_at FROM results "
+                    "WHERE doi = ? ORDER BY accessed_at DESC LIMIT 1",
+                    (normalize_doi(doi),),
+                ).fetchone()
+            if row is None:
+                return None
+
+            title_key, details, addresses, created_at = row
+            now = time.time()
+            if now - created_at > self.ttl:
+                self._conn.execute(
+                    "DELETE FROM results WHERE title_key = ?", (title_key,)
+                )
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE results SET accessed_at = ? WHERE title_key = ?",
+                (now, title_key),
+            )
+            self._conn.commit()
+            self.hits += 1
+
+        details = json.loads(details)
+        addresses = self._valid_addresses(addresses)
+        address = addresses.get(last_name) if last_name else None
+        if address:
+            details.update(address)
+        for name in co_authors:
+            for col, own in zip(AUTHOR_COLUMNS, author_columns(name)):
+                if col in addresses.get(name, {}):
+                    details[own] = addresses[name][col]
+        return details
+
+    def has(self, title, last_name=None, co_authors=()):
+        """是否已缓存（未过期，且有该姓氏及 co_authors 的地址）；不计命中、不更新访问时间"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT addresses, created_at FROM results WHERE title_key = ?",
+                (normalize_title(title),),
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return False
+        addresses = self._valid_addresses(row[0])
+        names = [last_name, *co_authors] if last_name else list(co_authors)
+        return all(name in addresses for name in names)
+
+    def put(self, title, details, last_name=None, co_authors=()):
+        """写入一条成功的结果（同一标题的不同作者地址、不同列会合并保存）
+
+        co_authors 的地址取自 details 中各自的地址列；details 不含地址列时（只提取了部分列）
+        或地址为占位值时（获取失败）不写地址。
+        """
+        if not title or not details:
+            return
+        title_key = normalize_title(title)
+        co_columns = {name: author_columns(name) for name in co_authors}
+        excluded = set(AUTHOR_COLUMNS).union(*co_columns.values())
+        shared = {k: v for k, v in details.items() if k not in excluded}
+        address = {k: details[k] for k in AUTHOR_COLUMNS if k in details}
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT details, addresses FROM results WHERE title_key = ?",
+                (title_key,),
+            ).fetchone()
+            if row:
+                shared = {**json.loads(row[0]), **shared}
+            addresses = json.loads(row[1]) if row else {}
+            if last_name and "Country" in details:
+                if not is_placeholder_address(address):
+                    addresses[last_name] = address
+            for name, columns in co_columns.items():
+                if columns[0] in details:
+                    co_address = {
+                        col: details[own]
+                        for col, own in zip(AUTHOR_COLUMNS, columns)
+                        if own in details
+                    }
+                    if not is_placeholder_address(co_address):
+                        addresses[name] = co_address
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results "
+                "(title_key, doi, details, addresses, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    title_key,
+                    normalize_doi(shared.get("DOI")),
+                    json.dumps(shared, ensure_ascii=False),
+                    json.dumps(addresses, ensure_ascii=False),
+                    now,
+                    now,
+                ),
+            )
+            self._evict()
+            self._conn.commit()
+
+    @staticmethod
+    def _valid_addresses(addresses):
+        """解析 addresses 列，去掉占位地址（旧版本缓存的失败结果）"""
+        return {
+            name: address
+            for name, address in json.loads(addresses).items()
+            if not is_placeholder_address(address)
+        }
+
+    def _evict(self):
+        """超过条目上限时删除最久未访问的记录（调用方持有锁）"""
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM results WHERE title_key IN ("
+                "SELECT title_key FROM results ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def purge_expired(self):
+        """清理所有过期记录"""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM results WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,103 @@
+"""谷歌学术请求结果的磁盘缓存（SQLite）：按作者 ID、出版物 ID 索引，每条记录有各自的过期时间"""
+
+import json
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key         TEXT PRIMARY KEY,
+    value       TEXT NOT NULL,
+    expires_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at);
+"""
+
+
+def scholar_key(obj):
+    """scholarly 对象的缓存键：出版物按 author_pub_id，作者按 scholar_id；没有 ID 时返回 None"""
+    if obj.get("author_pub_id"):
+        return f"pub:{obj['author_pub_id']}"
+    if obj.get("scholar_id"):
+        return f"author:{obj['scholar_id']}"
+    return None
+
+
+def _json_default(value):
+    """scholarly 对象中的集合转成列表，其余非 JSON 类型转成字符串"""
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    return str(value)
+
+
+class ScholarCache:
+    """scholarly 返回的字典按键缓存：带每条记录的过期时间和条目上限（按最近访问淘汰）"""
+
+    def __init__(self, path="scholar_cache.sqlite", max_entries=20000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()  # 并发补全的线程共用一个连接
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self.hits = 0  # 本次运行的命中次数
+
+    def get(self, key):
+        """读取一条未过期的记录，未命中返回 None"""
+        if key is None:
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, value, ttl_days):
+        """写入一条记录，ttl_days 天后过期"""
+        if key is None or value is None:
+            return
+        now = time.time()
+        data = json.dumps(value, ensure_ascii=False, default=_json_default)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, data, now + ttl_days * 86400, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """超过条目上限时删除最久未访问的记录（调用方持有锁）"""
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                "SELECT key FROM entries ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def purge_expired(self):
+        """清理所有过期记录"""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM entries WHERE expires_at < ?", (time.time(),)
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
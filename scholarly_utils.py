@@ -1,25 +1,65 @@
 import csv
+import os
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from scholarly import scholarly
 import random
+from urllib.parse import unquote, urlparse
 from requests.exceptions import RequestException
+from rate_limiter import AdaptiveRateLimiter
+from progress_journal import ProgressJournal, journal_path
+from record_parser import normalize_doi, normalize_title
+from scholar_cache import ScholarCache, scholar_key
 
 # 配置常量
 max_retries = 3  # 最大重试次数
 base_delay = 2  # 基础等待时间（秒）
 rate_limit_delay = (1, 3)  # 请求间隔随机范围（秒）
 keywords = {"supporting information", "supplementary", "comment"}
+fill_workers = 1  # 并发补全线程数（1 表示逐篇补全加随机间隔；大于1时启用并发补全，需自行评估封禁风险）
+fill_rate = 0.4  # 并发补全的初始请求速率（次/秒，所有线程共享，按请求结果自适应）
+cache_path = "scholar_cache.sqlite"  # 谷歌学术请求结果的磁盘缓存（None 表示不用）
+author_cache_days = 7  # 作者检索和作者信息（含出版物列表）的有效期（天）
+pub_cache_days = 180  # 补全后的出版物的有效期（天）
+cache_max_entries = 20000  # 缓存条目上限
 
 
-def safe_scholarly_request(func, *args, **kwargs):
-    """带异常处理和指数退避的重试包装函数"""
+class AuthorNotFound(LookupError):
+    """谷歌学术上找不到作者（检索或补全作者信息失败）"""
+
+
+def scholar_doi(pub):
+    """谷歌学术条目中的 DOI（bib 字段或 doi.org 链接），没有则返回空字符串
+
+    出版社页面的链接不提取：路径后缀和查询参数（/meta、.pdf、?casa_token=...）
+    无法与 DOI 本身区分。
+    """
+    doi = normalize_doi(pub["bib"].get("doi"))
+    if doi is None:
+        url = urlparse(pub.get("pub_url") or "")
+        if url.netloc.lower().endswith("doi.org"):
+            doi = normalize_doi(unquote(url.path.lstrip("/")))
+    return doi or ""
+
+
+def safe_scholarly_request(func, *args, limiter=None, **kwargs):
+    """带异常处理和指数退避的重试包装函数（传入 limiter 时由共享限速器控制间隔）"""
     for attempt in range(max_retries):
         try:
+            if limiter is not None:
+                limiter.wait()
+                request_start = time.time()
+                result = func(*args, **kwargs)
+                limiter.record("ok", latency=time.time() - request_start)
+                return result
             result = func(*args, **kwargs)
             time.sleep(random.uniform(*rate_limit_delay))  # 随机间隔
             return result
         except RequestException as e:
             print(f"Attempt {attempt+1} failed: {str(e)}")
+            if limiter is not None:
+                limiter.record("error")
             if attempt == max_retries - 1:
                 raise
             sleep_time = base_delay * (2**attempt)  # 指数退避
@@ -28,104 +68,280 @@ def safe_scholarly_request(func, *args, **kwargs):
     return None  # 理论上不会执行到这里
 
 
-def get_author_publications(author_name):
-    """获取作者出版物并返回CSV文件名"""
-    print(f"\n开始处理作者: {author_name}")
+def open_scholar_cache():
+    """按配置打开谷歌学术缓存"""
+    if not cache_path:
+        return None
+    return ScholarCache(cache_path, max_entries=cache_max_entries)
+
+
+def cached_fill(obj, limiter=None, cache=None):
+    """补全作者或出版物：缓存中有（按作者 ID / 出版物 ID）就直接用，否则请求后写入缓存
+
+    与 scholarly.fill 一样就地更新 obj 并返回它。
+    """
+    key = scholar_key(obj) if cache is not None else None
+    cached = cache.get(key) if key else None
+    if cached is not None:
+        obj.update(cached)
+        return obj
+    result = safe_scholarly_request(scholarly.fill, obj, limiter=limiter)
+    if key and result is not None:
+        ttl = pub_cache_days if key.startswith("pub:") else author_cache_days
+        cache.put(key, result, ttl)
+    return result
+
+
+def fill_publications(publications, workers=1, limiter=None, cache=None, window=None):
+    """补全出版物信息，按原顺序产出 (序号, 补全结果)，失败的结果为 None
+
+    并发时按需提交：进行中和已完成未取走的补全最多 workers + window 个（window 默认
+    等于 workers），调用方暂停取结果时不再发出新的请求；生成器关闭时取消未开始的补全。
+    """
+
+    def fill(pub):
+        try:
+            return cached_fill(pub, limiter, cache)
+        except Exception:
+            return None
+
+    if workers <= 1:
+        for index, pub in enumerate(publications, start=1):
+            yield index, fill(pub)
+        return
+
+    # 并发补全：线程数限制并发度，令牌桶限制总请求速率
+    limit = workers + (workers if window is None else window)
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = deque()
+    index = 0
+    try:
+        for pub in publications:
+            futures.append(executor.submit(fill, pub))
+            if len(futures) >= limit:
+                index += 1
+                yield index, futures.popleft().result()
+        while futures:
+            index += 1
+            yield index, futures.popleft().result()
+    finally:
+        # 调用方提前结束时不等进行中的请求，未开始的直接取消
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# original CSV 的列（WOS 数据列留空占位）
+ORIGINAL_HEADERS = [
+    "Title",
+    "Publication Year",
+    "Authors",
+    "Journal",
+    "Citations",
+    "Impact Factor",
+    "Author Keywords",
+    "Keywords Plus",
+    "Institution",
+    "Country",
+    "DOI",
+    "Abstract",
+]
+
+
+def original_csv_path(author_name):
+    """作者对应的 original CSV 文件名"""
+    return f"{author_name.replace(' ', '_')}_publications_original.csv"
+
+
+def publication_row(pub):
+    """补全后的出版物转换成 original CSV 的一行（字典）"""
+    row = dict.fromkeys(ORIGINAL_HEADERS, "")  # 占位给WOS数据
+    row.update(
+        {
+            "Title": pub["bib"].get("title"),
+            "Publication Year": pub["bib"].get("pub_year"),
+            "Authors": pub["bib"].get("author"),
+            "Journal": pub["bib"].get("journal"),
+            "Citations": pub.get("num_citations"),
+            "DOI": scholar_doi(pub),  # 有 DOI 时 WOS 检索走 DOI 快速路径
+        }
+    )
+    return row
 
+
+def find_author(author_name, limiter=None, cache=None):
+    """检索并补全作者信息（含出版物列表），失败时抛出 AuthorNotFound
+
+    有缓存时作者检索结果按作者名、作者信息按作者 ID 缓存。
+    """
+    search_key = f"search:{normalize_title(author_name)}"
     try:
-        search_query = safe_scholarly_request(scholarly.search_author, author_name)
-        author = safe_scholarly_request(next, search_query)
-        safe_scholarly_request(scholarly.fill, author)
+        author = cache.get(search_key) if cache is not None else None
+        if author is None:
+            search_query = safe_scholarly_request(
+                scholarly.search_author, author_name, limiter=limiter
+            )
+            author = safe_scholarly_request(next, search_query, limiter=limiter)
+            if cache is not None:
+                cache.put(search_key, author, author_cache_days)
+        cached_fill(author, limiter, cache)
     except Exception as e:
-        print(f"作者查找失败: {str(e)}")
-        return None
+        raise AuthorNotFound(f"作者查找失败: {str(e)}") from e
+    return author
+
+
+def seed_journal(journal, csv_filename):
+    """没有进度日志的旧 original CSV：把其中的行记为已保留的条目，返回写入的记录"""
+    with open(csv_filename, newline="", encoding="utf-8-sig") as f:
+        rows = list(csv.DictReader(f))
+    for sequence, row in enumerate(rows, start=1):
+        details = {col: row.get(col, "") for col in ORIGINAL_HEADERS}
+        details["Sequence Number"] = sequence
+        journal.append(sequence, row["Title"], details)
+    print(f"从已有的 {csv_filename} 导入 {len(rows)} 篇已保留条目")
+    return journal.load()
+
 
-    # 过滤和处理出版物
-    filtered_pubs = []
-    seen_titles = set()
+def stream_author_publications(author_name, workers=None, limiter=None):
+    """流式获取作者出版物：每补全并通过过滤一篇就产出 (行号, 行字典)，同时写入 original CSV
+
+    每篇 Scholar 条目处理完都在 original CSV 的进度日志中记一条（按标题对应），
+    重跑时（中断续传或隔一段时间增量刷新）只补全新出现的条目，已保留的行按原行号
+    先重新产出，新增的行追加在后面；补全失败的条目会重试。
+    """
+    workers = fill_workers if workers is None else workers
+    if limiter is None and workers > 1:
+        limiter = AdaptiveRateLimiter(rate=fill_rate, max_rate=fill_rate * 2)
+    print(f"\n开始处理作者: {author_name}")
+    cache = open_scholar_cache()
+    try:
+        author = find_author(author_name, limiter, cache)
+    except AuthorNotFound:
+        if cache is not None:
+            cache.close()
+        raise
+
+    csv_filename = original_csv_path(author_name)
+    journal = ProgressJournal(journal_path(csv_filename))
+    publications = author["publications"]
+
+    # 已处理的条目按标题对应（出版物列表的顺序每次都可能变化，新条目可能出现在任意位置）
+    records = journal.load()
+    if not records and os.path.exists(csv_filename):
+        records = seed_journal(journal, csv_filename)
+    entry_ids = {record["title"]: entry_id for entry_id, record in records.items()}
+    done = {r["title"]: r for r in records.values() if not r["failed"]}
+    kept = sorted(
+        (r["details"] for r in done.values() if "Sequence Number" in r["details"]),
+        key=lambda details: details["Sequence Number"],
+    )
+    seen_titles = {details["Title"] for details in kept}
+    next_id = max(records, default=0) + 1
+    todo, queued = [], set()  # [(条目编号, 出版物), ...]，同名条目只补全一次
+    for pub in publications:
+        title = pub["bib"].get("title", "")
+        if title in done or title in queued:
+            continue
+        queued.add(title)
+        if title not in entry_ids:
+            entry_ids[title] = next_id
+            next_id += 1
+        todo.append((entry_ids[title], pub))
 
     # 进度报告配置
     progress_interval = 10  # 每处理10篇报告一次进度
-    total_articles = len(author["publications"])
+    total_articles = len(todo)
     success_count = 0  # 成功获取数据的文章数
 
-    print(f"\n开始处理 {total_articles} 篇文章...")
+    if done:
+        print(
+            f"从进度日志恢复 {len(done)} 篇已处理条目（保留 {len(kept)} 篇），"
+            f"新增或待重试 {len(todo)} 篇"
+        )
+    print(f"\n开始处理 {total_articles} 篇文章（并发 {workers}）...")
     print("=" * 40)
 
-    for index, pub in enumerate(author["publications"], start=1):
-        try:
-            # 带异常处理的文章信息获取
-            filled_pub = safe_scholarly_request(scholarly.fill, pub)
-            success_count += 1  # 成功获取计数
-            # 提取关键信息
-            title = filled_pub["bib"].get("title", "")
-            pub_year = filled_pub["bib"].get("pub_year")
-
-            # 过滤条件判断
-            if (
-                not pub_year
-                or any(kw in title.lower() for kw in keywords)
-                or title in seen_titles
+    try:
+        with open(csv_filename, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.DictWriter(
+                f, fieldnames=ORIGINAL_HEADERS, extrasaction="ignore"
+            )
+            writer.writeheader()
+            for details in kept:
+                writer.writerow(details)
+                yield details["Sequence Number"] - 1, {
+                    col: details.get(col, "") for col in ORIGINAL_HEADERS
+                }
+            f.flush()
+
+            pending = [pub for _, pub in todo]
+            for index, filled_pub in fill_publications(
+                pending, workers, limiter, cache
             ):
-                continue
+                entry_id = todo[index - 1][0]
+                title = pending[index - 1]["bib"].get("title", "")
+                # 带异常处理的文章信息获取
+                if filled_pub is None:
+                    journal.append(entry_id, title, {}, failed=True)
+                    continue
+                success_count += 1  # 成功获取计数
+                row = None
+                try:
+                    # 提取关键信息
+                    pub_title = filled_pub["bib"].get("title", "")
+                    pub_year = filled_pub["bib"].get("pub_year")
 
-            seen_titles.add(title)
-            filtered_pubs.append(filled_pub)
-        except:
-            continue
+                    # 过滤条件判断
+                    if (
+                        pub_year
+                        and not any(kw in pub_title.lower() for kw in keywords)
+                        and pub_title not in seen_titles
+                    ):
+                        seen_titles.add(pub_title)
+                        row = publication_row(filled_pub)
+                except Exception:
+                    row = None
 
-        # 进度报告（每10篇或最后1篇）
-        if index % progress_interval == 0 or index == total_articles:
-            progress_percent = (index / total_articles) * 100
-            print(
-                f"[进度] 已检索 {index}/{total_articles} 篇 | "
-                f"成功获取 {success_count} 篇 | "
-                f"保留 {len(filtered_pubs)} 篇 | "
-                f"完成 {progress_percent:.1f}%"
-            )
+                if row is None:
+                    journal.append(entry_id, title, {})
+                else:
+                    sequence = len(kept) + 1
+                    kept.append(row)
+                    writer.writerow(row)
+                    f.flush()
+                    journal.append(
+                        entry_id, title, dict(row, **{"Sequence Number": sequence})
+                    )
+                    yield sequence - 1, row
 
-    # 生成CSV文件
-    csv_filename = f"{author_name.replace(' ', '_')}_publications_original.csv"
-    headers = [
-        "Title",
-        "Publication Year",
-        "Authors",
-        "Journal",
-        "Citations",
-        "Impact Factor",
-        "Author Keywords",
-        "Keywords Plus",
-        "Institution",
-        "Country",
-        "DOI",
-        "Abstract",
-    ]
-
-    with open(csv_filename, "w", newline="", encoding="utf-8-sig") as f:
-        writer = csv.writer(f)
-        writer.writerow(headers)
-        for idx, pub in enumerate(filtered_pubs, 1):
-            writer.writerow(
-                [
-                    pub["bib"].get("title"),
-                    pub["bib"].get("pub_year"),
-                    pub["bib"].get("author"),
-                    pub["bib"].get("journal"),
-                    pub.get("num_citations"),
-                    "",  # 占位给WOS数据
-                    "",
-                    "",
-                    "",
-                    "",
-                    "",
-                    "",
-                ]
-            )
+                # 进度报告（每10篇或最后1篇）
+                if index % progress_interval == 0 or index == total_articles:
+                    progress_percent = (index / total_articles) * 100
+                    print(
+                        f"[进度] 已检索 {index}/{total_articles} 篇 | "
+                        f"成功获取 {success_count} 篇 | "
+                        f"保留 {len(kept)} 篇 | "
+                        f"完成 {progress_percent:.1f}%"
+                    )
+    finally:
+        # 调用方提前结束（如 WOS 阶段出错）时也关闭进度日志和缓存
+        journal.close()
+        if cache is not None:
+            print(f"谷歌学术缓存命中 {cache.hits} 次")
+            cache.close()
 
     print(f"已生成初始CSV文件: {csv_filename}")
     print("=" * 40)
     print(f"处理完成报告：")
     print(f"• 共检索文章：{total_articles} 篇")
     print(f"• 成功获取数据：{success_count} 篇")
-    print(f"• 最终保留文章：{len(filtered_pubs)} 篇")
-    return csv_filename
+    print(f"• 最终保留文章：{len(kept)} 篇")
+
+
+def get_author_publications(author_name, workers=None, limiter=None):
+    """获取作者出版物并返回CSV文件名"""
+    try:
+        for _ in stream_author_publications(author_name, workers, limiter):
+            pass
+    except AuthorNotFound as e:
+        print(str(e))
+        return None
+    return original_csv_path(author_name)
@@ -0,0 +1,184 @@
+"""分阶段计时：各抓取步骤的耗时写成 JSON 行，运行结束时按阶段汇总；可选用 cProfile 剖析解析代码"""
+
+import cProfile
+import functools
+import io
+import json
+import logging
+import pstats
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# 开启剖析时被 cProfile 记录的阶段（纯解析代码，不含浏览器操作）
+PARSE_STAGES = ("parse_record", "parse_results", "read_export")
+
+
+def percentile(values, q):
+    """最近秩百分位数（q 取 0~100）"""
+    if not values:
+        return None
+    values = sorted(values)
+    rank = max(1, -(-len(values) * q // 100))  # 向上取整
+    return values[int(rank) - 1]
+
+
+class StageTimer:
+    """线程安全的阶段计时器：span() 记录一段耗时，open() 之后每段追加一行 JSON
+
+    JSON 行为 {"stage", "start", "seconds", "parent", "thread", ...}，
+    parent 为外层阶段（阶段可以嵌套，汇总时各阶段分别统计，外层包含内层耗时）。
+    """
+
+    def __init__(self):
+        self.path = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._file = None
+        self._durations = defaultdict(list)
+        self._profile_stages = ()
+        self._stats = None  # 累计的 pstats.Stats
+
+    def open(self, path, profile_parsing=False):
+        """开始写入 JSON 行；profile_parsing 为 True 时剖析 PARSE_STAGES"""
+        with self._lock:
+            if self._file is None:
+                self._file = open(path, "a", encoding="utf-8")
+                self.path = path
+            self._profile_stages = PARSE_STAGES if profile_parsing else ()
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, stage, **fields):
+        """计时一段代码；fields 为附加到 JSON 行的字段"""
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        profile = self._start_profile(stage)
+        stack.append(stage)
+        start = time.time()
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - began
+            stack.pop()
+            self._stop_profile(profile)
+            self._record(stage, start, seconds, parent, fields)
+
+    def _record(self, stage, start, seconds, parent, fields):
+        with self._lock:
+            self._durations[stage].append(seconds)
+            if self._file is None:
+                return
+            record = {
+                "stage": stage,
+                "start": start,
+                "seconds": seconds,
+                "parent": parent,
+                "thread": threading.current_thread().name,
+                **fields,
+            }
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _start_profile(self, stage):
+        if stage not in self._profile_stages or getattr(
+            self._local, "profiling", False
+        ):
+            return None  # 外层解析阶段已在剖析
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return None  # 已有其他剖析器在运行
+        self._local.profiling = True
+        return profile
+
+    def _stop_profile(self, profile):
+        if profile is None:
+            return
+        profile.disable()
+        self._local.profiling = False
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(profile)
+            else:
+                self._stats.add(profile)
+
+    def summary(self):
+        """按阶段汇总：{阶段: {"count", "total", "p50", "p95", "max"}}，按总耗时降序"""
+        with self._lock:
+            durations = {
+                stage: list(values) for stage, values in self._durations.items()
+            }
+        summary = {
+            stage: {
+                "count": len(values),
+                "total": sum(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "max": max(values),
+            }
+            for stage, values in durations.items()
+        }
+        return dict(sorted(summary.items(), key=lambda item: -item[1]["total"]))
+
+    def log_summary(self):
+        """在日志中汇报各阶段的次数、总耗时和 p50/p95"""
+        summary = self.summary()
+        if not summary:
+            return summary
+        logging.info("各阶段耗时（秒）：")
+        for stage, s in summary.items():
+            logging.info(
+                f"  {stage:<24} 次数 {s['count']:>6}  合计 {s['total']:>9.1f}  "
+                f"p50 {s['p50']:>7.3f}  p95 {s['p95']:>7.3f}  最长 {s['max']:>7.3f}"
+            )
+        return summary
+
+    def profile_report(self, limit=20):
+        """解析代码的剖析结果（按累计耗时排序的前 limit 项），未开启剖析时返回 None"""
+        with self._lock:
+            if self._stats is None:
+                return None
+            stream = io.StringIO()
+            self._stats.stream = stream
+            self._stats.sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+    def close(self, profile_path=None):
+        """关闭 JSON 行文件；给出 profile_path 时把剖析结果写成 .prof 文件"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if profile_path and self._stats is not None:
+                self._stats.dump_stats(profile_path)
+
+    def reset(self):
+        """清空已记录的耗时和剖析结果"""
+        with self._lock:
+            self._durations.clear()
+            self._stats = None
+
+
+# 进程内共用的计时器（多个浏览器线程写入同一个文件）
+TIMER = StageTimer()
+
+
+def timed(stage):
+    """装饰器：用 TIMER 计时整个函数调用"""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with TIMER.span(stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,39 @@
+"""批量检索：模拟站点的合并结果页能否对应回输入行（不启动浏览器）"""
+
+import pytest
+
+from mock_wos import MockWOSServer, make_records
+from record_parser import build_title_query, match_batch, parse_result_list_html
+
+MISSING_ROW = ("missing", "An unrelated article that is not indexed", None, None)
+
+
+@pytest.mark.parametrize("batch_size", [1, 10, 20])
+def test_batch_results_map_back_to_rows(batch_size):
+    """每批混入一个站点上不存在的标题，它必须落到逐篇检索，其余行都对应到自己的记录"""
+    server = MockWOSServer(make_records(20))
+    records = server.records
+    for start in range(0, len(records), batch_size):
+        chunk = records[start : start + batch_size]
+        rows = [(r["id"], r["title"], r["year"], r["journal"]) for r in chunk]
+        rows.append(MISSING_ROW)
+        page = server.render_summary(build_title_query([row[1] for row in rows]))
+        matched = match_batch(parse_result_list_html(page), rows)
+
+        assert {key: c["href"].rsplit("/", 1)[-1] for key, c in matched.items()} == {
+            r["id"]: r["id"] for r in chunk
+        }
+        assert [row[0] for row in rows if row[0] not in matched] == ["missing"]
+
+
+def test_decoys_do_not_take_the_row():
+    """带勘误、评论、补充材料等干扰条目时，仍对应到真实文章"""
+    server = MockWOSServer(make_records(10, multi_rate=1.0))
+    records = [r for r in server.records if not r.get("decoy")]
+    rows = [(r["id"], r["title"], r["year"], r["journal"]) for r in records]
+    page = server.render_summary(build_title_query([row[1] for row in rows]))
+    matched = match_batch(parse_result_list_html(page), rows)
+
+    assert {key: c["href"].rsplit("/", 1)[-1] for key, c in matched.items()} == {
+        r["id"]: r["id"] for r in records
+    }
@@ -0,0 +1,146 @@
+"""导出文件解析和回填：fixtures 中的 WOS 导出样例和模拟站点生成的导出文件（不启动浏览器）"""
+
+import os
+
+import pytest
+
+from mock_wos import MockWOSServer, make_records
+from record_parser import ADDRESS_COLUMNS, build_title_query, rebuild_details
+from wos_export import (
+    decode_export,
+    export_details,
+    join_export,
+    parse_export_address,
+    parse_plain_text,
+    parse_tab_delimited,
+    read_export,
+)
+
+LAST_NAME = "Nori"
+# WOS 导出样例（同一批记录的制表符分隔和纯文本导出）及 Nori 的期望解析结果
+# 样例带 BOM、CRLF 换行，制表符分隔文件行尾多一个制表符，纯文本文件的长字段折行
+EXPORT_SAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+EXPORT_SAMPLES = {
+    "savedrecs_tab.txt": parse_tab_delimited,
+    "savedrecs_plain.txt": parse_plain_text,
+}
+EXPORT_SAMPLE_EXPECTED = {
+    # 本作者有两个地址，第一个地址在 C1 开头
+    "WOS:000312850400008": {
+        "Title": "Quantum biology",
+        "Author Keywords": "photosynthesis, quantum coherence, avian compass",
+        "Keywords Plus": "Excitation-energy transfer, Light-harvesting complexes, "
+        "2-dimensional electronic spectroscopy, Avian magnetic compass",
+        "Institution": "RIKEN",
+        "Country": "Japan",
+        "Affiliations": "RIKEN, Adv Sci Inst, Wako, Saitama 3510198, Japan; "
+        "Univ Michigan, Dept Phys, Ann Arbor, MI 48109 USA",
+        "DOI": "10.1038/NPHYS2474",
+    },
+    # 本作者的地址排在合作者地址之后
+    "WOS:000292133500029": {
+        "Title": "Atomic physics and quantum optics using superconducting circuits",
+        "Institution": "RIKEN",
+        "Country": "Japan",
+        "Affiliations": "RIKEN, Adv Sci Inst, Wako, Saitama 3510198, Japan; "
+        "Univ Michigan, Ctr Theoret Phys, Dept Phys, Ann Arbor, MI 48109 USA",
+        "DOI": "10.1038/nature10122",
+    },
+    # 旧记录：C1 没有 [作者] 前缀，没有作者关键词，摘要含双引号
+    "WOS:000179236400014": {
+        "Author Keywords": "None",
+        "Keywords Plus": "Vortex motion, Ratchet, Lattice",
+        "Institution": "Univ Michigan",
+        "Country": "USA",
+        "Affiliations": "Univ Michigan, Dept Phys, Ann Arbor, MI 48109 USA",
+        "DOI": "10.1038/nmat746",
+    },
+    # 更正：没有 C1 和 DOI
+    "WOS:000315982900020": {
+        "Institution": "None",
+        "Country": "None",
+        "Affiliations": "None",
+        "DOI": "未获取 DOI",
+        "Abstract": "未获取摘要",
+    },
+}
+
+
+def parse_sample(name):
+    with open(os.path.join(EXPORT_SAMPLE_DIR, name), "rb") as f:
+        return EXPORT_SAMPLES[name](decode_export(f.read()))
+
+
+@pytest.fixture(scope="module")
+def server():
+    return MockWOSServer(make_records(20, LAST_NAME))
+
+
+@pytest.fixture(scope="module", params=["tab", "plain"])
+def exported(request, server, tmp_path_factory):
+    """模拟站点对全部记录的导出文件，按 read_export 解析"""
+    query = build_title_query([r["title"] for r in server.records])
+    path = tmp_path_factory.mktemp("exports") / f"savedrecs_{request.param}.txt"
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(server.render_export(query, request.param))
+    return read_export(str(path))
+
+
+@pytest.mark.parametrize("name", EXPORT_SAMPLES)
+def test_read_export_detects_sample_format(name):
+    assert read_export(os.path.join(EXPORT_SAMPLE_DIR, name)) == parse_sample(name)
+
+
+@pytest.mark.parametrize("name", EXPORT_SAMPLES)
+def test_sample_records_match_expected(name):
+    records = {record.get("UT"): record for record in parse_sample(name)}
+    assert sorted(records) == sorted(EXPORT_SAMPLE_EXPECTED)
+
+    for ut, expected in EXPORT_SAMPLE_EXPECTED.items():
+        address = parse_export_address(records[ut].get("C1"), LAST_NAME)
+        details = export_details(records[ut], LAST_NAME)
+        for col, value in expected.items():
+            actual = details.get(col)
+            if col in ADDRESS_COLUMNS.values():
+                key = next(k for k, c in ADDRESS_COLUMNS.items() if c == col)
+                actual = address[key]
+            assert actual == value, f"{ut} {col}"
+
+
+def test_tab_and_plain_samples_agree():
+    """两种格式的同一条记录应当解析出相同的字段"""
+    tab, plain = (
+        {record.get("UT"): record for record in parse_sample(name)}
+        for name in EXPORT_SAMPLES
+    )
+    assert sorted(tab) == sorted(plain)
+    for ut in tab:
+        assert tab[ut] == plain[ut], ut
+
+
+def test_mock_export_matches_detail_page(server, exported):
+    """导出文件与详情页解析逐列一致（导出文件没有影响因子）"""
+    assert len(exported) == len(server.records)
+    for record, row in zip(server.records, exported):
+        expected = rebuild_details(server.render_record(record), LAST_NAME)
+        expected.pop("Impact Factor")
+        actual = export_details(row, LAST_NAME)
+        assert {col: actual.get(col) for col in expected} == expected, record["id"]
+
+
+def test_join_export_title_checks_doi_hits(server, exported):
+    """标题大小写和标点不同、标题略有出入但 DOI 正确时回填；
+    DOI 对应的记录标题对不上（当作 DOI 有误）、站点上不存在时不回填
+    """
+    records = server.records
+    tasks = [
+        (0, records[0]["title"].upper() + ".", None),
+        (1, records[1]["title"].replace(" ", "  ") + "s", records[1]["doi"]),
+        (2, "An unrelated article that is not indexed", None),
+        (3, "A garbled title", records[5]["doi"].upper()),
+    ]
+    joined = join_export(tasks, exported)
+    assert {index: record["UT"] for index, record in joined.items()} == {
+        0: records[0]["id"],
+        1: records[1]["id"],
+    }
@@ -0,0 +1,43 @@
+"""按目标列只解析需要的字段：输出列和取值与全字段解析一致（不启动浏览器）"""
+
+import pytest
+
+from main import TARGET_COLUMNS
+from mock_wos import MockWOSServer, make_records
+from record_parser import FIELD_COLUMNS, fields_for_columns, rebuild_details
+
+LAST_NAME = "Nori"
+
+
+@pytest.fixture(scope="module")
+def pages():
+    server = MockWOSServer(make_records(20, LAST_NAME, missing_rate=0.3))
+    return [server.render_record(record) for record in server.records]
+
+
+@pytest.mark.parametrize(
+    "columns",
+    [
+        TARGET_COLUMNS,
+        ["DOI", "Abstract"],
+        ["Institution", "Country"],
+        ["Impact Factor"],
+    ],
+)
+def test_partial_extraction_matches_full(pages, columns):
+    fields = fields_for_columns(columns)
+    # 同一字段的列一起输出（如地址字段的机构、国家和全部地址）
+    expected_columns = {"Title", *(c for f in fields for c in FIELD_COLUMNS[f])}
+    for html in pages:
+        full = rebuild_details(html, LAST_NAME)
+        partial = rebuild_details(html, LAST_NAME, fields=fields)
+        assert set(partial) == expected_columns
+        assert partial == {col: full[col] for col in partial}
+
+
+def test_address_field_only_for_address_columns():
+    """不含地址列时不展开作者地址；多作者批量运行的各作者地址列同样需要地址字段"""
+    assert "author_address" not in fields_for_columns(["DOI", "Abstract"])
+    assert "author_address" in fields_for_columns(["Country"])
+    assert "author_address" in fields_for_columns(["Affiliations (Smith)"])
+    assert fields_for_columns(None) == set(FIELD_COLUMNS)
@@ -0,0 +1,155 @@
+"""WOS 导出文件解析：读取制表符分隔（Tab-delimited）或纯文本（Plain text）导出，转换成 TARGET_COLUMNS"""
+
+import csv
+import io
+
+from record_parser import (
+    NO_ADDRESS,
+    address_country,
+    format_details,
+    is_title_match,
+    normalize_doi,
+    normalize_title,
+    title_similarity,
+)
+from stage_timer import timed
+
+# 纯文本导出中每行一项、需要用 "; " 连接的字段（其余字段的续行用空格连接）
+LIST_TAGS = ("AU", "AF", "BA", "BF", "CA", "C1", "C3", "CR", "EM", "RP")
+
+
+def decode_export(data):
+    """导出文件的编码：新版为带 BOM 的 UTF-8，旧版为 UTF-16"""
+    if data.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return data.decode("utf-16")
+    return data.decode("utf-8-sig")
+
+
+def parse_tab_delimited(text):
+    """制表符分隔导出：首行为字段代码（PT AU ... UT），每行一条记录"""
+    reader = csv.reader(io.StringIO(text), delimiter="\t", quoting=csv.QUOTE_NONE)
+    header = next(reader, None)
+    if not header:
+        return []
+    header = [tag.strip() for tag in header]
+    records = []
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        records.append(
+            {tag: value.strip() for tag, value in zip(header, row) if tag and value}
+        )
+    return records
+
+
+def parse_plain_text(text):
+    """纯文本导出：每行 "XX 值"，续行以空格开头，ER 结束一条记录"""
+    records = []
+    record, tag = {}, None
+    for line in text.splitlines():
+        if line.startswith("   ") and tag:
+            separator = "; " if tag in LIST_TAGS else " "
+            record[tag] = f"{record[tag]}{separator}{line.strip()}"
+            continue
+        code, value = line[:2], line[3:].strip()
+        if code == "ER":
+            records.append(record)
+            record, tag = {}, None
+        elif code in ("FN", "VR", "EF") or not code.strip():
+            tag = None
+        else:
+            tag = code
+            record[tag] = value
+    return records
+
+
+@timed("read_export")
+def read_export(path):
+    """读取一个导出文件（自动识别编码和格式），返回 [{字段代码: 值}, ...]"""
+    with open(path, "rb") as f:
+        text = decode_export(f.read())
+    if text.startswith("FN "):
+        return parse_plain_text(text)
+    return parse_tab_delimited(text)
+
+
+def split_terms(value):
+    """关键词字段按分号拆分"""
+    return [term.strip() for term in (value or "").split(";") if term.strip()]
+
+
+def parse_export_address(c1, last_name):
+    """从 C1 字段取出该作者的地址：机构、国家取第一个地址，affiliations 为全部地址
+
+    C1 形如 "[Smith, John; Nori, Franco] RIKEN, Wako, Japan; [Nori, Franco] ..."，
+    没有方括号的旧记录取第一个地址（与详情页默认取地址 1 一致）。
+    """
+    if not c1:
+        return dict(NO_ADDRESS)
+    addresses = []
+    if c1.startswith("["):
+        for block in c1[1:].split("; ["):
+            authors, _, text = block.partition("]")
+            if last_name in authors and text.strip():
+                addresses.append(" ".join(text.split()).rstrip(";."))
+    else:
+        addresses = [c1.split("; ")[0].strip()]
+    if not addresses or not addresses[0]:
+        return dict(NO_ADDRESS)
+    address_parts = addresses[0].split(",")
+    return {
+        "institution": address_parts[0].strip() or "None",
+        "country": address_country(address_parts),
+        "affiliations": "; ".join(addresses),
+    }
+
+
+def export_details(record, last_name):
+    """一条导出记录转换成 format_details 形式的字典（导出文件不含影响因子）"""
+    keywords = split_terms(record.get("DE"))
+    keywordsplus = [term.capitalize() for term in split_terms(record.get("ID"))]
+    return format_details(
+        {
+            "title": record.get("TI", ""),
+            "impact_factor": None,
+            "keywords": keywords or ["None"],
+            "keywordsplus": keywordsplus or ["None"],
+            "author_address": parse_export_address(record.get("C1"), last_name),
+            "doi": record.get("DI") or "未获取 DOI",
+            "abstract": record.get("AB") or "未获取摘要",
+        }
+    )
+
+
+def join_export(tasks, records, threshold=0.8):
+    """把导出记录对应回输入行：先按 DOI，再按归一化标题，最后按标题相似度
+
+    tasks 为 [(行索引, 标题, DOI), ...]，返回 {行索引: 导出记录}。
+    按 DOI 对应上的记录同样做标题比对（与按 DOI 打开详情页一致），
+    不通过时当作 DOI 有误，改按标题对应。
+    """
+    by_doi, by_title = {}, {}
+    for record in records:
+        doi = normalize_doi(record.get("DI"))
+        if doi:
+            by_doi.setdefault(doi, record)
+        by_title.setdefault(normalize_title(record.get("TI", "")), record)
+
+    joined = {}
+    for index, title, doi in tasks:
+        record = by_doi.get(normalize_doi(doi)) if doi else None
+        if record is not None and not is_title_match(
+            title, record.get("TI", ""), threshold
+        ):
+            record = None
+        if record is None:
+            record = by_title.get(normalize_title(title))
+        if record is None:
+            matches = [
+                r for r in records if is_title_match(title, r.get("TI", ""), threshold)
+            ]
+            if matches:
+                record = max(matches, key=lambda r: title_similarity(title, r["TI"]))
+        if record is not None:
+            joined[index] = record
+    return joined